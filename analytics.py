@@ -0,0 +1,637 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur d'analyse partagé par dashboard.py et dashboard_enhanced.py
+
+Les jeux de données sont chargés une seule fois par processus
+(st.cache_resource) et tous les agrégats des pages sont calculés ici,
+en cache (st.cache_data) avec une durée de vie et un nombre d'entrées
+bornés. Servis par le même serveur Streamlit (app.py, application
+multipage), les deux dashboards partagent donc une seule copie en mémoire
+des données et des agrégats ; lancés séparément, ce sont deux processus
+qui ne partagent que les artefacts Arrow (voir artifacts.py).
+
+Les DataFrames renvoyés par load_data() sont partagés entre sessions :
+ils ne doivent jamais être modifiés en place (utiliser .copy()).
+
+Si refresher.py publie les données (DASHBOARD_RELEASES), elles sont lues
+dans la version servie. Les jeux de données et les agrégats indexés par
+version sont rechargés dès qu'une table change ; refresh() vide les
+autres caches des tables modifiées. Aucun redémarrage n'est nécessaire.
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import artifacts
+import search_index
+from correlation import GroupedCorrelation
+from cross_correlation import cross_correlations
+from distributions import DistributionService
+from downsampling import TrendPyramid
+from forecasting import forecast_all
+from geo import LOCATION_DEMAND_CSV, Gazetteer, drill_down
+from refresher import current_release
+from search_index import SearchIndex
+from store import FormationStore
+from taxonomy import TAXONOMY_PATH, TechnologyClassifier
+from trends import compute_trends
+from versioning import file_version
+
+# Durée de vie des caches (secondes) et nombre maximal d'entrées par fonction
+CACHE_TTL = 3600
+MAX_ENTRIES = 32
+
+# Nombre de blocs de termes prévus en parallèle
+FORECAST_JOBS = 4
+
+# Fichiers sources
+FORMATIONS_CSV = "df_final_clean_no_empty.csv"
+GOOGLE_TRENDS_CSV = "tendances_google_france.csv"
+REMOTIVE_CSV = "remotive_jobs_clean.csv"
+ADZUNA_CSV = "adzuna_offres_brutes.csv"
+DATASET_TABLES = (FORMATIONS_CSV, GOOGLE_TRENDS_CSV, REMOTIVE_CSV, ADZUNA_CSV)
+
+# Base SQLite optionnelle (voir store.py) : les offres restent en base et
+# les agrégats sur les offres sont calculés en SQL
+STORE_PATH = os.environ.get("FORMATION_DB")
+
+
+# ============================
+# Chargement des données
+# ============================
+def _release_path(name):
+    """Chemin d'un fichier publié : dans la version servie par refresher.py s'il y en a une"""
+    release = current_release()
+    return name if release is None else os.path.join(release['path'], name)
+
+
+def _artifacts_dir():
+    release = current_release()
+    return None if release is None else os.path.join(release['path'], artifacts.ARTIFACTS_DIR)
+
+
+def _load(csv_name):
+    """Table publiée : artefact Arrow projeté en mémoire s'il existe, sinon CSV"""
+    return artifacts.load(_release_path(csv_name), _artifacts_dir())
+
+
+def _store_path():
+    if not STORE_PATH or current_release() is None:
+        return STORE_PATH
+    return _release_path(os.path.basename(STORE_PATH))
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=1)
+def _store(path):
+    return FormationStore(path)
+
+
+def store():
+    """Base analytique si FORMATION_DB désigne un fichier existant, sinon None"""
+    path = _store_path()
+    if path and os.path.exists(path):
+        return _store(path)
+    return None
+
+
+def _table_version(name):
+    """Empreinte de la table dans le manifeste de la version servie, sinon date et taille du fichier lu"""
+    release = current_release()
+    if release is not None and name in release['tables']:
+        return release['tables'][name]
+    return file_version(artifacts.source_path(_release_path(name), _artifacts_dir()))
+
+
+def _data_version(*paths):
+    """Version des données : celle de la base si elle est utilisée, sinon celle des CSV"""
+    if store() is not None:
+        return _table_version(os.path.basename(STORE_PATH)) if current_release() else file_version(STORE_PATH)
+    return "|".join(_table_version(path) for path in paths)
+
+
+def data_release():
+    """Nom de la version servie par refresher.py (None si les données ne sont pas versionnées)"""
+    release = current_release()
+    return None if release is None else release['name']
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=1)
+def _load_datasets(data_version):
+    """Lit les données une seule fois par version pour tout le processus
+
+    Avec la base, les offres ne sont pas chargées en mémoire (None). Sinon
+    chaque table est ouverte depuis son artefact Arrow projeté en mémoire
+    s'il a été publié par stage.py (voir artifacts.py), ou lue depuis le CSV.
+    """
+    db = store()
+    if db is not None:
+        return db.formations(), db.trends_wide(), None, None
+
+    # Données principales
+    df_formations = _load(FORMATIONS_CSV)
+
+    # Données Google Trends
+    df_google = _load(GOOGLE_TRENDS_CSV)
+    df_google['date'] = pd.to_datetime(df_google['date'])
+
+    # Données des offres
+    df_remotive = _load(REMOTIVE_CSV)
+    df_adzuna = _load(ADZUNA_CSV)
+
+    return df_formations, df_google, df_remotive, df_adzuna
+
+
+def _datasets():
+    """Données de la version courante (relues seulement si l'une de leurs tables change)"""
+    return _load_datasets(_data_version(*DATASET_TABLES))
+
+
+def load_data():
+    """Charge et prépare toutes les données (et vide les caches d'une table modifiée)
+
+    Les versions lues sont notées dans la session : un fragment relancé
+    après une nouvelle version relance toute la page (voir fragments.py).
+    """
+    try:
+        refresh()
+        st.session_state[SESSION_VERSIONS] = data_versions()
+        return _datasets()
+    except Exception as e:
+        st.error(f"Erreur lors du chargement des données : {e}")
+        return None, None, None, None
+
+
+def is_certified(certification):
+    """Masque des formations certifiantes (ni vide, ni 'non')"""
+    return certification.notna() & (certification != '') & (certification != 'non')
+
+
+# ============================
+# Vue d'ensemble
+# ============================
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def overview_metrics():
+    """Métriques principales de la vue d'ensemble"""
+    df_formations = _datasets()[0]
+    return {
+        'total_formations': len(df_formations),
+        'total_demand': df_formations['demand_offres'].sum(),
+        'avg_duration': df_formations['duree_heures'].mean(),
+        'cert_ratio': is_certified(df_formations['certification']).mean() * 100,
+    }
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def top_formations(column='demand_offres', n=10):
+    """Les n formations ayant la plus grande valeur de `column`"""
+    return _datasets()[0].nlargest(n, column)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def category_demand():
+    """Demande totale et nombre de formations par catégorie"""
+    if store() is not None:
+        return store().category_demand()
+    return _datasets()[0].groupby('categorie').agg({
+        'demand_offres': 'sum',
+        'titre': 'count'
+    }).reset_index()
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def category_ratio():
+    """Ratio demande/étudiants moyen par catégorie, trié décroissant"""
+    return _datasets()[0].groupby('categorie')['ratio_demande_etudiants'].mean().sort_values(ascending=False)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def certification_counts(n=10):
+    """Les n certifications les plus fréquentes"""
+    return _datasets()[0]['certification'].value_counts().head(n)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def certification_status():
+    """Nombre de formations avec / sans certification"""
+    certified = is_certified(_datasets()[0]['certification'])
+    return certified.map({True: 'Avec certification', False: 'Sans certification'}).value_counts()
+
+
+# ============================
+# Tendances / Analyse des formations
+# ============================
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def filter_by_demand(min_demand, categories):
+    """Formations ayant au moins `min_demand` offres dans les catégories données"""
+    df_formations = _datasets()[0]
+    return df_formations[
+        (df_formations['demand_offres'] >= min_demand) &
+        (df_formations['categorie'].isin(list(categories)))
+    ]
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def filter_by_duration(cert_filter, min_duration, max_duration):
+    """Formations filtrées par statut de certification et tranche de durée"""
+    filtered_df = _datasets()[0]
+    if cert_filter == "Certifiantes":
+        filtered_df = filtered_df[is_certified(filtered_df['certification'])]
+    elif cert_filter == "Non certifiantes":
+        filtered_df = filtered_df[~is_certified(filtered_df['certification'])]
+
+    return filtered_df[
+        (filtered_df['duree_heures'] >= min_duration) &
+        (filtered_df['duree_heures'] <= max_duration)
+    ].copy()
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def category_trends(min_demand, categories):
+    """Tableau des tendances par catégorie pour un filtre de la page Tendances"""
+    if store() is not None:
+        return store().category_trends(min_demand, categories)
+    cat_trends = filter_by_demand(min_demand, categories).groupby('categorie').agg({
+        'demand_offres': ['mean', 'sum', 'count'],
+        'duree_heures': 'mean',
+        'ratio_demande_etudiants': 'mean'
+    }).round(2)
+
+    cat_trends.columns = ['Demande Moyenne', 'Demande Totale', 'Nombre Formations',
+                          'Durée Moyenne', 'Ratio Moyen']
+    return cat_trends
+
+
+# ============================
+# Distributions (histogrammes / boxplots)
+# ============================
+@st.cache_resource(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def distribution(column, by=None):
+    """Sketches précalculés d'une colonne des formations, globaux et par `by`
+
+    `by` peut être une colonne des formations ou 'certifiante' (statut de
+    certification). Les sketches sont partagés : ne pas les modifier.
+    """
+    df_formations = _datasets()[0]
+    if by == 'certifiante':
+        df_formations = df_formations.assign(certifiante=is_certified(df_formations['certification']))
+    return DistributionService(df_formations, column, by)
+
+
+def demand_distribution(min_demand, categories):
+    """Distribution de la demande pour un filtre de la page Tendances"""
+    return distribution('demand_offres', 'categorie').subset(categories).restrict(low=min_demand)
+
+
+def duration_distribution(cert_filter="Toutes", min_duration=None, max_duration=None):
+    """Distribution des durées pour un filtre de la page Analyse des formations"""
+    keys = {"Certifiantes": [True], "Non certifiantes": [False]}.get(cert_filter)
+    return distribution('duree_heures', 'certifiante').subset(keys).restrict(min_duration, max_duration)
+
+
+# ============================
+# Google Trends
+# ============================
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def _trends(freq, window, data_version):
+    return compute_trends(_datasets()[1], freq, window)
+
+
+def trends_analysis(freq='hebdomadaire', window=4):
+    """Indicateurs de tendance de tous les termes (voir trends.py), un calcul par version du CSV"""
+    return _trends(freq, window, _data_version(GOOGLE_TRENDS_CSV))
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def _trend_pyramid(data_version):
+    return TrendPyramid(_datasets()[1].set_index('date'))
+
+
+def trend_pyramid():
+    """Pyramide min-max des séries Google Trends (voir downsampling.py), partagée, par version du CSV"""
+    return _trend_pyramid(_data_version(GOOGLE_TRENDS_CSV))
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def _forecasts(horizon, freq, data_version):
+    return forecast_all(_datasets()[1], horizon, freq, n_jobs=FORECAST_JOBS)
+
+
+def forecasts(horizon=6, freq='mensuelle'):
+    """Prévisions de tous les termes (voir forecasting.py), un calcul par version du CSV"""
+    return _forecasts(horizon, freq, _data_version(GOOGLE_TRENDS_CSV))
+
+
+def _tokens(text):
+    return {word for word in re.findall(r"\w+", str(text).lower()) if len(word) > 2}
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def forecast_category_growth(horizon=6, freq='mensuelle'):
+    """Croissance prévue par catégorie de formation
+
+    Moyenne de la croissance prévue des termes Google Trends qui partagent
+    un mot avec la catégorie, sinon croissance médiane de tous les termes.
+    """
+    growth = forecasts(horizon, freq)['growth_pct'].replace([np.inf, -np.inf], np.nan).dropna()
+    rows = {}
+    for categorie in _datasets()[0]['categorie'].dropna().unique():
+        terms = [term for term in growth.index if _tokens(term) & _tokens(categorie)]
+        rows[categorie] = {
+            'croissance_pct': growth[terms].mean() if terms else growth.median(),
+            'termes': ", ".join(terms) if terms else "tous les termes (médiane)",
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+# ============================
+# Prédictions
+# ============================
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def growth_scores():
+    """Formations enrichies des scores de croissance et de niche"""
+    df_scores = _datasets()[0].copy()
+    df_scores['score_croissance'] = (df_scores['ratio_demande_etudiants'] *
+                                     df_scores['demand_offres'] /
+                                     df_scores['duree_heures'])
+    df_scores['score_niche'] = (df_scores['ratio_demande_etudiants'] *
+                                (df_scores['demand_offres'] / df_scores['demand_offres'].max()))
+    return df_scores
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def category_growth():
+    """Potentiel de croissance moyen par catégorie"""
+    return growth_scores().groupby('categorie').agg({
+        'score_croissance': 'mean',
+        'demand_offres': 'sum',
+        'ratio_demande_etudiants': 'mean'
+    }).sort_values('score_croissance', ascending=False)
+
+
+def _taxonomy_version():
+    """Version de taxonomy.json (date de modification) : clé des caches technologiques"""
+    return os.path.getmtime(TAXONOMY_PATH)
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def _technology_tags(dataset, taxonomy_version):
+    """Étiquettes technologiques d'un dataset pour une version de taxonomy.json"""
+    df_formations, _, df_remotive, df_adzuna = _datasets()
+    df = {'formations': df_formations, 'remotive': df_remotive, 'adzuna': df_adzuna}[dataset]
+    column = 'titre' if dataset == 'formations' else 'title'
+    if df is None or column not in df.columns:
+        return None
+    return TechnologyClassifier.from_file(TAXONOMY_PATH).tag(df[column])
+
+
+def technology_tags(dataset='formations'):
+    """Étiquettes technologiques ('formations', 'remotive' ou 'adzuna')
+
+    Calculées une fois, puis à nouveau seulement si taxonomy.json change.
+    """
+    return _technology_tags(dataset, _taxonomy_version())
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def _technology_scores(taxonomy_version):
+    tags = technology_tags('formations')
+    technologies = tags.columns.drop('technologie')
+    scores = growth_scores()['score_croissance'].fillna(0).to_numpy()
+    membership = tags[technologies].to_numpy()
+    return pd.Series(np.where(membership, scores[:, None], 0).sum(axis=0), index=technologies)
+
+
+def technology_scores():
+    """Score de croissance cumulé par technologie (une formation comptée une fois par technologie)
+
+    Recalculé si taxonomy.json change, comme technology_tags.
+    """
+    return _technology_scores(_taxonomy_version())
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def _technology_offer_counts(taxonomy_version):
+    if store() is not None:
+        return store().technology_offer_counts()
+    counts = [tags.drop(columns='technologie').sum()
+              for tags in (technology_tags('remotive'), technology_tags('adzuna')) if tags is not None]
+    return sum(counts) if counts else None
+
+
+def technology_offer_counts():
+    """Nombre d'offres Remotive + Adzuna par technologie (recalculé si taxonomy.json change)"""
+    return _technology_offer_counts(_taxonomy_version())
+
+
+# ============================
+# Comparaisons
+# ============================
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def formation_category_counts():
+    """Nombre de formations par catégorie"""
+    return _datasets()[0]['categorie'].value_counts()
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def remotive_category_counts(n=10):
+    """Les n catégories d'offres Remotive les plus fréquentes (None si absentes)"""
+    if store() is not None:
+        counts = store().offer_counts('category', 'remotive', n)
+        return counts if len(counts) else None
+    df_remotive = _datasets()[2]
+    if df_remotive is None or 'category' not in df_remotive.columns:
+        return None
+    return df_remotive['category'].value_counts().head(n)
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=1)
+def gazetteer():
+    """Référentiel ville -> département -> région (voir geo.py)"""
+    return Gazetteer.from_file()
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def adzuna_location_counts(n=10):
+    """Les n localisations normalisées d'offres Adzuna les plus fréquentes (None si absentes)
+
+    « Paris », « Paris 75 » et « Île-de-France, Paris » sont comptées
+    ensemble : les localisations distinctes sont comptées puis normalisées.
+    """
+    if store() is not None:
+        counts = store().offer_counts('location', 'adzuna', None)
+    else:
+        df_adzuna = _datasets()[3]
+        if df_adzuna is None or 'location' not in df_adzuna.columns:
+            return None
+        counts = df_adzuna['location'].value_counts()
+    if not len(counts):
+        return None
+    labels = gazetteer().labels(counts.index.to_series()).to_numpy()
+    return counts.groupby(labels).sum().sort_values(ascending=False).head(n).rename_axis('location')
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=1)
+def _location_demand(data_version):
+    return store().location_demand() if store() is not None else _load(LOCATION_DEMAND_CSV)
+
+
+def location_demand():
+    """Demande par source, région, département, ville et catégorie, calculée par stage.py (None sinon)"""
+    if store() is None and not os.path.exists(artifacts.source_path(_release_path(LOCATION_DEMAND_CSV),
+                                                                    _artifacts_dir())):
+        return None
+    demand = _location_demand(_data_version(LOCATION_DEMAND_CSV))
+    return demand if len(demand) else None
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def location_drill_down(region=None, departement=None, sources=None):
+    """Demande par catégorie au niveau inférieur de la sélection (régions, départements ou villes)"""
+    demand = location_demand()
+    return None if demand is None else drill_down(demand, region, departement, sources)
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def correlation_stats():
+    """Statistiques suffisantes des corrélations numériques, par catégorie (voir correlation.py)"""
+    df_formations = _datasets()[0]
+    columns = df_formations.select_dtypes(include="number").columns
+    return GroupedCorrelation(df_formations, columns, 'categorie')
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def numeric_correlation(categories=None):
+    """Matrice de corrélation des variables numériques pour un ensemble de catégories"""
+    return correlation_stats().corr(categories)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def _search_offer_correlations(freq, max_lag, data_version):
+    _, df_google, df_remotive, df_adzuna = _datasets()
+    if store() is not None:
+        return cross_correlations(df_google, None, freq, max_lag, offer_counts=store().offer_time_counts(freq))
+    return cross_correlations(df_google, [df_remotive, df_adzuna], freq, max_lag)
+
+
+def search_offer_correlations(freq='hebdomadaire', max_lag=4):
+    """Corrélations décalées termes Google x catégories d'offres (voir cross_correlation.py)"""
+    version = _data_version(GOOGLE_TRENDS_CSV, REMOTIVE_CSV, ADZUNA_CSV)
+    return _search_offer_correlations(freq, max_lag, version)
+
+
+# ============================
+# Données brutes
+# ============================
+def browse_offers(source, limit=100, offset=0):
+    """Page d'offres brutes ('remotive' ou 'adzuna') et nombre total d'offres
+
+    Avec la base, seule la page demandée est lue (LIMIT / OFFSET).
+    """
+    if store() is not None:
+        return store().browse(source, limit, offset), store().count('offers', source)
+    df = {'remotive': _datasets()[2], 'adzuna': _datasets()[3]}[source]
+    if df is None:
+        return None, 0
+    return df.iloc[offset:offset + limit], len(df)
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=1)
+def _search_index(directory, version):
+    return SearchIndex.load(directory)
+
+
+def offer_index():
+    """Index de recherche des offres publié par stage.py (voir search_index.py), sinon None"""
+    directory = _release_path(search_index.INDEX_DIR)
+    if not SearchIndex.exists(directory):
+        return None
+    return _search_index(directory, file_version(SearchIndex.version_path(directory)))
+
+
+def search_offers(query, limit=50):
+    """Offres les mieux classées (BM25) pour une recherche, None sans index"""
+    index = offer_index()
+    return None if index is None else index.search(query, limit)
+
+
+def formation_offers(title, limit=100):
+    """Offres comptées dans la demande d'une formation et leur nombre total"""
+    index = offer_index()
+    return (None, 0) if index is None else index.formation_offers(title, limit)
+
+
+# ============================
+# Opportunités
+# ============================
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES)
+def opportunity_analysis():
+    """Demande, ratio et score d'opportunité par catégorie, triés par score"""
+    if store() is not None:
+        cat_analysis = store().opportunity_analysis()
+    else:
+        cat_analysis = _datasets()[0].groupby('categorie').agg({
+            'demand_offres': ['sum', 'mean', 'count'],
+            'ratio_demande_etudiants': 'mean'
+        }).round(2)
+        cat_analysis.columns = ['Demande Totale', 'Demande Moyenne', 'Nombre Formations', 'Ratio Moyen']
+
+    cat_analysis['Opportunité Score'] = (cat_analysis['Demande Totale'] / cat_analysis['Nombre Formations']) * cat_analysis['Ratio Moyen']
+    return cat_analysis.sort_values('Opportunité Score', ascending=False)
+
+
+# ============================
+# Nouvelle version des données (voir refresher.py)
+# ============================
+# Agrégats dont la clé de cache ne contient pas la version, par table lue
+DEPENDENCIES = {
+    FORMATIONS_CSV: [overview_metrics, top_formations, category_demand, category_ratio, certification_counts,
+                     certification_status, filter_by_demand, filter_by_duration, category_trends, distribution,
+                     forecast_category_growth, growth_scores, category_growth, _technology_tags, _technology_scores,
+                     formation_category_counts, correlation_stats, numeric_correlation, opportunity_analysis],
+    GOOGLE_TRENDS_CSV: [forecast_category_growth],
+    REMOTIVE_CSV: [remotive_category_counts, _technology_tags, _technology_offer_counts],
+    ADZUNA_CSV: [adzuna_location_counts, _technology_tags, _technology_offer_counts],
+    LOCATION_DEMAND_CSV: [location_drill_down],
+}
+_seen_versions = {}
+# Clé de session : versions des tables lues par la dernière exécution complète de la page
+SESSION_VERSIONS = "versions_donnees"
+
+
+def refresh():
+    """Vide les caches des tables modifiées depuis le dernier appel ; renvoie ces tables
+
+    Un stat par table (ou de CURRENT) tant que rien ne change. Les caches
+    indexés par version (_datasets, tendances, prévisions, index de
+    recherche...) se renouvellent d'eux-mêmes.
+    """
+    changed = []
+    for table in DEPENDENCIES:
+        try:
+            version = _data_version(table)
+        except OSError:  # table absente
+            version = None
+        if _seen_versions.setdefault(table, version) != version:
+            _seen_versions[table] = version
+            changed.append(table)
+    for cache in {cache for table in changed for cache in DEPENDENCIES[table]}:
+        cache.clear()
+    return changed
+
+
+def data_versions():
+    """Version de chaque table vue par le dernier refresh()"""
+    return tuple(_seen_versions.get(table) for table in DEPENDENCIES)
+
+
+def is_stale():
+    """Vrai si une nouvelle version a été servie depuis la dernière exécution complète de la session"""
+    refresh()
+    versions = data_versions()
+    previous = st.session_state.get(SESSION_VERSIONS, versions)
+    st.session_state[SESSION_VERSIONS] = versions
+    return previous != versions
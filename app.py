@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Point d'entrée commun des deux dashboards (application multipage)
+
+    streamlit run app.py
+
+dashboard.py et dashboard_enhanced.py deviennent deux pages d'un même
+serveur Streamlit : un seul processus, donc une seule copie en mémoire des
+données et des agrégats d'analytics.py pour les deux dashboards. Lancés
+séparément (run_dashboard*.sh), ils restent deux processus qui ne partagent
+que les artefacts Arrow projetés en mémoire (voir artifacts.py).
+"""
+
+import os
+import runpy
+
+import streamlit as st
+
+RACINE = os.path.dirname(os.path.abspath(__file__))
+
+PAGES = [
+    ("dashboard.py", "Dashboard", "📊", "dashboard"),
+    ("dashboard_enhanced.py", "Dashboard enrichi", "✨", "enrichi"),
+]
+
+# st.navigation (>= 1.36), sinon le dashboard principal seul
+if hasattr(st, "navigation"):
+    st.navigation([st.Page(os.path.join(RACINE, script), title=titre, icon=icone, url_path=chemin)
+                   for script, titre, icone, chemin in PAGES]).run()
+else:
+    runpy.run_path(os.path.join(RACINE, PAGES[0][0]), run_name="__main__")
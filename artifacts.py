@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Artefacts Arrow projetés en mémoire, partagés entre processus
+
+stage.py publie les tables lues par les dashboards (formations enrichies,
+Google Trends, offres) au format Arrow IPC (Feather v2) non compressé,
+dans ARTIFACTS_DIR (variable DASHBOARD_ARTIFACTS, 'artifacts' par
+défaut). Les dashboards les ouvrent par projection mémoire (mmap) : les
+colonnes numériques sans valeur manquante et les colonnes de texte
+(chaînes Arrow) ne sont pas copiées. Plusieurs serveurs Streamlit sur une
+même machine partagent ainsi une seule copie des données (cache de pages
+du système), et l'ouverture ne dépend pas de la taille des fichiers.
+
+Les DataFrames obtenus pointent vers le fichier : ils sont en lecture
+seule (ne jamais les modifier en place). Sans pyarrow, ou sans artefact,
+les CSV sont lus comme avant.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow est optionnel : lecture des CSV
+    pa = None
+
+ARTIFACTS_DIR = os.environ.get("DASHBOARD_ARTIFACTS", "artifacts")
+EXTENSION = ".arrow"
+
+
+def artifact_path(csv_name, directory=None):
+    """Chemin de l'artefact correspondant à un CSV (même nom, extension .arrow)"""
+    name = os.path.splitext(os.path.basename(csv_name))[0]
+    return os.path.join(ARTIFACTS_DIR if directory is None else directory, name + EXTENSION)
+
+
+def available(csv_name, directory=None):
+    """L'artefact du CSV existe et peut être lu"""
+    return pa is not None and os.path.exists(artifact_path(csv_name, directory))
+
+
+def source_path(csv_name, directory=None):
+    """Fichier réellement lu pour ce CSV : l'artefact s'il existe, sinon le CSV"""
+    return artifact_path(csv_name, directory) if available(csv_name, directory) else csv_name
+
+
+def _arrow_compatible(df):
+    """Colonnes objet de types mélangés converties en texte (valeurs manquantes gardées)"""
+    df = df.copy()
+    for column in df.columns[df.dtypes == object]:
+        values = df[column]
+        df[column] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def write_frame(df, path):
+    """Écrit un DataFrame en Arrow IPC non compressé (remplacement atomique du fichier)"""
+    if pa is None:
+        raise ImportError("pyarrow est nécessaire pour publier les artefacts")
+    # Un seul lot par colonne : une lecture par positions (iloc) ne recopie pas toute la colonne
+    table = pa.Table.from_pandas(_arrow_compatible(df), preserve_index=False).combine_chunks()
+    temporary = f"{path}.tmp"
+    with pa.OSFile(temporary, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(temporary, path)
+    return path
+
+
+def publish(frames, directory=None):
+    """Publie {nom du CSV: DataFrame} dans `directory` ; renvoie les chemins écrits"""
+    directory = ARTIFACTS_DIR if directory is None else directory
+    os.makedirs(directory, exist_ok=True)
+    return [write_frame(df, artifact_path(name, directory)) for name, df in frames.items() if df is not None]
+
+
+def _string_dtype():
+    try:
+        # Même type de texte que read_csv (pandas >= 2.3), stocké en Arrow
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        return pd.StringDtype("pyarrow")
+
+
+def read_frame(path):
+    """DataFrame projeté en mémoire (sans copie des colonnes numériques complètes et du texte)"""
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    strings = _string_dtype()
+    return table.to_pandas(split_blocks=True,
+                           types_mapper={pa.string(): strings, pa.large_string(): strings}.get)
+
+
+def load(csv_name, directory=None, **read_csv_kwargs):
+    """Table d'un CSV : artefact projeté en mémoire s'il existe, sinon lecture du CSV"""
+    if available(csv_name, directory):
+        return read_frame(artifact_path(csv_name, directory))
+    return pd.read_csv(csv_name, **read_csv_kwargs)
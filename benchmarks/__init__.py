@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks et générateurs de données synthétiques (voir run_benchmarks.py)"""
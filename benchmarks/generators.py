@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Générateurs de données synthétiques pour les benchmarks
+
+Chaque générateur reproduit les colonnes des vrais fichiers d'entrée
+(offres Adzuna / Remotive, catalogue des formations, feuille des
+étudiants, Google Trends) pour un nombre de lignes donné. Ils sont
+déterministes : une même graine donne les mêmes données.
+"""
+
+import numpy as np
+import pandas as pd
+
+from taxonomy import load_taxonomy
+
+# Vocabulaire des titres : mots-clés de la taxonomie + termes génériques
+KEYWORDS = sorted({kw for keywords in load_taxonomy().values() for kw in keywords})
+TOPICS = KEYWORDS + ["python", "javascript", "sql", "react", "java", "linux", "design", "marketing"]
+ROLES = ["Engineer", "Developer", "Analyst", "Manager", "Consultant", "Architect", "Specialist"]
+LEVELS = ["Débutant", "Intermédiaire", "Avancé", "Expert", "Pro"]
+CATEGORIES = ["Data", "Développement", "Cloud", "Cybersécurité", "DevOps", "Design", "Marketing", "IA"]
+CERTIFICATIONS = ["oui", "non", "Google", "AWS", "Microsoft", "Cisco"]
+COMPANIES = ["Capgemini", "Sopra", "Atos", "Thales", "OVHcloud", "Doctolib", "Criteo", "Acme"]
+LOCATIONS = ["Paris", "Lyon", "Marseille", "Toulouse", "Lille", "Nantes", "Bordeaux", "Île-de-France"]
+OFFER_CATEGORIES = ["IT Jobs", "Data Jobs", "Engineering Jobs", "Marketing Jobs", "Consultancy Jobs"]
+REMOTIVE_CATEGORIES = ["Software Development", "Data", "DevOps / Sysadmin", "Design", "Marketing"]
+TREND_TERMS = ["Data Science", "Intelligence Artificielle", "Cybersécurité", "Cloud Computing",
+               "DevOps", "Blockchain", "Python", "Développement Web"]
+STUDENTS_COLUMN = "Étudiants Intéressés - Web4Jobs"
+
+# Nombre de semaines des séries Google Trends (au-delà, on ajoute des termes)
+TREND_PERIODS = 520
+
+
+def _pick(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+
+def _titles(rng, n, suffixes):
+    """Titres « <sujet> <suffixe> » en casse titre, comme les vraies offres"""
+    topics = pd.Series(_pick(rng, TOPICS, n)).str.title()
+    return (topics + " " + _pick(rng, suffixes, n)).to_numpy()
+
+
+def _dates(rng, n, start="2021-01-01", days=3 * 365):
+    offsets = pd.to_timedelta(np.sort(rng.integers(0, days * 24, n)), unit="h")
+    return pd.Timestamp(start) + offsets
+
+
+def formations_catalogue(n, seed=0):
+    """Catalogue brut des formations (openclassrooms_formations_final.csv)"""
+    rng = np.random.default_rng(seed)
+    titres = pd.Series(_titles(rng, n, LEVELS)) + " " + pd.Series(np.arange(n)).astype(str)
+    return pd.DataFrame({
+        'titre': titres,
+        'categorie': _pick(rng, CATEGORIES, n),
+        'duree_heures': rng.integers(5, 400, n),
+        'certification': _pick(rng, CERTIFICATIONS, n),
+        'langue': _pick(rng, ["fr", "en"], n),
+        'titre_simplifie': titres.str.lower(),
+    })
+
+
+def formations_final(n, seed=0):
+    """Formations enrichies de la demande (df_final_clean_no_empty.csv)"""
+    rng = np.random.default_rng(seed + 1)
+    df = formations_catalogue(n, seed)
+    students = rng.integers(0, 60, n)
+    df['demand_offres'] = rng.poisson(40, n)
+    df['formation'] = df['titre']
+    df[STUDENTS_COLUMN] = students
+    df['ratio_demande_etudiants'] = np.where(students > 0, df['demand_offres'] / np.maximum(students, 1),
+                                             df['demand_offres'])
+    return df
+
+
+def etudiants_sheet(catalogue, seed=0):
+    """Feuille des étudiants telle que lue avec header=None (en-têtes en première ligne)"""
+    rng = np.random.default_rng(seed + 2)
+    titres = catalogue['titre'].to_numpy()
+    rows = pd.DataFrame({0: titres, 1: rng.integers(0, 60, len(titres)).astype(str)})
+    header = pd.DataFrame({0: ['titre'], 1: [STUDENTS_COLUMN]})
+    return pd.concat([header, rows], ignore_index=True)
+
+
+def remotive_offers(n, seed=0):
+    """Offres Remotive (remotive_jobs_clean.csv)"""
+    rng = np.random.default_rng(seed + 3)
+    return pd.DataFrame({
+        'title': _titles(rng, n, ROLES),
+        'company_name': _pick(rng, COMPANIES, n),
+        'category': _pick(rng, REMOTIVE_CATEGORIES, n),
+        'publication_date': _dates(rng, n).strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+
+
+def adzuna_offers(n, seed=0):
+    """Offres Adzuna brutes (adzuna_offres_brutes.csv, catégorie sous forme de dict)"""
+    rng = np.random.default_rng(seed + 4)
+    labels = pd.Series(_pick(rng, OFFER_CATEGORIES, n))
+    return pd.DataFrame({
+        'title': _titles(rng, n, ROLES),
+        'company': _pick(rng, COMPANIES, n),
+        'location': _pick(rng, LOCATIONS, n),
+        'created': _dates(rng, n).strftime("%Y-%m-%d %H:%M:%S"),
+        'category': ("{'label': '" + labels + "'}").to_numpy(),
+    })
+
+
+def google_trends(n, seed=0, periods=TREND_PERIODS):
+    """Séries Google Trends hebdomadaires (tendances_google_france.csv)
+
+    `n` est le nombre de valeurs (dates x termes) : au-delà de `periods`
+    semaines, la taille augmente par le nombre de termes.
+    """
+    rng = np.random.default_rng(seed + 5)
+    periods = min(n, periods)
+    n_terms = max(n // periods, 1)
+    terms = [TREND_TERMS[i % len(TREND_TERMS)] + (f" {i // len(TREND_TERMS)}" if i >= len(TREND_TERMS) else "")
+             for i in range(n_terms)]
+
+    t = np.arange(periods)[:, None]
+    level = rng.uniform(20, 70, n_terms)
+    slope = rng.normal(0, 0.05, n_terms)
+    season = rng.uniform(0, 10, n_terms) * np.sin(2 * np.pi * t / 52 + rng.uniform(0, 2 * np.pi, n_terms))
+    values = np.clip(level + slope * t + season + rng.normal(0, 4, (periods, n_terms)), 0, 100).round()
+
+    df = pd.DataFrame(values.astype(int), columns=terms)
+    df.insert(0, 'date', pd.date_range("2015-01-04", periods=periods, freq="W"))
+    return df
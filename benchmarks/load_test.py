@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Test de charge des dashboards : N sessions simultanées sans navigateur
+
+Chaque session virtuelle est un AppTest (API de test de Streamlit) qui
+exécute le dashboard dans ce processus, comme le ferait le serveur : les
+caches st.cache_data / st.cache_resource sont partagés entre sessions.
+Une session enchaîne des actions tirées au hasard (graine fixe) :
+changement de page, déplacement d'un curseur, choix dans une liste.
+
+Le rapport donne les percentiles de latence par type d'action, le débit
+(actions par seconde) et la mémoire du processus au cours du test.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.load_test --sessions 8 --actions 20
+    python -m benchmarks.load_test --data-dir /chemin/vers/les/csv
+    python -m benchmarks.load_test --synthetic 100000 --script dashboard_enhanced.py
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import streamlit.logger
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Les caches Streamlit avertissent à chaque appel hors d'un serveur Streamlit
+streamlit.logger.set_log_level("error")
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.run_benchmarks import RESULTS_DIR, _write_dashboard_data, code_version  # noqa: E402
+
+NAVIGATION_LABEL = "Choisissez une section :"
+PERCENTILES = [50, 90, 95, 99]
+# Intervalle d'échantillonnage de la mémoire (secondes)
+MEMORY_INTERVAL = 0.5
+
+
+def rss_mb():
+    """Mémoire résidente du processus (Mo) : psutil, sinon /proc (Linux)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemorySampler(threading.Thread):
+    """Échantillonne la mémoire du processus pendant le test"""
+
+    def __init__(self, start_time, interval=MEMORY_INTERVAL):
+        super().__init__(daemon=True)
+        self.start_time = start_time
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append((time.perf_counter() - self.start_time, rss_mb()))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.samples.append((time.perf_counter() - self.start_time, rss_mb()))
+
+
+def _random_slider_value(slider, rng):
+    """Nouvelle valeur d'un curseur (simple ou intervalle, numérique ou date)"""
+    def point():
+        steps = int((slider.max - slider.min) / slider.step) if slider.step else 0
+        return slider.min + rng.randint(0, max(steps, 0)) * (slider.step or 0)
+
+    value = slider.value
+    first = value[0] if isinstance(value, (tuple, list)) else value
+    if isinstance(first, datetime):
+        # Bornes exprimées en microsecondes depuis l'époque
+        def convert(v):
+            return datetime(1970, 1, 1) + timedelta(microseconds=v)
+    elif isinstance(first, int):
+        convert = int
+    else:
+        def convert(v):
+            return v
+
+    if isinstance(value, (tuple, list)):
+        low, high = sorted((point(), point()))
+        return convert(low), convert(high)
+    return convert(point())
+
+
+def _actions(at):
+    """Actions possibles sur l'état courant : (type, libellé, fonction)"""
+    actions = []
+    navigation = next(s for s in at.sidebar.selectbox if s.label == NAVIGATION_LABEL)
+    for page in navigation.options:
+        actions.append(('page', page, lambda rng, page=page: navigation.select(page)))
+    for slider in at.slider:
+        actions.append(('curseur', slider.label,
+                        lambda rng, slider=slider: slider.set_value(_random_slider_value(slider, rng))))
+    for box in at.selectbox:
+        if box.label != NAVIGATION_LABEL and box.options:
+            actions.append(('liste', box.label, lambda rng, box=box: box.select(rng.choice(box.options))))
+    return actions
+
+
+def run_session(script, session_id, n_actions, seed, timeout, start_time):
+    """Exécute une session virtuelle ; renvoie ses mesures"""
+    rng = random.Random(seed + session_id)
+    records = []
+
+    def timed(kind, label, step):
+        started = time.perf_counter()
+        error = None
+        try:
+            step()
+            if at.exception:
+                error = at.exception[0].message
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        records.append({'session': session_id, 'action': kind, 'label': label,
+                        'start_s': started - start_time, 'latency_s': time.perf_counter() - started,
+                        'error': error})
+
+    at = AppTest.from_file(script, default_timeout=timeout)
+    timed('chargement', 'première exécution', at.run)
+    for _ in range(n_actions):
+        actions = _actions(at)
+        # Un changement de page sur trois actions, sinon un widget de la page
+        widgets = [a for a in actions if a[0] != 'page']
+        kind, label, action = rng.choice(widgets if widgets and rng.random() > 1 / 3 else actions)
+        timed(kind, label, lambda: action(rng).run())
+    return records
+
+
+def summarize(records, duration):
+    """Percentiles de latence (ms) par type d'action et au total, débit"""
+    def stats(latencies):
+        latencies = np.asarray(latencies) * 1000
+        return {'count': int(len(latencies)),
+                **{f"p{p}_ms": float(np.percentile(latencies, p)) for p in PERCENTILES},
+                'max_ms': float(latencies.max())}
+
+    ok = [r for r in records if r['error'] is None]
+    by_action = {}
+    for r in ok:
+        by_action.setdefault(r['action'], []).append(r['latency_s'])
+    return {
+        'actions': len(records),
+        'errors': len(records) - len(ok),
+        'duration_s': duration,
+        'throughput_per_s': len(records) / duration if duration else None,
+        'latency': {'total': stats([r['latency_s'] for r in ok]) if ok else None,
+                    **{kind: stats(values) for kind, values in by_action.items()}},
+    }
+
+
+def run_load_test(script, sessions, n_actions, seed=0, timeout=120, ramp_up=0.0):
+    """Lance `sessions` sessions simultanées ; renvoie (résumé, mesures, mémoire)"""
+    start_time = time.perf_counter()
+    sampler = MemorySampler(start_time)
+    sampler.start()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        futures = []
+        for session_id in range(sessions):
+            futures.append(executor.submit(run_session, script, session_id, n_actions, seed, timeout, start_time))
+            time.sleep(ramp_up)
+        records = [r for future in futures for r in future.result()]
+    duration = time.perf_counter() - start_time
+    sampler.stop()
+    return summarize(records, duration), records, sampler.samples
+
+
+def print_report(summary, memory):
+    print(f"\n{summary['actions']} actions en {summary['duration_s']:.1f} s "
+          f"({summary['throughput_per_s']:.2f} actions/s), {summary['errors']} erreurs")
+    header = "  ".join(f"{'p' + str(p):>8s}" for p in PERCENTILES)
+    print(f"{'action':12s} {'nombre':>7s}  {header}  {'max':>8s}   (ms)")
+    for kind, stats in summary['latency'].items():
+        if stats:
+            values = "  ".join(f"{stats[f'p{p}_ms']:8.0f}" for p in PERCENTILES)
+            print(f"{kind:12s} {stats['count']:7d}  {values}  {stats['max_ms']:8.0f}")
+    rss = [m for _, m in memory]
+    print(f"Mémoire du processus : début {rss[0]:.0f} Mo, pic {max(rss):.0f} Mo, fin {rss[-1]:.0f} Mo")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge des dashboards (sessions simultanées)")
+    parser.add_argument("--script", default="dashboard.py", help="dashboard à tester (relatif à la racine)")
+    parser.add_argument("--sessions", type=int, default=8, help="nombre de sessions simultanées")
+    parser.add_argument("--actions", type=int, default=20, help="actions par session")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="délai (s) entre deux démarrages de session")
+    parser.add_argument("--data-dir", help="répertoire des CSV (défaut : répertoire courant)")
+    parser.add_argument("--synthetic", type=int, metavar="LIGNES",
+                        help="génère des CSV synthétiques de cette taille au lieu de --data-dir")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="délai maximal d'une exécution (s)")
+    parser.add_argument("--output", help="fichier JSON du rapport (défaut : benchmarks/results/load_<version>.json)")
+    args = parser.parse_args(argv)
+
+    script = os.path.join(ROOT, args.script)
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as synthetic_dir:
+        if args.synthetic:
+            _write_dashboard_data(synthetic_dir, args.synthetic, args.seed)
+            os.chdir(synthetic_dir)
+        elif args.data_dir:
+            os.chdir(args.data_dir)
+        try:
+            summary, records, memory = run_load_test(script, args.sessions, args.actions,
+                                                     args.seed, args.timeout, args.ramp_up)
+        finally:
+            os.chdir(previous_dir)
+
+    print_report(summary, memory)
+    version = code_version()
+    report = {
+        'version': version,
+        'date': datetime.now().isoformat(timespec="seconds"),
+        'script': args.script,
+        'sessions': args.sessions,
+        'actions_per_session': args.actions,
+        'synthetic_rows': args.synthetic,
+        'seed': args.seed,
+        'summary': summary,
+        'memory_mb': [{'t_s': t, 'rss_mb': m} for t, m in memory],
+        'records': records,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"load_{version}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Rapport sauvegardé dans '{output}'")
+
+
+if __name__ == "__main__":
+    main()
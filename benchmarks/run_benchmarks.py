@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks des étapes de stage.py et des agrégats des dashboards
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sizes 1000 100000 10000000 --budget 120
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/ancienne_version.json
+
+Deux suites :
+- pipeline : chaque étape de préparation (pipeline.py) et d'analyse de stage.py ;
+- dashboard : chaque agrégat de analytics.py, cache vidé avant chaque mesure,
+  sur des CSV synthétiques écrits dans un répertoire temporaire.
+
+Les résultats (médiane et minimum des répétitions, lignes par seconde)
+sont écrits en JSON pour comparer deux versions du code. Un cas dont la
+médiane dépasse `--budget` secondes n'est pas relancé aux tailles
+supérieures (statut 'skipped').
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit.logger
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Les caches Streamlit avertissent à chaque appel hors d'un serveur Streamlit
+streamlit.logger.set_log_level("error")
+
+import analytics  # noqa: E402
+import geo  # noqa: E402
+import pipeline  # noqa: E402
+from benchmarks import generators  # noqa: E402
+from correlation import CorrelationStats  # noqa: E402
+from dedup import deduplicate  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+from semantic_matching import match_frames  # noqa: E402
+from sparse_demand import OfferFormationMatrix  # noqa: E402
+from token_ids import TokenArray  # noqa: E402
+from trends import compute_trends  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5]
+# Taille du catalogue face aux offres pour le mapping mots-clés -> formations
+CATALOGUE_SIZE = 1000
+
+
+def code_version():
+    """Commit courant (suffixé de '-dirty' si l'arbre est modifié), sinon 'local'"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "local"
+
+
+# ============================
+# Suite pipeline (stage.py)
+# ============================
+def _simple_keywords(titles):
+    """Mots-clés sans NLTK, pour préparer les entrées des étapes suivantes"""
+    return titles.str.lower().str.findall(r"[a-z]{3,}")
+
+
+def _associated_formations(n, catalogue, seed):
+    """0 à 3 formations du catalogue par offre (sinon 'Autres')"""
+    rng = np.random.default_rng(seed)
+    titres = catalogue['titre'].to_numpy()
+    counts = rng.integers(0, 4, n)
+    picks = np.split(titres[rng.integers(0, len(titres), counts.sum())], np.cumsum(counts)[:-1])
+    return [list(p) if len(p) else [pipeline.NO_FORMATION] for p in picks]
+
+
+def _write_sources(directory, n, seed):
+    catalogue = generators.formations_catalogue(n, seed)
+    generators.adzuna_offers(n, seed).to_csv(os.path.join(directory, "adzuna_offres_brutes.csv"), index=False)
+    catalogue.to_csv(os.path.join(directory, "openclassrooms_formations_final.csv"), index=False)
+    generators.remotive_offers(n, seed).to_csv(os.path.join(directory, "remotive_jobs_clean.csv"), index=False)
+    generators.etudiants_sheet(catalogue, seed).to_csv(
+        os.path.join(directory, "etudiants_interesses_web4jobs.csv"), index=False, header=False)
+
+
+def pipeline_cases(n, seed, directory):
+    """Cas de la suite pipeline : {nom: (préparation -> arguments, fonction)}"""
+    stop_words = {}
+
+    def offers():
+        df = generators.adzuna_offers(n, seed)
+        df['keywords'] = _simple_keywords(df['title'])
+        return df
+
+    def offers_with_formations():
+        catalogue = generators.formations_catalogue(CATALOGUE_SIZE, seed)
+        frames = [generators.remotive_offers(n // 2, seed), generators.adzuna_offers(n - n // 2, seed)]
+        for i, df in enumerate(frames):
+            df['keywords'] = _simple_keywords(df['title'])
+            df['formations_associees'] = _associated_formations(len(df), catalogue, seed + i)
+        return (frames,)
+
+    def offer_frames():
+        frames = {'remotive': generators.remotive_offers(n // 2, seed),
+                  'adzuna': generators.adzuna_offers(n - n // 2, seed)}
+        for df in frames.values():
+            df['keywords'] = _simple_keywords(df['title'])
+        return frames, generators.formations_catalogue(CATALOGUE_SIZE, seed)
+
+    def explode_demand(frames, catalogue):
+        """Chemin historique : listes de formations par offre, puis explode / value_counts"""
+        for df in frames.values():
+            df['formations_associees'] = pipeline.offer_formations(df, catalogue)
+        return pipeline.market_demand(list(frames.values()))
+
+    def demand_matrix():
+        return (OfferFormationMatrix.from_frames(*offer_frames()),)
+
+    def search_inputs():
+        frames, catalogue = offer_frames()
+        return frames, OfferFormationMatrix.from_frames(frames, catalogue)
+
+    def sliced_matrix():
+        matrix = demand_matrix()[0]
+        return matrix, matrix.offer_mask(sources=['adzuna'], start="2022-01-01", location="Paris")
+
+    def merge_inputs():
+        catalogue = generators.formations_catalogue(n, seed)
+        df_final = pipeline.merge_formations(catalogue, pipeline.market_demand(offers_with_formations()[0]))
+        etudiants = pipeline.clean_etudiants(generators.etudiants_sheet(catalogue, seed))
+        return df_final, etudiants, 'titre'
+
+    def nltk_stop_words():
+        if 'words' not in stop_words:
+            stop_words['words'] = pipeline.prepare_nltk()
+        return stop_words['words']
+
+    return {
+        'load_sources': (lambda: _write_sources(directory, n, seed) or (directory,), pipeline.load_sources),
+        'deduplicate': (lambda: ({'remotive': generators.remotive_offers(n // 2, seed),
+                                  'adzuna': generators.adzuna_offers(n - n // 2, seed)},), deduplicate),
+        'offer_keywords': (lambda: (generators.adzuna_offers(n, seed), nltk_stop_words()), pipeline.offer_keywords),
+        'offer_formations': (lambda: (offers(), generators.formations_catalogue(CATALOGUE_SIZE, seed)),
+                             pipeline.offer_formations),
+        'market_demand': (offers_with_formations, pipeline.market_demand),
+        'explode_demand': (offer_frames, explode_demand),
+        'token_array': (lambda: (_simple_keywords(generators.adzuna_offers(n, seed)['title']),), TokenArray.from_lists),
+        'sparse_demand_build': (offer_frames, OfferFormationMatrix.from_frames),
+        'semantic_matching': (offer_frames, match_frames),
+        'search_index_build': (search_inputs, SearchIndex.build),
+        'location_demand': (demand_matrix, geo.matrix_location_demand),
+        'search_offers': (lambda: (SearchIndex.build(*search_inputs()), "python data engineer"),
+                          SearchIndex.search),
+        'sparse_demand': (demand_matrix, OfferFormationMatrix.demand),
+        'sparse_demand_slice': (sliced_matrix, OfferFormationMatrix.demand),
+        'sparse_demand_by_source': (lambda: demand_matrix() + ('source',), OfferFormationMatrix.demand_by),
+        'merge_formations': (lambda: (generators.formations_catalogue(n, seed),
+                                      pipeline.market_demand(offers_with_formations()[0])),
+                             pipeline.merge_formations),
+        'merge_etudiants': (merge_inputs, pipeline.merge_etudiants),
+        'demand_ratio': (lambda: (pipeline.merge_etudiants(*merge_inputs())[0],), pipeline.demand_ratio),
+        'compute_trends': (lambda: (generators.google_trends(n, seed),), compute_trends),
+        'correlation_stats': (lambda: (generators.formations_final(n, seed).select_dtypes(include="number"),),
+                              CorrelationStats.from_frame),
+    }
+
+
+# ============================
+# Suite dashboard (analytics.py)
+# ============================
+def _write_dashboard_data(directory, n, seed):
+    generators.formations_final(n, seed).to_csv(os.path.join(directory, analytics.FORMATIONS_CSV), index=False)
+    generators.google_trends(n, seed).to_csv(os.path.join(directory, analytics.GOOGLE_TRENDS_CSV), index=False)
+    generators.remotive_offers(n, seed).to_csv(os.path.join(directory, analytics.REMOTIVE_CSV), index=False)
+    generators.adzuna_offers(n, seed).to_csv(os.path.join(directory, analytics.ADZUNA_CSV), index=False)
+
+
+def dashboard_cases(n, seed, directory):
+    """Cas de la suite dashboard : {nom: (caches à vider -> (), agrégat)}
+
+    Les CSV de taille n sont écrits dans `directory` (répertoire courant
+    pendant la suite) et chargés une fois ; chaque mesure ne vide que les
+    caches de l'agrégat mesuré.
+    """
+    _write_dashboard_data(directory, n, seed)
+    analytics._load_datasets.clear()
+    analytics._datasets()
+    categories = tuple(generators.CATEGORIES)
+
+    def clearing(*caches):
+        def prepare():
+            for cache in caches:
+                cache.clear()
+            return ()
+        return prepare
+
+    a = analytics
+    return {
+        '_datasets': (clearing(a._load_datasets), a._datasets),
+        'overview_metrics': (clearing(a.overview_metrics), a.overview_metrics),
+        'top_formations': (clearing(a.top_formations), a.top_formations),
+        'category_demand': (clearing(a.category_demand), a.category_demand),
+        'category_trends': (clearing(a.category_trends, a.filter_by_demand),
+                            lambda: a.category_trends(0, categories)),
+        'demand_distribution': (clearing(a.distribution), lambda: a.demand_distribution(0, categories)),
+        'duration_distribution': (clearing(a.distribution), lambda: a.duration_distribution("Certifiantes")),
+        'trends_analysis': (clearing(a._trends), a.trends_analysis),
+        'trend_pyramid': (clearing(a._trend_pyramid), lambda: a.trend_pyramid().window()),
+        'forecasts': (clearing(a._forecasts), a.forecasts),
+        'category_growth': (clearing(a.category_growth, a.growth_scores), a.category_growth),
+        'technology_offer_counts': (clearing(a._technology_offer_counts, a._technology_tags),
+                                    a.technology_offer_counts),
+        'numeric_correlation': (clearing(a.numeric_correlation, a.correlation_stats), a.numeric_correlation),
+        'search_offer_correlations': (clearing(a._search_offer_correlations), a.search_offer_correlations),
+        'opportunity_analysis': (clearing(a.opportunity_analysis), a.opportunity_analysis),
+    }
+
+
+SUITES = {'pipeline': pipeline_cases, 'dashboard': dashboard_cases}
+
+
+# ============================
+# Exécution
+# ============================
+def measure(prepare, func, repeat):
+    """Durées (secondes) de `repeat` appels, la préparation n'étant pas chronométrée"""
+    durations = []
+    for _ in range(repeat):
+        args = prepare()
+        start = time.perf_counter()
+        func(*args)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run(suites, sizes, repeat=3, budget=60.0, seed=0):
+    """Exécute les suites pour chaque taille et renvoie la liste des résultats"""
+    results = []
+    too_slow = set()
+    previous_dir = os.getcwd()
+    for suite in suites:
+        for n in sorted(sizes):
+            with tempfile.TemporaryDirectory() as directory:
+                os.chdir(directory)
+                try:
+                    cases = SUITES[suite](n, seed, directory)
+                    for name, (prepare, func) in cases.items():
+                        record = {'suite': suite, 'case': name, 'rows': n}
+                        if (suite, name) in too_slow:
+                            results.append({**record, 'status': 'skipped'})
+                            continue
+                        try:
+                            durations = measure(prepare, func, repeat)
+                        except Exception as e:
+                            results.append({**record, 'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+                            print(f"{suite:9s} {name:26s} {n:>10,d} lignes  erreur ({type(e).__name__})")
+                            continue
+                        median = statistics.median(durations)
+                        if median > budget:
+                            too_slow.add((suite, name))
+                        results.append({**record, 'status': 'ok', 'seconds': durations,
+                                        'median': median, 'min': min(durations),
+                                        'rows_per_second': n / median if median > 0 else None})
+                        print(f"{suite:9s} {name:26s} {n:>10,d} lignes  {median * 1000:10.1f} ms")
+                except Exception:
+                    traceback.print_exc()
+                finally:
+                    os.chdir(previous_dir)
+    return results
+
+
+def compare(previous, current):
+    """Affiche le rapport des médianes (actuelle / précédente) par cas et taille"""
+    before = {(r['suite'], r['case'], r['rows']): r.get('median') for r in previous['results']}
+    print(f"\nComparaison {previous['version']} -> {current['version']}")
+    for r in current['results']:
+        old = before.get((r['suite'], r['case'], r['rows']))
+        if old and r.get('median'):
+            print(f"{r['suite']:9s} {r['case']:26s} {r['rows']:>10,d}  "
+                  f"{old * 1000:10.1f} ms -> {r['median'] * 1000:10.1f} ms  (x{r['median'] / old:.2f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de stage.py et des dashboards")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="nombres de lignes (10^3 à 10^7)")
+    parser.add_argument("--suites", nargs="+", choices=sorted(SUITES), default=list(SUITES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=60.0,
+                        help="secondes au-delà desquelles un cas n'est plus relancé aux tailles supérieures")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="fichier JSON des résultats (défaut : benchmarks/results/<version>.json)")
+    parser.add_argument("--compare", help="résultats JSON d'une version précédente")
+    args = parser.parse_args(argv)
+
+    version = code_version()
+    report = {
+        'version': version,
+        'date': datetime.now().isoformat(timespec="seconds"),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'results': run(args.suites, args.sizes, args.repeat, args.budget, args.seed),
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{version}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Résultats sauvegardés dans '{output}'")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Matrice de corrélation incrémentale des variables numériques
+
+CorrelationStats conserve les statistiques suffisantes de Pearson pour
+chaque paire de colonnes (effectifs, sommes, sommes des carrés et
+produits croisés, sur les lignes où les deux valeurs sont renseignées).
+Elles sont additives : ajouter ou retirer des lignes, ou fusionner les
+statistiques de plusieurs catégories, ne demande pas de relire les
+données. Le résultat est identique à DataFrame.corr() (corrélations
+sur observations complètes par paire).
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class CorrelationStats:
+    """Statistiques suffisantes des corrélations de Pearson entre colonnes"""
+
+    def __init__(self, columns):
+        p = len(columns)
+        self.columns = list(columns)
+        self.count = np.zeros((p, p))
+        # sums[i, j] : somme de la colonne i sur les lignes où i et j sont renseignées
+        self.sums = np.zeros((p, p))
+        self.squares = np.zeros((p, p))
+        self.cross = np.zeros((p, p))
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        stats = cls(columns if columns is not None else df.columns)
+        stats.add(df)
+        return stats
+
+    def _moments(self, df):
+        values = df[self.columns].to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0)
+        weights = valid.astype(float)
+        return (weights.T @ weights, filled.T @ weights,
+                (filled ** 2).T @ weights, filled.T @ filled)
+
+    def add(self, df):
+        """Ajoute les lignes de `df`"""
+        count, sums, squares, cross = self._moments(df)
+        self.count += count
+        self.sums += sums
+        self.squares += squares
+        self.cross += cross
+        return self
+
+    def remove(self, df):
+        """Retire des lignes précédemment ajoutées"""
+        count, sums, squares, cross = self._moments(df)
+        self.count -= count
+        self.sums -= sums
+        self.squares -= squares
+        self.cross -= cross
+        return self
+
+    def __add__(self, other):
+        merged = CorrelationStats(self.columns)
+        merged.count = self.count + other.count
+        merged.sums = self.sums + other.sums
+        merged.squares = self.squares + other.squares
+        merged.cross = self.cross + other.cross
+        return merged
+
+    def corr(self, min_periods=2):
+        """Matrice de corrélation (DataFrame colonnes x colonnes)"""
+        n = self.count
+        covariance = n * self.cross - self.sums * self.sums.T
+        variance = n * self.squares - self.sums ** 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = covariance / np.sqrt(variance * variance.T)
+        corr = np.clip(corr, -1, 1)
+        corr[n < min_periods] = np.nan
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+class GroupedCorrelation:
+    """Statistiques de corrélation par groupe (catégorie), fusionnables à la demande"""
+
+    def __init__(self, df, columns, by):
+        self.columns = list(columns)
+        self.groups = {key: CorrelationStats.from_frame(group, self.columns)
+                       for key, group in df.groupby(by, observed=True)}
+
+    def append(self, df, by):
+        """Ajoute de nouvelles lignes sans recalculer les groupes existants"""
+        for key, group in df.groupby(by, observed=True):
+            self.groups.setdefault(key, CorrelationStats(self.columns)).add(group)
+
+    def corr(self, keys=None):
+        """Corrélations sur les groupes `keys` (tous si None)"""
+        stats = CorrelationStats(self.columns)
+        for key in (self.groups if keys is None else keys):
+            if key in self.groups:
+                stats = stats + self.groups[key]
+        return stats.corr()
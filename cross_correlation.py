@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Corrélations croisées entre recherches Google Trends et offres d'emploi
+
+Les offres sont comptées par période et par catégorie, puis comparées à
+chaque terme Google Trends sur les périodes communes. Pour chaque
+décalage, toutes les paires (terme, catégorie) sont obtenues en un seul
+produit matriciel de séries standardisées ; les corrélations glissantes
+utilisent des sommes cumulées. Aucune boucle Python ne parcourt les
+termes ou les catégories.
+
+Un décalage positif compare la recherche à la date t aux offres à la
+date t + décalage (la recherche précède les offres).
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from trends import FREQUENCIES, trend_matrix
+
+DATE_COLUMNS = ('publication_date', 'created', 'date')
+ADZUNA_LABEL = re.compile(r"['\"]label['\"]\s*:\s*['\"]([^'\"]+)['\"]")
+
+
+def offer_categories(df):
+    """Catégorie lisible de chaque offre (libellé Adzuna extrait si nécessaire)"""
+    categories = df['category'].astype(str)
+    labels = categories.str.extract(ADZUNA_LABEL, expand=False)
+    return labels.fillna(categories)
+
+
+def offer_time_counts(offer_frames, freq='hebdomadaire'):
+    """Nombre d'offres par période (lignes) et par catégorie (colonnes)"""
+    parts = []
+    for df in offer_frames:
+        if df is None or 'category' not in df.columns:
+            continue
+        date_column = next((c for c in DATE_COLUMNS if c in df.columns), None)
+        if date_column is None:
+            continue
+        dates = pd.to_datetime(df[date_column], errors='coerce', utc=True).dt.tz_localize(None)
+        parts.append(pd.DataFrame({'date': dates, 'categorie': offer_categories(df)}))
+    if not parts:
+        return pd.DataFrame()
+
+    offers = pd.concat(parts, ignore_index=True).dropna(subset=['date'])
+    counts = offers.groupby([pd.Grouper(key='date', freq=FREQUENCIES.get(freq, freq)), 'categorie']).size()
+    return counts.unstack(fill_value=0).asfreq(FREQUENCIES.get(freq, freq), fill_value=0)
+
+
+def _standardize(values):
+    """Centre-réduit chaque colonne (colonnes constantes -> 0)"""
+    std = values.std(axis=0)
+    std[std == 0] = np.inf
+    return (values - values.mean(axis=0)) / std
+
+
+def lagged_correlations(x, y, lags):
+    """Corrélations de Pearson (décalage, terme, catégorie) entre x (T, m) et y (T, k)"""
+    result = np.full((len(lags), x.shape[1], y.shape[1]), np.nan)
+    for i, lag in enumerate(lags):
+        if lag >= 0:
+            xs, ys = x[:len(x) - lag], y[lag:]
+        else:
+            xs, ys = x[-lag:], y[:len(y) + lag]
+        if len(xs) > 2:
+            result[i] = _standardize(xs).T @ _standardize(ys) / len(xs)
+    return result
+
+
+def rolling_correlation(x, y, window):
+    """Corrélations glissantes (fin de fenêtre, terme, catégorie) par sommes cumulées"""
+    def windowed(cumulative):
+        cumulative = np.concatenate([np.zeros((1,) + cumulative.shape[1:]), cumulative])
+        return cumulative[window:] - cumulative[:-window]
+
+    sx, sy = windowed(np.cumsum(x, axis=0)), windowed(np.cumsum(y, axis=0))
+    sxx, syy = windowed(np.cumsum(x ** 2, axis=0)), windowed(np.cumsum(y ** 2, axis=0))
+    sxy = windowed(np.cumsum(np.einsum('tm,tk->tmk', x, y), axis=0))
+
+    covariance = sxy - sx[:, :, None] * sy[:, None, :] / window
+    variance_x = sxx - sx ** 2 / window
+    variance_y = syy - sy ** 2 / window
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return covariance / np.sqrt(variance_x[:, :, None] * variance_y[:, None, :])
+
+
+def cross_correlations(df_google, offer_frames, freq='hebdomadaire', max_lag=4, offer_counts=None):
+    """Matrice des corrélations décalées entre termes Google Trends et catégories d'offres
+
+    Renvoie None si les deux sources ont moins de 4 périodes communes, sinon un dict :
+    - 'trends', 'offers' : séries alignées sur les périodes communes
+    - 'lags' : décalages testés ; 'lagged' : tableau (décalage, terme, catégorie)
+    - 'best_corr', 'best_lag' : corrélation la plus forte (en valeur absolue)
+      et décalage correspondant, DataFrames termes x catégories
+
+    `offer_counts` remplace le comptage des offres de `offer_frames` quand
+    il est déjà fait (par exemple en SQL, voir store.py).
+    """
+    trends = trend_matrix(df_google, freq).ffill()
+    offers = offer_time_counts(offer_frames, freq) if offer_counts is None else offer_counts
+    common = trends.index.intersection(offers.index)
+    if len(common) < 4:
+        return None
+
+    trends, offers = trends.loc[common].fillna(0), offers.loc[common]
+    max_lag = min(max_lag, len(common) - 3)
+    lags = np.arange(-max_lag, max_lag + 1)
+    lagged = lagged_correlations(trends.to_numpy(dtype=float), offers.to_numpy(dtype=float), lags)
+
+    best = np.nanargmax(np.nan_to_num(np.abs(lagged), nan=-1), axis=0)
+    best_corr = np.take_along_axis(lagged, best[None], axis=0)[0]
+    return {
+        'trends': trends,
+        'offers': offers,
+        'lags': lags,
+        'lagged': lagged,
+        'best_corr': pd.DataFrame(best_corr, index=trends.columns, columns=offers.columns),
+        'best_lag': pd.DataFrame(lags[best], index=trends.columns, columns=offers.columns),
+    }
@@ -10,6 +10,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
+from fragments import fragment, chronometre
+import analytics
+import telemetry
+import cross_correlation
+from trends import FREQUENCIES
 warnings.filterwarnings('ignore')
 
 # Configuration de la page
@@ -32,34 +37,20 @@ page = st.sidebar.selectbox(
      "🔮 Prédictions", "📊 Comparaisons", "📋 Données brutes", "🎯 Opportunités"]
 )
 
-# Chargement des données
-@st.cache_data
-def load_data():
-    """Charge et prépare toutes les données"""
-    try:
-        # Données principales
-        df_formations = pd.read_csv("df_final_clean_no_empty.csv")
-        
-        # Données Google Trends
-        df_google = pd.read_csv("tendances_google_france.csv")
-        df_google['date'] = pd.to_datetime(df_google['date'])
-        
-        # Données des offres
-        df_remotive = pd.read_csv("remotive_jobs_clean.csv")
-        df_adzuna = pd.read_csv("adzuna_offres_brutes.csv")
-        
-        return df_formations, df_google, df_remotive, df_adzuna
-    except Exception as e:
-        st.error(f"Erreur lors du chargement des données : {e}")
-        return None, None, None, None
+# Mesure des temps de préparation / rendu de chaque graphique (voir telemetry.py)
+telemetry.debut_page(page)
 
-# Chargement des données
-df_formations, df_google, df_remotive, df_adzuna = load_data()
+# Chargement des données (copie unique partagée par le processus, voir analytics.py)
+df_formations, df_google, df_remotive, df_adzuna = analytics.load_data()
 
 if df_formations is None:
     st.error("Impossible de charger les données. Vérifiez que tous les fichiers CSV sont présents.")
     st.stop()
 
+# Version des données publiée par refresher.py (prise en compte sans redémarrage)
+if analytics.data_release():
+    st.sidebar.caption(f"Données : version {analytics.data_release()}")
+
 # ============================
 # PAGE 1 : VUE D'ENSEMBLE
 # ============================
@@ -67,25 +58,24 @@ if page == "🏠 Vue d'ensemble":
     st.header("🏠 Vue d'ensemble du marché de la formation digitale")
     
     # Métriques principales
+    metrics = analytics.overview_metrics()
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_formations = len(df_formations)
+        total_formations = metrics['total_formations']
         st.metric("Total Formations", f"{total_formations:,}")
     
     with col2:
-        total_demand = df_formations['demand_offres'].sum()
+        total_demand = metrics['total_demand']
         st.metric("Demande Totale", f"{total_demand:,} offres")
     
     with col3:
-        avg_duration = df_formations['duree_heures'].mean()
+        avg_duration = metrics['avg_duration']
         st.metric("Durée Moyenne", f"{avg_duration:.1f} heures")
     
     with col4:
-        # Compter les formations qui ont une certification (pas vide et pas 'non')
-        cert_ratio = (df_formations['certification'].notna() & 
-                     (df_formations['certification'] != '') & 
-                     (df_formations['certification'] != 'non')).mean() * 100
+        # Formations qui ont une certification (pas vide et pas 'non')
+        cert_ratio = metrics['cert_ratio']
         st.metric("Formations Certifiantes", f"{cert_ratio:.1f}%")
     
     st.markdown("---")
@@ -95,7 +85,7 @@ if page == "🏠 Vue d'ensemble":
     
     with col1:
         st.subheader("📊 Top 10 des formations les plus demandées")
-        top10 = df_formations.nlargest(10, 'demand_offres')
+        top10 = analytics.top_formations('demand_offres', 10)
         
         # Graphique simple avec matplotlib
         fig, ax = plt.subplots(figsize=(10, 6))
@@ -104,7 +94,7 @@ if page == "🏠 Vue d'ensemble":
         ax.set_xlabel("Nombre d'offres")
         plt.xticks(rotation=45)
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -115,16 +105,13 @@ if page == "🏠 Vue d'ensemble":
     
     with col2:
         st.subheader("🎯 Répartition par catégorie")
-        cat_stats = df_formations.groupby('categorie').agg({
-            'demand_offres': 'sum',
-            'titre': 'count'
-        }).reset_index()
+        cat_stats = analytics.category_demand()
         
         # Graphique circulaire
         fig, ax = plt.subplots(figsize=(8, 8))
         ax.pie(cat_stats['demand_offres'], labels=cat_stats['categorie'], autopct='%1.1f%%')
         ax.set_title("Répartition de la demande par catégorie")
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -139,15 +126,17 @@ if page == "🏠 Vue d'ensemble":
     
     with col1:
         st.subheader("⏱️ Distribution des durées de formation")
+        # Histogramme tiré de la distribution précalculée (voir distributions.py)
+        counts, edges = analytics.duration_distribution().rebin(20)
         fig, ax = plt.subplots(figsize=(10, 6))
-        ax.hist(df_formations['duree_heures'], bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7, color='skyblue', edgecolor='black')
         ax.set_title("Distribution des durées de formation")
         ax.set_xlabel("Durée (heures)")
         ax.set_ylabel("Nombre de formations")
-        ax.axvline(df_formations['duree_heures'].mean(), color='red', linestyle='--', 
-                  label=f'Moyenne: {df_formations["duree_heures"].mean():.1f}h')
+        ax.axvline(avg_duration, color='red', linestyle='--', 
+                  label=f'Moyenne: {avg_duration:.1f}h')
         ax.legend()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -155,11 +144,11 @@ if page == "🏠 Vue d'ensemble":
         avec une moyenne de **{:.1f} heures**. Les formations courtes (< 50h) sont privilégiées 
         pour l'apprentissage rapide, tandis que les formations longues (> 150h) 
         correspondent aux spécialisations avancées.
-        """.format(df_formations['duree_heures'].mean()))
+        """.format(avg_duration))
     
     with col2:
         st.subheader("💰 Ratio demande/étudiants par catégorie")
-        ratio_by_cat = df_formations.groupby('categorie')['ratio_demande_etudiants'].mean().sort_values(ascending=False)
+        ratio_by_cat = analytics.category_ratio()
         
         fig, ax = plt.subplots(figsize=(10, 6))
         ratio_by_cat.plot(kind='bar', ax=ax, color='lightgreen')
@@ -168,7 +157,7 @@ if page == "🏠 Vue d'ensemble":
         ax.set_ylabel("Ratio moyen")
         plt.xticks(rotation=45)
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -185,13 +174,13 @@ if page == "🏠 Vue d'ensemble":
     
     with col1:
         # Top 10 des certifications les plus fréquentes
-        cert_counts = df_formations['certification'].value_counts().head(10)
+        cert_counts = analytics.certification_counts(10)
         fig, ax = plt.subplots(figsize=(10, 6))
         cert_counts.plot(kind='barh', ax=ax, color='gold')
         ax.set_title("Top 10 des certifications les plus fréquentes")
         ax.set_xlabel("Nombre de formations")
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -203,15 +192,13 @@ if page == "🏠 Vue d'ensemble":
     
     with col2:
         # Répartition des formations avec/sans certification
-        cert_status = df_formations['certification'].apply(
-            lambda x: 'Avec certification' if pd.notna(x) and x != '' and x != 'non' else 'Sans certification'
-        ).value_counts()
+        cert_status = analytics.certification_status()
         
         fig, ax = plt.subplots(figsize=(8, 8))
         colors = ['lightblue', 'lightcoral']
         ax.pie(cert_status.values, labels=cert_status.index, autopct='%1.1f%%', colors=colors)
         ax.set_title("Répartition des formations par statut de certification")
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -227,124 +214,121 @@ if page == "🏠 Vue d'ensemble":
 elif page == "📈 Tendances du marché":
     st.header("📈 Analyse des tendances du marché")
     
-    # Filtres
-    col1, col2 = st.columns(2)
-    with col1:
-        min_demand = st.slider("Demande minimum", 0, int(df_formations['demand_offres'].max()), 0)
-    with col2:
-        selected_categories = st.multiselect(
-            "Catégories à afficher",
-            options=df_formations['categorie'].unique(),
-            default=df_formations['categorie'].unique()[:5]
-        )
-    
-    # Filtrer les données
-    filtered_df = df_formations[
-        (df_formations['demand_offres'] >= min_demand) &
-        (df_formations['categorie'].isin(selected_categories))
-    ]
-    
-    # Graphiques
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("📊 Distribution de la demande")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.hist(filtered_df['demand_offres'], bins=30, alpha=0.7, color='steelblue')
-        ax.set_title("Distribution du nombre d'offres par formation")
-        ax.set_xlabel("Nombre d'offres")
-        ax.set_ylabel("Fréquence")
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **📈 Analyse :** La distribution montre une **concentration** de la demande 
-        sur quelques formations très populaires (queue longue à droite). 
-        La majorité des formations ont une demande modérée, 
-        tandis qu'une minorité bénéficie d'une demande exceptionnelle.
-        """)
-    
-    with col2:
-        st.subheader("🎯 Ratio demande/étudiants")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.scatter(filtered_df['demand_offres'], filtered_df['ratio_demande_etudiants'], alpha=0.6)
-        ax.set_title("Relation entre demande et ratio étudiants")
-        ax.set_xlabel("Demande (offres)")
-        ax.set_ylabel("Ratio demande/étudiants")
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **🔍 Analyse :** Il n'y a pas de corrélation forte entre la demande absolue 
-        et le ratio. Certaines formations avec une demande modérée 
-        ont un ratio élevé, indiquant un **déséquilibre local** 
-        entre l'offre de formation et la demande du marché.
-        """)
-    
-    # Nouveaux graphiques
-    st.markdown("---")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("📈 Évolution de la demande par catégorie")
-        # Simulation d'évolution temporelle (basée sur les données actuelles)
-        cat_demand = filtered_df.groupby('categorie')['demand_offres'].sum().sort_values(ascending=False)
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        bars = ax.bar(range(len(cat_demand)), cat_demand.values, color='lightcoral')
-        ax.set_title("Demande totale par catégorie")
-        ax.set_xlabel("Catégorie")
-        ax.set_ylabel("Demande totale (offres)")
-        ax.set_xticks(range(len(cat_demand)))
-        ax.set_xticklabels(cat_demand.index, rotation=45)
-        
-        # Ajouter les valeurs sur les barres
-        for bar, value in zip(bars, cat_demand.values):
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 10, 
-                   f'{value:,.0f}', ha='center', va='bottom')
-        
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **📊 Analyse :** Le **développement** domine largement avec plus de **{:.0f} offres**, 
-        suivi du **marketing digital** et des **soft skills**. Cette hiérarchie 
-        reflète les priorités actuelles du marché du travail digital.
-        """.format(cat_demand.iloc[0]))
-    
-    with col2:
-        st.subheader("🎯 Analyse des outliers")
-        # Identifier les formations avec une demande exceptionnelle
-        Q3 = filtered_df['demand_offres'].quantile(0.75)
-        Q1 = filtered_df['demand_offres'].quantile(0.25)
-        IQR = Q3 - Q1
-        outliers = filtered_df[filtered_df['demand_offres'] > Q3 + 1.5 * IQR]
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.boxplot(filtered_df['demand_offres'])
-        ax.set_title("Distribution de la demande (avec outliers)")
-        ax.set_ylabel("Nombre d'offres")
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **🔍 Analyse :** **{} formations** sont identifiées comme outliers 
-        (demande exceptionnelle). Ces formations bénéficient d'une **demande explosive** 
-        et représentent des **opportunités de niche** très rentables.
-        """.format(len(outliers)))
-    
-    # Analyse des tendances par catégorie
-    st.subheader("📈 Tendances par catégorie")
-    cat_trends = filtered_df.groupby('categorie').agg({
-        'demand_offres': ['mean', 'sum', 'count'],
-        'duree_heures': 'mean',
-        'ratio_demande_etudiants': 'mean'
-    }).round(2)
-    
-    cat_trends.columns = ['Demande Moyenne', 'Demande Totale', 'Nombre Formations', 
-                         'Durée Moyenne', 'Ratio Moyen']
-    st.dataframe(cat_trends, use_container_width=True)
+    # Les filtres ne relancent que ce fragment : seuls les graphiques
+    # qui lisent filtered_df sont recalculés
+    @fragment
+    def tendances_filtrees():
+        with chronometre("Tendances du marché"):
+            # Filtres
+            col1, col2 = st.columns(2)
+            with col1:
+                min_demand = st.slider("Demande minimum", 0, int(df_formations['demand_offres'].max()), 0)
+            with col2:
+                selected_categories = st.multiselect(
+                    "Catégories à afficher",
+                    options=df_formations['categorie'].unique(),
+                    default=df_formations['categorie'].unique()[:5]
+                )
+            
+            # Filtrer les données
+            filtered_df = analytics.filter_by_demand(min_demand, tuple(selected_categories))
+            
+            # Graphiques
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.subheader("📊 Distribution de la demande")
+                # Fusion des distributions précalculées des catégories choisies
+                demandes = analytics.demand_distribution(min_demand, selected_categories)
+                counts, edges = demandes.rebin(30)
+                fig, ax = plt.subplots(figsize=(8, 6))
+                ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7, color='steelblue')
+                ax.set_title("Distribution du nombre d'offres par formation")
+                ax.set_xlabel("Nombre d'offres")
+                ax.set_ylabel("Fréquence")
+                telemetry.afficher_figure(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **📈 Analyse :** La distribution montre une **concentration** de la demande 
+                sur quelques formations très populaires (queue longue à droite). 
+                La majorité des formations ont une demande modérée, 
+                tandis qu'une minorité bénéficie d'une demande exceptionnelle.
+                """)
+            
+            with col2:
+                st.subheader("🎯 Ratio demande/étudiants")
+                fig, ax = plt.subplots(figsize=(8, 6))
+                ax.scatter(filtered_df['demand_offres'], filtered_df['ratio_demande_etudiants'], alpha=0.6)
+                ax.set_title("Relation entre demande et ratio étudiants")
+                ax.set_xlabel("Demande (offres)")
+                ax.set_ylabel("Ratio demande/étudiants")
+                telemetry.afficher_figure(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **🔍 Analyse :** Il n'y a pas de corrélation forte entre la demande absolue 
+                et le ratio. Certaines formations avec une demande modérée 
+                ont un ratio élevé, indiquant un **déséquilibre local** 
+                entre l'offre de formation et la demande du marché.
+                """)
+            
+            # Nouveaux graphiques
+            st.markdown("---")
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.subheader("📈 Évolution de la demande par catégorie")
+                # Simulation d'évolution temporelle (basée sur les données actuelles)
+                cat_demand = filtered_df.groupby('categorie')['demand_offres'].sum().sort_values(ascending=False)
+                
+                fig, ax = plt.subplots(figsize=(10, 6))
+                bars = ax.bar(range(len(cat_demand)), cat_demand.values, color='lightcoral')
+                ax.set_title("Demande totale par catégorie")
+                ax.set_xlabel("Catégorie")
+                ax.set_ylabel("Demande totale (offres)")
+                ax.set_xticks(range(len(cat_demand)))
+                ax.set_xticklabels(cat_demand.index, rotation=45)
+                
+                # Ajouter les valeurs sur les barres
+                for bar, value in zip(bars, cat_demand.values):
+                    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 10, 
+                           f'{value:,.0f}', ha='center', va='bottom')
+                
+                plt.tight_layout()
+                telemetry.afficher_figure(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **📊 Analyse :** Le **développement** domine largement avec plus de **{:.0f} offres**, 
+                suivi du **marketing digital** et des **soft skills**. Cette hiérarchie 
+                reflète les priorités actuelles du marché du travail digital.
+                """.format(cat_demand.iloc[0]))
+            
+            with col2:
+                st.subheader("🎯 Analyse des outliers")
+                # Identifier les formations avec une demande exceptionnelle (> Q3 + 1.5 IQR)
+                box_stats, n_outliers = demandes.boxplot_stats()
+                
+                fig, ax = plt.subplots(figsize=(10, 6))
+                ax.bxp([box_stats])
+                ax.set_title("Distribution de la demande (avec outliers)")
+                ax.set_ylabel("Nombre d'offres")
+                telemetry.afficher_figure(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **🔍 Analyse :** **{} formations** sont identifiées comme outliers 
+                (demande exceptionnelle). Ces formations bénéficient d'une **demande explosive** 
+                et représentent des **opportunités de niche** très rentables.
+                """.format(n_outliers))
+            
+            # Analyse des tendances par catégorie
+            st.subheader("📈 Tendances par catégorie")
+            cat_trends = analytics.category_trends(min_demand, tuple(selected_categories))
+            telemetry.afficher_tableau(cat_trends, "Tendances par catégorie", use_container_width=True)
+
+    tendances_filtrees()
     
     # Analyse détaillée du tableau
     st.markdown("""
@@ -354,6 +338,59 @@ elif page == "📈 Tendances du marché":
     - **Marketing Digital** : Bon équilibre offre/demande
     - **Soft Skills** : Nombreuses formations, demande modérée
     """)
+    
+    # Dynamique Google Trends : indépendante des filtres ci-dessus
+    st.markdown("---")
+    st.subheader("🔎 Dynamique des recherches Google")
+    
+    @fragment
+    def dynamique_google():
+        with chronometre("Dynamique Google"):
+            col1, col2 = st.columns(2)
+            with col1:
+                freq = st.selectbox("Rééchantillonnage", list(FREQUENCIES))
+            with col2:
+                window = st.slider("Fenêtre de moyenne mobile (périodes)", 1, 12, 4)
+            
+            trends_result = analytics.trends_analysis(freq, window)
+            summary = trends_result['summary']
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                fig, ax = plt.subplots(figsize=(10, 6))
+                croissance = summary['croissance_pct'].sort_values()
+                ax.barh(croissance.index, croissance.values,
+                        color=np.where(croissance.values >= 0, 'seagreen', 'indianred'))
+                ax.axvline(0, color='black', lw=1)
+                ax.set_title("Croissance de l'intérêt (pente de la tendance)")
+                ax.set_xlabel("Variation sur la période (%)")
+                plt.tight_layout()
+                telemetry.afficher_figure(fig)
+            
+            with col2:
+                fig, ax = plt.subplots(figsize=(10, 6))
+                rolling = trends_result['rolling']
+                for term in summary.index[:5]:
+                    ax.plot(rolling.index, rolling[term], label=term)
+                ax.set_title(f"Moyenne mobile ({window} périodes) des 5 termes en plus forte croissance")
+                ax.set_xlabel("Date")
+                ax.set_ylabel("Intérêt relatif")
+                ax.legend()
+                plt.xticks(rotation=45)
+                plt.tight_layout()
+                telemetry.afficher_figure(fig)
+            
+            telemetry.afficher_tableau(summary.round(2), "Indicateurs Google Trends", use_container_width=True)
+    
+    dynamique_google()
+    
+    st.markdown("""
+    **🔎 Analyse :** La **croissance** est mesurée par la pente de la droite ajustée 
+    sur toute la période, l'**accélération** par la courbure d'un ajustement quadratique 
+    (positive : la hausse s'accélère). Ces indicateurs sont calculés pour tous 
+    les termes à la fois.
+    """)
 
 # ============================
 # PAGE 3 : ANALYSE DES FORMATIONS
@@ -361,124 +398,119 @@ elif page == "📈 Tendances du marché":
 elif page == "🎓 Analyse des formations":
     st.header("🎓 Analyse détaillée des formations")
     
-    # Filtres avancés
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        cert_filter = st.selectbox("Certification", ["Toutes", "Certifiantes", "Non certifiantes"])
-    with col2:
-        min_duration = st.slider("Durée minimum (heures)", 0, int(df_formations['duree_heures'].max()), 0)
-    with col3:
-        max_duration = st.slider("Durée maximum (heures)", 0, int(df_formations['duree_heures'].max()), 
-                                int(df_formations['duree_heures'].max()))
-    
-    # Application des filtres
-    filtered_df = df_formations.copy()
-    if cert_filter == "Certifiantes":
-        filtered_df = filtered_df[filtered_df['certification'].notna() & 
-                                 (filtered_df['certification'] != '') & 
-                                 (filtered_df['certification'] != 'non')]
-    elif cert_filter == "Non certifiantes":
-        filtered_df = filtered_df[(filtered_df['certification'].isna()) | 
-                                 (filtered_df['certification'] == '') | 
-                                 (filtered_df['certification'] == 'non')]
-    
-    filtered_df = filtered_df[
-        (filtered_df['duree_heures'] >= min_duration) &
-        (filtered_df['duree_heures'] <= max_duration)
-    ]
-    
-    # Métriques filtrées
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("Formations filtrées", len(filtered_df))
-    with col2:
-        st.metric("Demande moyenne", f"{filtered_df['demand_offres'].mean():.1f}")
-    with col3:
-        st.metric("Durée moyenne", f"{filtered_df['duree_heures'].mean():.1f} heures")
-    with col4:
-        st.metric("Ratio moyen", f"{filtered_df['ratio_demande_etudiants'].mean():.2f}")
-    
-    # Graphiques d'analyse
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("⏱️ Durée vs Demande")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.scatter(filtered_df['duree_heures'], filtered_df['demand_offres'], alpha=0.6)
-        ax.set_title("Relation entre durée et demande")
-        ax.set_xlabel("Durée (heures)")
-        ax.set_ylabel("Demande (offres)")
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **📈 Analyse :** Il n'y a pas de corrélation claire entre la durée 
-        et la demande. Les formations courtes (< 50h) peuvent être très demandées 
-        pour l'apprentissage rapide, tandis que les formations longues 
-        correspondent souvent à des spécialisations avancées.
-        """)
-    
-    with col2:
-        st.subheader("📊 Distribution des durées")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.hist(filtered_df['duree_heures'], bins=20, alpha=0.7, color='green')
-        ax.set_title("Distribution des durées")
-        ax.set_xlabel("Durée (heures)")
-        ax.set_ylabel("Fréquence")
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **⏰ Analyse :** La distribution montre une **concentration** 
-        sur les formations de **20-100 heures**, avec un pic autour de **50 heures**. 
-        Les formations très courtes (< 20h) et très longues (> 200h) sont rares.
-        """)
-    
-    # Nouveaux graphiques
-    st.markdown("---")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("🎯 Ratio par durée de formation")
-        # Grouper par tranches de durée
-        filtered_df['duree_tranche'] = pd.cut(filtered_df['duree_heures'], 
-                                            bins=[0, 25, 50, 100, 200, 1000], 
-                                            labels=['0-25h', '25-50h', '50-100h', '100-200h', '200h+'])
-        ratio_by_duree = filtered_df.groupby('duree_tranche')['ratio_demande_etudiants'].mean()
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ratio_by_duree.plot(kind='bar', ax=ax, color='orange')
-        ax.set_title("Ratio demande/étudiants par durée")
-        ax.set_xlabel("Tranche de durée")
-        ax.set_ylabel("Ratio moyen")
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **📊 Analyse :** Les formations de **50-100 heures** ont le ratio le plus élevé, 
-        suggérant un **équilibre optimal** entre investissement temps et retour sur investissement. 
-        Les formations très courtes ont un ratio plus faible.
-        """)
-    
-    with col2:
-        st.subheader("🏆 Top formations par ratio")
-        top_ratio = filtered_df.nlargest(10, 'ratio_demande_etudiants')
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        top_ratio.plot(x='titre', y='ratio_demande_etudiants', kind='barh', ax=ax, color='purple')
-        ax.set_title("Top 10 formations par ratio demande/étudiants")
-        ax.set_xlabel("Ratio")
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **🎯 Analyse :** Ces formations ont un **ratio exceptionnel**, 
-        indiquant une forte demande pour un nombre limité d'étudiants. 
-        Ce sont des **niches très rentables** avec peu de concurrence.
-        """)
+    # Fragment : les filtres certification / durée ne relancent que les
+    # graphiques calculés sur filtered_df
+    @fragment
+    def formations_filtrees():
+        with chronometre("Analyse des formations"):
+            # Filtres avancés
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                cert_filter = st.selectbox("Certification", ["Toutes", "Certifiantes", "Non certifiantes"])
+            with col2:
+                min_duration = st.slider("Durée minimum (heures)", 0, int(df_formations['duree_heures'].max()), 0)
+            with col3:
+                max_duration = st.slider("Durée maximum (heures)", 0, int(df_formations['duree_heures'].max()), 
+                                        int(df_formations['duree_heures'].max()))
+            
+            # Application des filtres
+            filtered_df = analytics.filter_by_duration(cert_filter, min_duration, max_duration)
+            
+            # Métriques filtrées
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Formations filtrées", len(filtered_df))
+            with col2:
+                st.metric("Demande moyenne", f"{filtered_df['demand_offres'].mean():.1f}")
+            with col3:
+                st.metric("Durée moyenne", f"{filtered_df['duree_heures'].mean():.1f} heures")
+            with col4:
+                st.metric("Ratio moyen", f"{filtered_df['ratio_demande_etudiants'].mean():.2f}")
+            
+            # Graphiques d'analyse
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.subheader("⏱️ Durée vs Demande")
+                fig, ax = plt.subplots(figsize=(8, 6))
+                ax.scatter(filtered_df['duree_heures'], filtered_df['demand_offres'], alpha=0.6)
+                ax.set_title("Relation entre durée et demande")
+                ax.set_xlabel("Durée (heures)")
+                ax.set_ylabel("Demande (offres)")
+                telemetry.afficher_figure(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **📈 Analyse :** Il n'y a pas de corrélation claire entre la durée 
+                et la demande. Les formations courtes (< 50h) peuvent être très demandées 
+                pour l'apprentissage rapide, tandis que les formations longues 
+                correspondent souvent à des spécialisations avancées.
+                """)
+            
+            with col2:
+                st.subheader("📊 Distribution des durées")
+                counts, edges = analytics.duration_distribution(cert_filter, min_duration, max_duration).rebin(20)
+                fig, ax = plt.subplots(figsize=(8, 6))
+                ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7, color='green')
+                ax.set_title("Distribution des durées")
+                ax.set_xlabel("Durée (heures)")
+                ax.set_ylabel("Fréquence")
+                telemetry.afficher_figure(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **⏰ Analyse :** La distribution montre une **concentration** 
+                sur les formations de **20-100 heures**, avec un pic autour de **50 heures**. 
+                Les formations très courtes (< 20h) et très longues (> 200h) sont rares.
+                """)
+            
+            # Nouveaux graphiques
+            st.markdown("---")
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.subheader("🎯 Ratio par durée de formation")
+                # Grouper par tranches de durée
+                filtered_df['duree_tranche'] = pd.cut(filtered_df['duree_heures'], 
+                                                    bins=[0, 25, 50, 100, 200, 1000], 
+                                                    labels=['0-25h', '25-50h', '50-100h', '100-200h', '200h+'])
+                ratio_by_duree = filtered_df.groupby('duree_tranche')['ratio_demande_etudiants'].mean()
+                
+                fig, ax = plt.subplots(figsize=(10, 6))
+                ratio_by_duree.plot(kind='bar', ax=ax, color='orange')
+                ax.set_title("Ratio demande/étudiants par durée")
+                ax.set_xlabel("Tranche de durée")
+                ax.set_ylabel("Ratio moyen")
+                plt.xticks(rotation=45)
+                plt.tight_layout()
+                telemetry.afficher_figure(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **📊 Analyse :** Les formations de **50-100 heures** ont le ratio le plus élevé, 
+                suggérant un **équilibre optimal** entre investissement temps et retour sur investissement. 
+                Les formations très courtes ont un ratio plus faible.
+                """)
+            
+            with col2:
+                st.subheader("🏆 Top formations par ratio")
+                top_ratio = filtered_df.nlargest(10, 'ratio_demande_etudiants')
+                
+                fig, ax = plt.subplots(figsize=(10, 6))
+                top_ratio.plot(x='titre', y='ratio_demande_etudiants', kind='barh', ax=ax, color='purple')
+                ax.set_title("Top 10 formations par ratio demande/étudiants")
+                ax.set_xlabel("Ratio")
+                plt.tight_layout()
+                telemetry.afficher_figure(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **🎯 Analyse :** Ces formations ont un **ratio exceptionnel**, 
+                indiquant une forte demande pour un nombre limité d'étudiants. 
+                Ce sont des **niches très rentables** avec peu de concurrence.
+                """)
+
+    formations_filtrees()
 
 # ============================
 # PAGE 4 : PRÉDICTIONS
@@ -518,7 +550,7 @@ elif page == "🔮 Prédictions":
         ax.set_ylabel("R² Score")
         plt.xticks(rotation=45)
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -536,7 +568,7 @@ elif page == "🔮 Prédictions":
         ax.set_ylabel("RMSE")
         plt.xticks(rotation=45)
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -559,13 +591,11 @@ elif page == "🔮 Prédictions":
     with col1:
         st.subheader("📈 Formations en croissance rapide")
         
-        # Calculer le taux de croissance basé sur les ratios et demandes
-        df_formations['score_croissance'] = (df_formations['ratio_demande_etudiants'] * 
-                                           df_formations['demand_offres'] / 
-                                           df_formations['duree_heures'])
+        # Taux de croissance basé sur les ratios et demandes
+        df_scores = analytics.growth_scores()
         
         # Top 10 formations en croissance
-        top_croissance = df_formations.nlargest(10, 'score_croissance')
+        top_croissance = df_scores.nlargest(10, 'score_croissance')
         
         fig, ax = plt.subplots(figsize=(10, 6))
         bars = ax.barh(range(len(top_croissance)), top_croissance['score_croissance'], color='lightgreen')
@@ -581,7 +611,7 @@ elif page == "🔮 Prédictions":
                    ha='left', va='center')
         
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         st.markdown("""
         **🚀 Analyse :** Ces formations ont un **score de croissance élevé** 
@@ -593,10 +623,7 @@ elif page == "🔮 Prédictions":
         st.subheader("🎯 Formations émergentes (niches)")
         
         # Identifier les niches émergentes (ratio élevé, demande modérée mais croissante)
-        df_formations['score_niche'] = (df_formations['ratio_demande_etudiants'] * 
-                                      (df_formations['demand_offres'] / df_formations['demand_offres'].max()))
-        
-        top_niches = df_formations.nlargest(10, 'score_niche')
+        top_niches = df_scores.nlargest(10, 'score_niche')
         
         fig, ax = plt.subplots(figsize=(10, 6))
         scatter = ax.scatter(top_niches['demand_offres'], top_niches['ratio_demande_etudiants'], 
@@ -610,7 +637,7 @@ elif page == "🔮 Prédictions":
             ax.annotate(row['titre'][:20] + '...', (row['demand_offres'], row['ratio_demande_etudiants']), 
                        xytext=(5, 5), textcoords='offset points', fontsize=8)
         
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         st.markdown("""
         **🎯 Analyse :** Ces **niches émergentes** ont un ratio élevé 
@@ -628,11 +655,7 @@ elif page == "🔮 Prédictions":
         st.subheader("🔥 Catégories en forte croissance")
         
         # Calculer le potentiel de croissance par catégorie
-        cat_potentiel = df_formations.groupby('categorie').agg({
-            'score_croissance': 'mean',
-            'demand_offres': 'sum',
-            'ratio_demande_etudiants': 'mean'
-        }).sort_values('score_croissance', ascending=False)
+        cat_potentiel = analytics.category_growth()
         
         fig, ax = plt.subplots(figsize=(10, 6))
         bars = ax.bar(range(len(cat_potentiel)), cat_potentiel['score_croissance'], color='orange')
@@ -648,7 +671,7 @@ elif page == "🔮 Prédictions":
                    f'{value:.1f}', ha='center', va='bottom')
         
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         st.markdown("""
         **🔥 Analyse :** Les catégories avec un **score de croissance élevé** 
@@ -659,10 +682,12 @@ elif page == "🔮 Prédictions":
     with col2:
         st.subheader("📈 Évolution prévue de la demande")
         
-        # Simuler l'évolution de la demande (basée sur les tendances actuelles)
+        # Appliquer la croissance prévue des recherches Google associées à chaque catégorie
+        category_forecast = analytics.forecast_category_growth()
         cat_evolution = cat_potentiel.copy()
         cat_evolution['demande_actuelle'] = cat_evolution['demand_offres']
-        cat_evolution['demande_future'] = cat_evolution['demand_offres'] * (1 + cat_evolution['score_croissance'] / 100)
+        cat_evolution['demande_future'] = cat_evolution['demand_offres'] * (
+            1 + category_forecast['croissance_pct'].reindex(cat_evolution.index).fillna(0) / 100)
         
         fig, ax = plt.subplots(figsize=(10, 6))
         x = np.arange(len(cat_evolution))
@@ -679,14 +704,16 @@ elif page == "🔮 Prédictions":
         ax.legend()
         
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         st.markdown("""
-        **📈 Analyse :** La **demande prévue** est calculée en appliquant 
-        le taux de croissance basé sur les tendances actuelles. 
+        **📈 Analyse :** La **demande prévue** (6 mois) applique à chaque catégorie 
+        la croissance prévue des recherches Google Trends correspondantes. 
         Les catégories avec la plus forte croissance verront leur demande 
         augmenter significativement.
         """)
+        with st.expander("Termes Google Trends utilisés par catégorie"):
+            telemetry.afficher_tableau(category_forecast.round(1), "Évolution prévue par catégorie", use_container_width=True)
     
     # Prédictions technologiques
     st.markdown("---")
@@ -697,23 +724,8 @@ elif page == "🔮 Prédictions":
     with col1:
         st.subheader("🚀 Technologies émergentes")
         
-        # Analyser les formations par technologie
-        tech_keywords = {
-            'AI/ML': ['intelligence artificielle', 'machine learning', 'deep learning', 'neural network'],
-            'Cloud': ['aws', 'azure', 'google cloud', 'cloud computing'],
-            'Cybersécurité': ['cybersécurité', 'sécurité', 'hacking', 'pentest'],
-            'DevOps': ['devops', 'ci/cd', 'docker', 'kubernetes'],
-            'Data': ['data science', 'big data', 'analytics', 'business intelligence'],
-            'Web3': ['blockchain', 'web3', 'crypto', 'nft']
-        }
-        
-        tech_scores = {}
-        for tech, keywords in tech_keywords.items():
-            score = 0
-            for keyword in keywords:
-                mask = df_formations['titre'].str.contains(keyword, case=False, na=False)
-                score += df_formations[mask]['score_croissance'].sum()
-            tech_scores[tech] = score
+        # Analyser les formations par technologie (taxonomie : taxonomy.json)
+        tech_scores = analytics.technology_scores()
         
         tech_df = pd.DataFrame(list(tech_scores.items()), columns=['Technologie', 'Score'])
         tech_df = tech_df.sort_values('Score', ascending=False)
@@ -730,49 +742,67 @@ elif page == "🔮 Prédictions":
                    f'{value:.0f}', ha='center', va='bottom')
         
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         st.markdown("""
         **🚀 Analyse :** Les **technologies émergentes** comme l'IA/ML, 
         le Cloud et la Cybersécurité ont les scores les plus élevés. 
         Elles représentent les **tendances de demain**.
         """)
+        
+        offer_counts = analytics.technology_offer_counts()
+        if offer_counts is not None:
+            st.caption("Offres par technologie : " +
+                       ", ".join(f"{tech} {count:,}" for tech, count in offer_counts.sort_values(ascending=False).items()))
     
     with col2:
         st.subheader("📊 Prédictions de marché")
         
-        # Créer des prédictions de marché basées sur les données
-        market_predictions = {
-            'Formations courtes (< 50h)': 'Croissance de 25%',
-            'Formations certifiantes': 'Croissance de 40%',
-            'Formations en développement': 'Croissance de 30%',
-            'Formations en cybersécurité': 'Croissance de 60%',
-            'Formations en IA/ML': 'Croissance de 80%',
-            'Formations en cloud': 'Croissance de 45%'
-        }
-        
-        pred_df = pd.DataFrame(list(market_predictions.items()), columns=['Segment', 'Prédiction'])
+        # Croissance prévue (6 mois) de chaque terme Google Trends
+        growth_rates = analytics.forecasts()['growth_pct'].replace([np.inf, -np.inf], np.nan).dropna().head(10)
         
         fig, ax = plt.subplots(figsize=(10, 6))
-        growth_rates = [int(pred.split()[-1].replace('%', '')) for pred in pred_df['Prédiction']]
-        bars = ax.barh(pred_df['Segment'], growth_rates, color='lightgreen')
+        bars = ax.barh(growth_rates.index, growth_rates.values,
+                       color=np.where(growth_rates.values >= 0, 'lightgreen', 'lightcoral'))
         ax.set_title("Prédictions de croissance par segment")
         ax.set_xlabel("Taux de croissance prévu (%)")
+        ax.invert_yaxis()
         
         # Ajouter les valeurs
-        for bar, rate in zip(bars, growth_rates):
+        for bar, rate in zip(bars, growth_rates.values):
             ax.text(bar.get_width() + 1, bar.get_y() + bar.get_height()/2, 
-                   f'{rate}%', ha='left', va='center')
+                   f'{rate:.0f}%', ha='left', va='center')
         
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         st.markdown("""
-        **📊 Analyse :** Les **formations en IA/ML** et **cybersécurité** 
-        devraient connaître la plus forte croissance. Les **formations courtes** 
-        et **certifiantes** sont également très prometteuses.
+        **📊 Analyse :** Croissance de l'intérêt prévue sur 6 mois par rapport 
+        aux 6 derniers mois, pour chaque terme Google Trends. Les prévisions 
+        viennent d'un lissage de Holt ou d'un modèle naïf saisonnier, 
+        choisi terme par terme selon sa précision sur les derniers mois.
         """)
     
+    # Prévision détaillée d'un terme
+    @fragment
+    def prevision_terme():
+        with chronometre("Prévision par terme"):
+            prevision = analytics.forecasts()
+            term = st.selectbox("📉 Prévision détaillée du terme", list(prevision['growth_pct'].index))
+            
+            fig, ax = plt.subplots(figsize=(12, 5))
+            ax.plot(prevision['history'].index, prevision['history'][term], label='Historique')
+            ax.plot(prevision['forecast'].index, prevision['forecast'][term], 'r--', label='Prévision')
+            ax.fill_between(prevision['forecast'].index, prevision['lower'][term], prevision['upper'][term],
+                            color='red', alpha=0.15, label='Intervalle à 80 %')
+            ax.set_title(f"Prévision de l'intérêt pour « {term} » (modèle : {prevision['models'][term]})")
+            ax.set_ylabel("Intérêt relatif")
+            ax.legend()
+            plt.tight_layout()
+            telemetry.afficher_figure(fig)
+    
+    prevision_terme()
+    
     # Recommandations stratégiques
     st.markdown("---")
     st.subheader("💡 Recommandations stratégiques")
@@ -822,7 +852,7 @@ elif page == "🔮 Prédictions":
         ax.set_title("Prédictions vs Valeurs réelles")
         ax.set_xlabel("Valeurs réelles")
         ax.set_ylabel("Prédictions")
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -842,7 +872,7 @@ elif page == "🔮 Prédictions":
         ax.set_xlabel("Erreur (prédiction - réalité)")
         ax.set_ylabel("Fréquence")
         ax.legend()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -863,30 +893,29 @@ elif page == "📊 Comparaisons":
     col1, col2 = st.columns(2)
     
     with col1:
-        # Analyse des offres d'emploi
-        if df_remotive is not None:
+        # Analyse des offres d'emploi (comptées en SQL si la base est utilisée)
+        remotive_cats = analytics.remotive_category_counts(10)
+        if remotive_cats is not None:
             st.write("**Répartition des offres Remotive :**")
-            if 'category' in df_remotive.columns:
-                remotive_cats = df_remotive['category'].value_counts().head(10)
-                fig, ax = plt.subplots(figsize=(8, 6))
-                ax.pie(remotive_cats.values, labels=remotive_cats.index, autopct='%1.1f%%')
-                ax.set_title("Top 10 catégories d'offres Remotive")
-                st.pyplot(fig)
-                
-                # Analyse détaillée
-                st.markdown("""
-                **📊 Analyse :** Les offres **Remotive** montrent une forte concentration 
-                sur le **développement** et les **technologies web**. 
-                Cette tendance confirme l'alignement avec les formations proposées.
-                """)
+            fig, ax = plt.subplots(figsize=(8, 6))
+            ax.pie(remotive_cats.values, labels=remotive_cats.index, autopct='%1.1f%%')
+            ax.set_title("Top 10 catégories d'offres Remotive")
+            telemetry.afficher_figure(fig)
+            
+            # Analyse détaillée
+            st.markdown("""
+            **📊 Analyse :** Les offres **Remotive** montrent une forte concentration 
+            sur le **développement** et les **technologies web**. 
+            Cette tendance confirme l'alignement avec les formations proposées.
+            """)
     
     with col2:
         # Analyse des formations
-        formation_cats = df_formations['categorie'].value_counts()
+        formation_cats = analytics.formation_category_counts()
         fig, ax = plt.subplots(figsize=(8, 6))
         ax.pie(formation_cats.values, labels=formation_cats.index, autopct='%1.1f%%')
         ax.set_title("Répartition des formations par catégorie")
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -901,14 +930,14 @@ elif page == "📊 Comparaisons":
     
     with col1:
         st.subheader("🌍 Analyse géographique (si disponible)")
-        if df_adzuna is not None and 'location' in df_adzuna.columns:
-            location_counts = df_adzuna['location'].value_counts().head(10)
+        location_counts = analytics.adzuna_location_counts(10)
+        if location_counts is not None:
             fig, ax = plt.subplots(figsize=(10, 6))
             location_counts.plot(kind='barh', ax=ax, color='lightblue')
-            ax.set_title("Top 10 localisations des offres Adzuna")
+            ax.set_title("Top 10 localisations des offres Adzuna (normalisées)")
             ax.set_xlabel("Nombre d'offres")
             plt.tight_layout()
-            st.pyplot(fig)
+            telemetry.afficher_figure(fig)
             
             # Analyse détaillée
             st.markdown("""
@@ -922,19 +951,32 @@ elif page == "📊 Comparaisons":
     with col2:
         st.subheader("📅 Analyse temporelle (tendances)")
         if df_google is not None:
-            # Sélectionner quelques termes populaires
-            popular_terms = df_google.columns[1:6]  # Exclure 'date'
+            # Zoom sur une période : seul ce fragment est relancé et les séries
+            # sont servies à la résolution de l'écran par la pyramide (analytics.trend_pyramid)
+            @fragment
+            def tendances_google():
+                with chronometre("Analyse temporelle"):
+                    first = df_google['date'].min().to_pydatetime()
+                    last = df_google['date'].max().to_pydatetime()
+                    start, end = st.slider("Période", min_value=first, max_value=last,
+                                           value=(first, last), format="YYYY-MM")
+                    
+                    # Sélectionner quelques termes populaires
+                    popular_terms = list(df_google.columns[1:6])  # Exclure 'date'
+                    series = analytics.trend_pyramid().window(start, end, terms=popular_terms)
+                    
+                    fig, ax = plt.subplots(figsize=(10, 6))
+                    for term in popular_terms:
+                        ax.plot(series[term].index, series[term].values, label=term, alpha=0.7)
+                    ax.set_title("Évolution des tendances Google")
+                    ax.set_xlabel("Date")
+                    ax.set_ylabel("Intérêt relatif")
+                    ax.legend()
+                    plt.xticks(rotation=45)
+                    plt.tight_layout()
+                    telemetry.afficher_figure(fig)
             
-            fig, ax = plt.subplots(figsize=(10, 6))
-            for term in popular_terms:
-                ax.plot(df_google['date'], df_google[term], label=term, alpha=0.7)
-            ax.set_title("Évolution des tendances Google")
-            ax.set_xlabel("Date")
-            ax.set_ylabel("Intérêt relatif")
-            ax.legend()
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            st.pyplot(fig)
+            tendances_google()
             
             # Analyse détaillée
             st.markdown("""
@@ -944,69 +986,243 @@ elif page == "📊 Comparaisons":
             """)
         else:
             st.info("Données de tendances Google non disponibles")
-
-# ============================
-# PAGE 6 : DONNÉES BRUTES
-# ============================
-elif page == "📋 Données brutes":
-    st.header("📋 Exploration des données brutes")
     
-    # Sélection du dataset
-    dataset_choice = st.selectbox(
-        "Choisissez un dataset :",
-        ["Formations", "Google Trends", "Remotive Jobs", "Adzuna Jobs"]
-    )
+    # Corrélations croisées recherches Google x offres d'emploi
+    st.markdown("---")
+    st.subheader("🔗 Recherches Google et offres d'emploi")
+    correlations = analytics.search_offer_correlations()
     
-    if dataset_choice == "Formations":
-        st.subheader("📊 Dataset Formations")
-        st.dataframe(df_formations, use_container_width=True)
+    if correlations is None:
+        st.info("Pas assez de périodes communes entre Google Trends et les offres d'emploi")
+    else:
+        best_corr, best_lag = correlations['best_corr'], correlations['best_lag']
+        annotate = best_corr.size <= 150
+        col1, col2 = st.columns(2)
         
-        # Statistiques descriptives
-        st.subheader("📈 Statistiques descriptives")
-        st.dataframe(df_formations.describe(), use_container_width=True)
+        with col1:
+            fig, ax = plt.subplots(figsize=(10, 6))
+            sns.heatmap(best_corr, annot=annotate, fmt=".2f", cmap="coolwarm", vmin=-1, vmax=1, ax=ax)
+            ax.set_title("Corrélation la plus forte (tous décalages)")
+            ax.set_xlabel("Catégorie d'offres")
+            ax.set_ylabel("Terme Google Trends")
+            plt.tight_layout()
+            telemetry.afficher_figure(fig)
         
-        # Analyse détaillée
-        st.markdown("""
-        **📊 Analyse des données :** 
-        - **{} formations** analysées
-        - **Demande moyenne** : {:.1f} offres
-        - **Durée moyenne** : {:.1f} heures
-        - **Ratio moyen** : {:.2f}
-        """.format(len(df_formations), df_formations['demand_offres'].mean(), 
-                  df_formations['duree_heures'].mean(), df_formations['ratio_demande_etudiants'].mean()))
-    
-    elif dataset_choice == "Google Trends" and df_google is not None:
-        st.subheader("📊 Dataset Google Trends")
-        st.dataframe(df_google, use_container_width=True)
+        with col2:
+            fig, ax = plt.subplots(figsize=(10, 6))
+            sns.heatmap(best_lag, annot=annotate, fmt="d", cmap="PiYG", center=0, ax=ax)
+            ax.set_title("Décalage correspondant (semaines, > 0 : la recherche précède)")
+            ax.set_xlabel("Catégorie d'offres")
+            ax.set_ylabel("Terme Google Trends")
+            plt.tight_layout()
+            telemetry.afficher_figure(fig)
+        
+        # Corrélation glissante d'une paire terme / catégorie
+        @fragment
+        def correlation_glissante():
+            with chronometre("Corrélation glissante"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    term = st.selectbox("Terme", list(best_corr.index))
+                with col2:
+                    categorie = st.selectbox("Catégorie d'offres", list(best_corr.columns))
+                with col3:
+                    # Au moins 4 périodes communes (cross_correlations) : curseur seulement s'il y a un choix
+                    hi = len(correlations['offers']) - 1
+                    if hi <= 4:
+                        window = 4
+                        st.caption("Fenêtre : 4 semaines (trop peu de périodes communes pour la choisir)")
+                    else:
+                        window = st.slider("Fenêtre (semaines)", 4, hi, min(8, hi))
+                
+                rolling = cross_correlation.rolling_correlation(
+                    correlations['trends'][[term]].to_numpy(dtype=float),
+                    correlations['offers'][[categorie]].to_numpy(dtype=float), window)[:, 0, 0]
+                
+                fig, ax = plt.subplots(figsize=(12, 4))
+                ax.plot(correlations['offers'].index[window - 1:], rolling)
+                ax.axhline(0, color='black', lw=1)
+                ax.set_ylim(-1.05, 1.05)
+                ax.set_title(f"Corrélation glissante « {term} » / « {categorie} » ({window} semaines)")
+                ax.set_ylabel("Corrélation")
+                plt.tight_layout()
+                telemetry.afficher_figure(fig)
+        
+        correlation_glissante()
         
-        # Analyse détaillée
         st.markdown("""
-        **📈 Analyse des tendances :** 
-        Les données Google Trends montrent l'évolution de l'intérêt 
-        pour différentes technologies et compétences digitales.
+        **🔗 Analyse :** Une corrélation forte avec un **décalage positif** indique que 
+        l'intérêt des recherches Google **précède** la publication d'offres dans la catégorie : 
+        le terme peut servir d'**indicateur avancé** pour planifier de nouvelles formations.
         """)
     
-    elif dataset_choice == "Remotive Jobs" and df_remotive is not None:
-        st.subheader("📊 Dataset Remotive Jobs")
-        st.dataframe(df_remotive.head(100), use_container_width=True)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **💼 Analyse des offres Remotive :** 
-        {} offres d'emploi analysées, principalement dans le domaine 
-        du développement et des technologies web.
-        """.format(len(df_remotive)))
-    
-    elif dataset_choice == "Adzuna Jobs" and df_adzuna is not None:
-        st.subheader("📊 Dataset Adzuna Jobs")
-        st.dataframe(df_adzuna.head(100), use_container_width=True)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **💼 Analyse des offres Adzuna :** 
-        {} offres d'emploi analysées, couvrant un large éventail 
-        de compétences et de localisations.
-        """.format(len(df_adzuna)))
+    # Corrélations entre variables numériques des formations
+    st.markdown("---")
+    st.subheader("🧮 Corrélations entre variables numériques")
+    
+    @fragment
+    def heatmap_correlations():
+        with chronometre("Corrélations numériques"):
+            all_categories = sorted(df_formations['categorie'].dropna().unique())
+            selected = st.multiselect("Catégories incluses", options=all_categories, default=all_categories)
+            # Fusion des statistiques précalculées des catégories choisies
+            corr = analytics.numeric_correlation(tuple(selected))
+            
+            fig, ax = plt.subplots(figsize=(10, 6))
+            sns.heatmap(corr, annot=True, cmap="coolwarm", fmt=".2f", vmin=-1, vmax=1, ax=ax)
+            ax.set_title("Matrice de corrélation entre variables numériques")
+            plt.tight_layout()
+            telemetry.afficher_figure(fig)
+    
+    heatmap_correlations()
+
+    # Demande par région et catégorie de formation (agrégats précalculés par stage.py, voir geo.py)
+    st.markdown("---")
+    st.subheader("🗺️ Demande par région et catégorie de formation")
+
+    @fragment
+    def demande_regions():
+        with chronometre("Demande par région"):
+            if analytics.location_demand() is None:
+                st.info("Demande par localisation non disponible : lancez stage.py pour la calculer.")
+                return
+            col1, col2 = st.columns(2)
+            with col1:
+                # Offres Adzuna seulement : les offres Remotive sont en télétravail, sans localisation
+                regions = analytics.location_drill_down(sources=("adzuna",))
+                if regions.empty:
+                    st.info("Aucune offre Adzuna localisée.")
+                    return
+                region = st.selectbox("Région :", ["Toutes"] + list(regions.index), key="region_demande")
+            region = None if region == "Toutes" else region
+            departement = None
+            if region is not None:
+                with col2:
+                    departements = analytics.location_drill_down(region, sources=("adzuna",))
+                    choix = [d for d in departements.index if d]
+                    departement = st.selectbox("Département :", ["Tous"] + choix, key="departement_demande")
+                departement = None if departement == "Tous" else departement
+
+            table = analytics.location_drill_down(region, departement, sources=("adzuna",))
+            niveau = "villes" if departement else ("départements" if region else "régions")
+            fig, ax = plt.subplots(figsize=(12, 6))
+            table.head(15).iloc[::-1].plot(kind='barh', stacked=True, ax=ax, colormap='tab20')
+            ax.set_title(f"Offres par catégorie de formation ({niveau})")
+            ax.set_xlabel("Nombre d'offres")
+            ax.set_ylabel("")
+            plt.tight_layout()
+            telemetry.afficher_figure(fig)
+            telemetry.afficher_tableau(table, "Demande par localisation", use_container_width=True)
+
+    demande_regions()
+
+# ============================
+# PAGE 6 : DONNÉES BRUTES
+# ============================
+elif page == "📋 Données brutes":
+    st.header("📋 Exploration des données brutes")
+
+    # Recherche plein texte dans l'index des offres construit par stage.py (voir search_index.py)
+    @fragment
+    def recherche_offres():
+        with chronometre("Recherche d'offres"):
+            st.subheader("🔎 Rechercher des offres")
+            recherche = st.text_input("Mots recherchés (titre, compétences) :", key="recherche_offres")
+            if not recherche:
+                return
+            resultats = analytics.search_offers(recherche, 50)
+            if resultats is None:
+                st.info("Index de recherche absent : lancez stage.py pour le construire.")
+                return
+            if resultats.empty:
+                st.warning("Aucune offre ne correspond à cette recherche.")
+                return
+            telemetry.afficher_tableau(resultats, "Résultats de recherche", use_container_width=True)
+
+            # Lien vers les formations associées aux offres trouvées
+            formations_trouvees = analytics.offer_index().formations_in(resultats.index)
+            if formations_trouvees:
+                formation = st.selectbox("Formation associée :", formations_trouvees, key="formation_recherche")
+                telemetry.afficher_tableau(df_formations[df_formations['titre'] == formation],
+                                           "Formation associée", use_container_width=True)
+                offres, total = analytics.formation_offers(formation, 100)
+                st.markdown(f"**{total:,} offres** comptées dans la demande de cette formation (100 premières) :")
+                telemetry.afficher_tableau(offres, "Offres de la formation", use_container_width=True)
+
+    recherche_offres()
+
+    # Fragment : changer de dataset ne relance que ce bloc
+    @fragment
+    def donnees_brutes():
+        with chronometre("Données brutes"):
+            # Sélection du dataset
+            dataset_choice = st.selectbox(
+                "Choisissez un dataset :",
+                ["Formations", "Google Trends", "Remotive Jobs", "Adzuna Jobs"]
+            )
+            
+            if dataset_choice == "Formations":
+                st.subheader("📊 Dataset Formations")
+                telemetry.afficher_tableau(df_formations, "Dataset Formations", use_container_width=True)
+                
+                # Statistiques descriptives
+                st.subheader("📈 Statistiques descriptives")
+                telemetry.afficher_tableau(df_formations.describe(), "Statistiques descriptives", use_container_width=True)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **📊 Analyse des données :** 
+                - **{} formations** analysées
+                - **Demande moyenne** : {:.1f} offres
+                - **Durée moyenne** : {:.1f} heures
+                - **Ratio moyen** : {:.2f}
+                """.format(len(df_formations), df_formations['demand_offres'].mean(), 
+                          df_formations['duree_heures'].mean(), df_formations['ratio_demande_etudiants'].mean()))
+            
+            elif dataset_choice == "Google Trends" and df_google is not None:
+                st.subheader("📊 Dataset Google Trends")
+                telemetry.afficher_tableau(df_google, "Dataset Google Trends", use_container_width=True)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **📈 Analyse des tendances :** 
+                Les données Google Trends montrent l'évolution de l'intérêt 
+                pour différentes technologies et compétences digitales.
+                """)
+            
+            elif dataset_choice == "Remotive Jobs":
+                st.subheader("📊 Dataset Remotive Jobs")
+                # Une page de 100 offres (lue en SQL si la base est utilisée)
+                debut = st.number_input("Première offre affichée :", min_value=0, value=0, step=100,
+                                        key="debut_remotive")
+                offres, total = analytics.browse_offers('remotive', 100, int(debut))
+                if offres is not None:
+                    telemetry.afficher_tableau(offres, "Dataset Remotive Jobs", use_container_width=True)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **💼 Analyse des offres Remotive :** 
+                {} offres d'emploi analysées, principalement dans le domaine 
+                du développement et des technologies web.
+                """.format(total))
+            
+            elif dataset_choice == "Adzuna Jobs":
+                st.subheader("📊 Dataset Adzuna Jobs")
+                # Une page de 100 offres (lue en SQL si la base est utilisée)
+                debut = st.number_input("Première offre affichée :", min_value=0, value=0, step=100,
+                                        key="debut_adzuna")
+                offres, total = analytics.browse_offers('adzuna', 100, int(debut))
+                if offres is not None:
+                    telemetry.afficher_tableau(offres, "Dataset Adzuna Jobs", use_container_width=True)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **💼 Analyse des offres Adzuna :** 
+                {} offres d'emploi analysées, couvrant un large éventail 
+                de compétences et de localisations.
+                """.format(total))
+
+    donnees_brutes()
 
 # ============================
 # PAGE 7 : OPPORTUNITÉS
@@ -1018,14 +1234,7 @@ elif page == "🎯 Opportunités":
     st.subheader("📊 Analyse des gaps marché")
     
     # Calculer les opportunités par catégorie
-    cat_analysis = df_formations.groupby('categorie').agg({
-        'demand_offres': ['sum', 'mean', 'count'],
-        'ratio_demande_etudiants': 'mean'
-    }).round(2)
-    
-    cat_analysis.columns = ['Demande Totale', 'Demande Moyenne', 'Nombre Formations', 'Ratio Moyen']
-    cat_analysis['Opportunité Score'] = (cat_analysis['Demande Totale'] / cat_analysis['Nombre Formations']) * cat_analysis['Ratio Moyen']
-    cat_analysis = cat_analysis.sort_values('Opportunité Score', ascending=False)
+    cat_analysis = analytics.opportunity_analysis()
     
     col1, col2 = st.columns(2)
     
@@ -1038,7 +1247,7 @@ elif page == "🎯 Opportunités":
         ax.set_ylabel("Score d'opportunité")
         plt.xticks(rotation=45)
         plt.tight_layout()
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -1062,7 +1271,7 @@ elif page == "🎯 Opportunités":
         ax.set_title("Ratio vs Nombre de formations (taille = demande)")
         ax.set_xlabel("Nombre de formations")
         ax.set_ylabel("Ratio moyen")
-        st.pyplot(fig)
+        telemetry.afficher_figure(fig)
         
         # Analyse détaillée
         st.markdown("""
@@ -1113,3 +1322,6 @@ st.markdown("""
     Développé avec Streamlit et Matplotlib</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Mesure de la page complète et panneau de performance (optionnel)
+telemetry.fin_page()
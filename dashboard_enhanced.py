@@ -10,6 +10,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
+from fragments import fragment, chronometre
+import analytics
 warnings.filterwarnings('ignore')
 
 # Configuration de la page
@@ -32,34 +34,17 @@ page = st.sidebar.selectbox(
      "🔮 Prédictions", "📊 Comparaisons", "📋 Données brutes", "🎯 Opportunités"]
 )
 
-# Chargement des données
-@st.cache_data
-def load_data():
-    """Charge et prépare toutes les données"""
-    try:
-        # Données principales
-        df_formations = pd.read_csv("df_final_clean_no_empty.csv")
-        
-        # Données Google Trends
-        df_google = pd.read_csv("tendances_google_france.csv")
-        df_google['date'] = pd.to_datetime(df_google['date'])
-        
-        # Données des offres
-        df_remotive = pd.read_csv("remotive_jobs_clean.csv")
-        df_adzuna = pd.read_csv("adzuna_offres_brutes.csv")
-        
-        return df_formations, df_google, df_remotive, df_adzuna
-    except Exception as e:
-        st.error(f"Erreur lors du chargement des données : {e}")
-        return None, None, None, None
-
-# Chargement des données
-df_formations, df_google, df_remotive, df_adzuna = load_data()
+# Chargement des données (copie unique partagée par le processus, voir analytics.py)
+df_formations, df_google, df_remotive, df_adzuna = analytics.load_data()
 
 if df_formations is None:
     st.error("Impossible de charger les données. Vérifiez que tous les fichiers CSV sont présents.")
     st.stop()
 
+# Version des données publiée par refresher.py (prise en compte sans redémarrage)
+if analytics.data_release():
+    st.sidebar.caption(f"Données : version {analytics.data_release()}")
+
 # ============================
 # PAGE 1 : VUE D'ENSEMBLE
 # ============================
@@ -67,25 +52,24 @@ if page == "🏠 Vue d'ensemble":
     st.header("🏠 Vue d'ensemble du marché de la formation digitale")
     
     # Métriques principales
+    metrics = analytics.overview_metrics()
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_formations = len(df_formations)
+        total_formations = metrics['total_formations']
         st.metric("Total Formations", f"{total_formations:,}")
     
     with col2:
-        total_demand = df_formations['demand_offres'].sum()
+        total_demand = metrics['total_demand']
         st.metric("Demande Totale", f"{total_demand:,} offres")
     
     with col3:
-        avg_duration = df_formations['duree_heures'].mean()
+        avg_duration = metrics['avg_duration']
         st.metric("Durée Moyenne", f"{avg_duration:.1f} heures")
     
     with col4:
-        # Compter les formations qui ont une certification (pas vide et pas 'non')
-        cert_ratio = (df_formations['certification'].notna() & 
-                     (df_formations['certification'] != '') & 
-                     (df_formations['certification'] != 'non')).mean() * 100
+        # Formations qui ont une certification (pas vide et pas 'non')
+        cert_ratio = metrics['cert_ratio']
         st.metric("Formations Certifiantes", f"{cert_ratio:.1f}%")
     
     st.markdown("---")
@@ -95,7 +79,7 @@ if page == "🏠 Vue d'ensemble":
     
     with col1:
         st.subheader("📊 Top 10 des formations les plus demandées")
-        top10 = df_formations.nlargest(10, 'demand_offres')
+        top10 = analytics.top_formations('demand_offres', 10)
         
         # Graphique simple avec matplotlib
         fig, ax = plt.subplots(figsize=(10, 6))
@@ -115,10 +99,7 @@ if page == "🏠 Vue d'ensemble":
     
     with col2:
         st.subheader("🎯 Répartition par catégorie")
-        cat_stats = df_formations.groupby('categorie').agg({
-            'demand_offres': 'sum',
-            'titre': 'count'
-        }).reset_index()
+        cat_stats = analytics.category_demand()
         
         # Graphique circulaire
         fig, ax = plt.subplots(figsize=(8, 8))
@@ -139,13 +120,15 @@ if page == "🏠 Vue d'ensemble":
     
     with col1:
         st.subheader("⏱️ Distribution des durées de formation")
+        # Histogramme tiré de la distribution précalculée (voir distributions.py)
+        counts, edges = analytics.duration_distribution().rebin(20)
         fig, ax = plt.subplots(figsize=(10, 6))
-        ax.hist(df_formations['duree_heures'], bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7, color='skyblue', edgecolor='black')
         ax.set_title("Distribution des durées de formation")
         ax.set_xlabel("Durée (heures)")
         ax.set_ylabel("Nombre de formations")
-        ax.axvline(df_formations['duree_heures'].mean(), color='red', linestyle='--', 
-                  label=f'Moyenne: {df_formations["duree_heures"].mean():.1f}h')
+        ax.axvline(avg_duration, color='red', linestyle='--', 
+                  label=f'Moyenne: {avg_duration:.1f}h')
         ax.legend()
         st.pyplot(fig)
         
@@ -155,11 +138,11 @@ if page == "🏠 Vue d'ensemble":
         avec une moyenne de **{:.1f} heures**. Les formations courtes (< 50h) sont privilégiées 
         pour l'apprentissage rapide, tandis que les formations longues (> 150h) 
         correspondent aux spécialisations avancées.
-        """.format(df_formations['duree_heures'].mean()))
+        """.format(avg_duration))
     
     with col2:
         st.subheader("💰 Ratio demande/étudiants par catégorie")
-        ratio_by_cat = df_formations.groupby('categorie')['ratio_demande_etudiants'].mean().sort_values(ascending=False)
+        ratio_by_cat = analytics.category_ratio()
         
         fig, ax = plt.subplots(figsize=(10, 6))
         ratio_by_cat.plot(kind='bar', ax=ax, color='lightgreen')
@@ -184,59 +167,66 @@ if page == "🏠 Vue d'ensemble":
 elif page == "📈 Tendances du marché":
     st.header("📈 Analyse des tendances du marché")
     
-    # Filtres
-    col1, col2 = st.columns(2)
-    with col1:
-        min_demand = st.slider("Demande minimum", 0, int(df_formations['demand_offres'].max()), 0)
-    with col2:
-        selected_categories = st.multiselect(
-            "Catégories à afficher",
-            options=df_formations['categorie'].unique(),
-            default=df_formations['categorie'].unique()[:5]
-        )
-    
-    # Filtrer les données
-    filtered_df = df_formations[
-        (df_formations['demand_offres'] >= min_demand) &
-        (df_formations['categorie'].isin(selected_categories))
-    ]
-    
-    # Graphiques
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("📊 Distribution de la demande")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.hist(filtered_df['demand_offres'], bins=30, alpha=0.7, color='steelblue')
-        ax.set_title("Distribution du nombre d'offres par formation")
-        ax.set_xlabel("Nombre d'offres")
-        ax.set_ylabel("Fréquence")
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **📈 Analyse :** La distribution montre une **concentration** de la demande 
-        sur quelques formations très populaires (queue longue à droite). 
-        La majorité des formations ont une demande modérée, 
-        tandis qu'une minorité bénéficie d'une demande exceptionnelle.
-        """)
-    
-    with col2:
-        st.subheader("🎯 Ratio demande/étudiants")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.scatter(filtered_df['demand_offres'], filtered_df['ratio_demande_etudiants'], alpha=0.6)
-        ax.set_title("Relation entre demande et ratio étudiants")
-        ax.set_xlabel("Demande (offres)")
-        ax.set_ylabel("Ratio demande/étudiants")
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **🔍 Analyse :** Il n'y a pas de corrélation forte entre la demande absolue 
-        et le ratio. Certaines formations avec une demande modérée 
-        ont un ratio élevé, indiquant un **déséquilibre local** 
-        entre l'offre de formation et la demande du marché.
-        """)
+    # Les filtres ne relancent que ce fragment : seuls les graphiques
+    # qui lisent filtered_df sont recalculés
+    @fragment
+    def tendances_filtrees():
+        with chronometre("Tendances du marché"):
+            # Filtres
+            col1, col2 = st.columns(2)
+            with col1:
+                min_demand = st.slider("Demande minimum", 0, int(df_formations['demand_offres'].max()), 0)
+            with col2:
+                selected_categories = st.multiselect(
+                    "Catégories à afficher",
+                    options=df_formations['categorie'].unique(),
+                    default=df_formations['categorie'].unique()[:5]
+                )
+            
+            # Filtrer les données
+            filtered_df = analytics.filter_by_demand(min_demand, tuple(selected_categories))
+            
+            # Graphiques
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.subheader("📊 Distribution de la demande")
+                # Fusion des distributions précalculées des catégories choisies
+                demandes = analytics.demand_distribution(min_demand, selected_categories)
+                counts, edges = demandes.rebin(30)
+                fig, ax = plt.subplots(figsize=(8, 6))
+                ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7, color='steelblue')
+                ax.set_title("Distribution du nombre d'offres par formation")
+                ax.set_xlabel("Nombre d'offres")
+                ax.set_ylabel("Fréquence")
+                st.pyplot(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **📈 Analyse :** La distribution montre une **concentration** de la demande 
+                sur quelques formations très populaires (queue longue à droite). 
+                La majorité des formations ont une demande modérée, 
+                tandis qu'une minorité bénéficie d'une demande exceptionnelle.
+                """)
+            
+            with col2:
+                st.subheader("🎯 Ratio demande/étudiants")
+                fig, ax = plt.subplots(figsize=(8, 6))
+                ax.scatter(filtered_df['demand_offres'], filtered_df['ratio_demande_etudiants'], alpha=0.6)
+                ax.set_title("Relation entre demande et ratio étudiants")
+                ax.set_xlabel("Demande (offres)")
+                ax.set_ylabel("Ratio demande/étudiants")
+                st.pyplot(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **🔍 Analyse :** Il n'y a pas de corrélation forte entre la demande absolue 
+                et le ratio. Certaines formations avec une demande modérée 
+                ont un ratio élevé, indiquant un **déséquilibre local** 
+                entre l'offre de formation et la demande du marché.
+                """)
+
+    tendances_filtrees()
 
 # ============================
 # PAGE 3 : ANALYSE DES FORMATIONS
@@ -244,78 +234,73 @@ elif page == "📈 Tendances du marché":
 elif page == "🎓 Analyse des formations":
     st.header("🎓 Analyse détaillée des formations")
     
-    # Filtres avancés
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        cert_filter = st.selectbox("Certification", ["Toutes", "Certifiantes", "Non certifiantes"])
-    with col2:
-        min_duration = st.slider("Durée minimum (heures)", 0, int(df_formations['duree_heures'].max()), 0)
-    with col3:
-        max_duration = st.slider("Durée maximum (heures)", 0, int(df_formations['duree_heures'].max()), 
-                                int(df_formations['duree_heures'].max()))
-    
-    # Application des filtres
-    filtered_df = df_formations.copy()
-    if cert_filter == "Certifiantes":
-        filtered_df = filtered_df[filtered_df['certification'].notna() & 
-                                 (filtered_df['certification'] != '') & 
-                                 (filtered_df['certification'] != 'non')]
-    elif cert_filter == "Non certifiantes":
-        filtered_df = filtered_df[(filtered_df['certification'].isna()) | 
-                                 (filtered_df['certification'] == '') | 
-                                 (filtered_df['certification'] == 'non')]
-    
-    filtered_df = filtered_df[
-        (filtered_df['duree_heures'] >= min_duration) &
-        (filtered_df['duree_heures'] <= max_duration)
-    ]
-    
-    # Métriques filtrées
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("Formations filtrées", len(filtered_df))
-    with col2:
-        st.metric("Demande moyenne", f"{filtered_df['demand_offres'].mean():.1f}")
-    with col3:
-        st.metric("Durée moyenne", f"{filtered_df['duree_heures'].mean():.1f} heures")
-    with col4:
-        st.metric("Ratio moyen", f"{filtered_df['ratio_demande_etudiants'].mean():.2f}")
-    
-    # Graphiques d'analyse
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("⏱️ Durée vs Demande")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.scatter(filtered_df['duree_heures'], filtered_df['demand_offres'], alpha=0.6)
-        ax.set_title("Relation entre durée et demande")
-        ax.set_xlabel("Durée (heures)")
-        ax.set_ylabel("Demande (offres)")
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **📈 Analyse :** Il n'y a pas de corrélation claire entre la durée 
-        et la demande. Les formations courtes (< 50h) peuvent être très demandées 
-        pour l'apprentissage rapide, tandis que les formations longues 
-        correspondent souvent à des spécialisations avancées.
-        """)
-    
-    with col2:
-        st.subheader("📊 Distribution des durées")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.hist(filtered_df['duree_heures'], bins=20, alpha=0.7, color='green')
-        ax.set_title("Distribution des durées")
-        ax.set_xlabel("Durée (heures)")
-        ax.set_ylabel("Fréquence")
-        st.pyplot(fig)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **⏰ Analyse :** La distribution montre une **concentration** 
-        sur les formations de **20-100 heures**, avec un pic autour de **50 heures**. 
-        Les formations très courtes (< 20h) et très longues (> 200h) sont rares.
-        """)
+    # Fragment : les filtres certification / durée ne relancent que les
+    # graphiques calculés sur filtered_df
+    @fragment
+    def formations_filtrees():
+        with chronometre("Analyse des formations"):
+            # Filtres avancés
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                cert_filter = st.selectbox("Certification", ["Toutes", "Certifiantes", "Non certifiantes"])
+            with col2:
+                min_duration = st.slider("Durée minimum (heures)", 0, int(df_formations['duree_heures'].max()), 0)
+            with col3:
+                max_duration = st.slider("Durée maximum (heures)", 0, int(df_formations['duree_heures'].max()), 
+                                        int(df_formations['duree_heures'].max()))
+            
+            # Application des filtres
+            filtered_df = analytics.filter_by_duration(cert_filter, min_duration, max_duration)
+            
+            # Métriques filtrées
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Formations filtrées", len(filtered_df))
+            with col2:
+                st.metric("Demande moyenne", f"{filtered_df['demand_offres'].mean():.1f}")
+            with col3:
+                st.metric("Durée moyenne", f"{filtered_df['duree_heures'].mean():.1f} heures")
+            with col4:
+                st.metric("Ratio moyen", f"{filtered_df['ratio_demande_etudiants'].mean():.2f}")
+            
+            # Graphiques d'analyse
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.subheader("⏱️ Durée vs Demande")
+                fig, ax = plt.subplots(figsize=(8, 6))
+                ax.scatter(filtered_df['duree_heures'], filtered_df['demand_offres'], alpha=0.6)
+                ax.set_title("Relation entre durée et demande")
+                ax.set_xlabel("Durée (heures)")
+                ax.set_ylabel("Demande (offres)")
+                st.pyplot(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **📈 Analyse :** Il n'y a pas de corrélation claire entre la durée 
+                et la demande. Les formations courtes (< 50h) peuvent être très demandées 
+                pour l'apprentissage rapide, tandis que les formations longues 
+                correspondent souvent à des spécialisations avancées.
+                """)
+            
+            with col2:
+                st.subheader("📊 Distribution des durées")
+                counts, edges = analytics.duration_distribution(cert_filter, min_duration, max_duration).rebin(20)
+                fig, ax = plt.subplots(figsize=(8, 6))
+                ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7, color='green')
+                ax.set_title("Distribution des durées")
+                ax.set_xlabel("Durée (heures)")
+                ax.set_ylabel("Fréquence")
+                st.pyplot(fig)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **⏰ Analyse :** La distribution montre une **concentration** 
+                sur les formations de **20-100 heures**, avec un pic autour de **50 heures**. 
+                Les formations très courtes (< 20h) et très longues (> 200h) sont rares.
+                """)
+
+    formations_filtrees()
 
 # ============================
 # PAGE 4 : PRÉDICTIONS
@@ -398,26 +383,25 @@ elif page == "📊 Comparaisons":
     col1, col2 = st.columns(2)
     
     with col1:
-        # Analyse des offres d'emploi
-        if df_remotive is not None:
+        # Analyse des offres d'emploi (comptées en SQL si la base est utilisée)
+        remotive_cats = analytics.remotive_category_counts(10)
+        if remotive_cats is not None:
             st.write("**Répartition des offres Remotive :**")
-            if 'category' in df_remotive.columns:
-                remotive_cats = df_remotive['category'].value_counts().head(10)
-                fig, ax = plt.subplots(figsize=(8, 6))
-                ax.pie(remotive_cats.values, labels=remotive_cats.index, autopct='%1.1f%%')
-                ax.set_title("Top 10 catégories d'offres Remotive")
-                st.pyplot(fig)
-                
-                # Analyse détaillée
-                st.markdown("""
-                **📊 Analyse :** Les offres **Remotive** montrent une forte concentration 
-                sur le **développement** et les **technologies web**. 
-                Cette tendance confirme l'alignement avec les formations proposées.
-                """)
+            fig, ax = plt.subplots(figsize=(8, 6))
+            ax.pie(remotive_cats.values, labels=remotive_cats.index, autopct='%1.1f%%')
+            ax.set_title("Top 10 catégories d'offres Remotive")
+            st.pyplot(fig)
+            
+            # Analyse détaillée
+            st.markdown("""
+            **📊 Analyse :** Les offres **Remotive** montrent une forte concentration 
+            sur le **développement** et les **technologies web**. 
+            Cette tendance confirme l'alignement avec les formations proposées.
+            """)
     
     with col2:
         # Analyse des formations
-        formation_cats = df_formations['categorie'].value_counts()
+        formation_cats = analytics.formation_category_counts()
         fig, ax = plt.subplots(figsize=(8, 6))
         ax.pie(formation_cats.values, labels=formation_cats.index, autopct='%1.1f%%')
         ax.set_title("Répartition des formations par catégorie")
@@ -435,30 +419,64 @@ elif page == "📊 Comparaisons":
 # ============================
 elif page == "📋 Données brutes":
     st.header("📋 Exploration des données brutes")
-    
-    # Sélection du dataset
-    dataset_choice = st.selectbox(
-        "Choisissez un dataset :",
-        ["Formations", "Google Trends", "Remotive Jobs", "Adzuna Jobs"]
-    )
-    
-    if dataset_choice == "Formations":
-        st.subheader("📊 Dataset Formations")
-        st.dataframe(df_formations, use_container_width=True)
-        
-        # Statistiques descriptives
-        st.subheader("📈 Statistiques descriptives")
-        st.dataframe(df_formations.describe(), use_container_width=True)
-        
-        # Analyse détaillée
-        st.markdown("""
-        **📊 Analyse des données :** 
-        - **{} formations** analysées
-        - **Demande moyenne** : {:.1f} offres
-        - **Durée moyenne** : {:.1f} heures
-        - **Ratio moyen** : {:.2f}
-        """.format(len(df_formations), df_formations['demand_offres'].mean(), 
-                  df_formations['duree_heures'].mean(), df_formations['ratio_demande_etudiants'].mean()))
+
+    # Recherche plein texte dans l'index des offres construit par stage.py (voir search_index.py)
+    @fragment
+    def recherche_offres():
+        with chronometre("Recherche d'offres"):
+            st.subheader("🔎 Rechercher des offres")
+            recherche = st.text_input("Mots recherchés (titre, compétences) :", key="recherche_offres")
+            if not recherche:
+                return
+            resultats = analytics.search_offers(recherche, 50)
+            if resultats is None:
+                st.info("Index de recherche absent : lancez stage.py pour le construire.")
+                return
+            if resultats.empty:
+                st.warning("Aucune offre ne correspond à cette recherche.")
+                return
+            st.dataframe(resultats, use_container_width=True)
+
+            # Lien vers les formations associées aux offres trouvées
+            formations_trouvees = analytics.offer_index().formations_in(resultats.index)
+            if formations_trouvees:
+                formation = st.selectbox("Formation associée :", formations_trouvees, key="formation_recherche")
+                st.dataframe(df_formations[df_formations['titre'] == formation], use_container_width=True)
+                offres, total = analytics.formation_offers(formation, 100)
+                st.markdown(f"**{total:,} offres** comptées dans la demande de cette formation (100 premières) :")
+                st.dataframe(offres, use_container_width=True)
+
+    recherche_offres()
+    
+    # Fragment : changer de dataset ne relance que ce bloc
+    @fragment
+    def donnees_brutes():
+        with chronometre("Données brutes"):
+            # Sélection du dataset
+            dataset_choice = st.selectbox(
+                "Choisissez un dataset :",
+                ["Formations", "Google Trends", "Remotive Jobs", "Adzuna Jobs"]
+            )
+            
+            if dataset_choice == "Formations":
+                st.subheader("📊 Dataset Formations")
+                st.dataframe(df_formations, use_container_width=True)
+                
+                # Statistiques descriptives
+                st.subheader("📈 Statistiques descriptives")
+                st.dataframe(df_formations.describe(), use_container_width=True)
+                
+                # Analyse détaillée
+                st.markdown("""
+                **📊 Analyse des données :** 
+                - **{} formations** analysées
+                - **Demande moyenne** : {:.1f} offres
+                - **Durée moyenne** : {:.1f} heures
+                - **Ratio moyen** : {:.2f}
+                """.format(len(df_formations), df_formations['demand_offres'].mean(), 
+                          df_formations['duree_heures'].mean(), df_formations['ratio_demande_etudiants'].mean()))
+
+    donnees_brutes()
 
 # ============================
 # PAGE 7 : OPPORTUNITÉS
@@ -470,14 +488,7 @@ elif page == "🎯 Opportunités":
     st.subheader("📊 Analyse des gaps marché")
     
     # Calculer les opportunités par catégorie
-    cat_analysis = df_formations.groupby('categorie').agg({
-        'demand_offres': ['sum', 'mean', 'count'],
-        'ratio_demande_etudiants': 'mean'
-    }).round(2)
-    
-    cat_analysis.columns = ['Demande Totale', 'Demande Moyenne', 'Nombre Formations', 'Ratio Moyen']
-    cat_analysis['Opportunité Score'] = (cat_analysis['Demande Totale'] / cat_analysis['Nombre Formations']) * cat_analysis['Ratio Moyen']
-    cat_analysis = cat_analysis.sort_values('Opportunité Score', ascending=False)
+    cat_analysis = analytics.opportunity_analysis()
     
     col1, col2 = st.columns(2)
     
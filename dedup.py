@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Détection des offres quasi dupliquées (MinHash / LSH)
+
+Une même offre republiée, ou diffusée sur Remotive et sur Adzuna, ne doit
+compter qu'une fois dans la demande. Chaque offre est réduite à
+l'ensemble de ses jetons normalisés (mots du titre, entreprise,
+localisation), résumé par une signature MinHash : la proportion de
+minima égaux entre deux signatures estime la similarité de Jaccard des
+deux ensembles.
+
+Les signatures sont découpées en bandes (LSH) : deux offres ne sont
+comparées que si elles partagent au moins une bande identique, ce qui
+évite toute comparaison deux à deux. Le détecteur traite les offres par
+paquets, dans l'ordre (flux) : une offre est un doublon si elle ressemble
+à une offre déjà vue (similarité estimée >= seuil), et seules les offres
+retenues (représentants) sont gardées en mémoire.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+NUM_PERM = 64
+BANDS = 16
+THRESHOLD = 0.8
+CHUNKSIZE = 100_000
+
+# Colonnes candidates (par ordre de préférence) de chaque champ des offres
+FIELDS = {
+    'title': ('title',),
+    'company': ('company_name', 'company'),
+    'location': ('location', 'candidate_required_location'),
+}
+# Champ Adzuna sérialisé en dict : {'display_name': '...', ...}
+DISPLAY_NAME = re.compile(r"['\"]display_name['\"]\s*:\s*['\"]([^'\"]+)['\"]")
+# Nombre premier de Mersenne 2^61 - 1 (permutations universelles a.x + b mod p)
+_PRIME = np.uint64((1 << 61) - 1)
+# Jetons hachés sur 32 bits et coefficients a, b < 2^32 : a.x < 2^64, sans débordement en uint64
+_HASH_BITS = 32
+_MASK = np.uint64((1 << _HASH_BITS) - 1)
+
+
+def _normalize(values):
+    """Minuscules sans accents ni ponctuation (calculé une fois par valeur distincte)"""
+    codes, uniques = pd.factorize(values.astype(str))
+    text = pd.Series(uniques).str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+    text = text.str.lower().str.replace(r'[^a-z0-9\s]', ' ', regex=True)
+    return pd.Series(text.to_numpy()[codes], index=values.index)
+
+
+def offer_tokens(df):
+    """Jetons normalisés de chaque offre : (position, jeton)
+
+    Mots du titre, plus l'entreprise et la localisation comme jetons
+    uniques préfixés ('c:acme', 'l:paris').
+    """
+    parts = []
+    for field, candidates in FIELDS.items():
+        column = next((c for c in candidates if c in df.columns), None)
+        if column is None:
+            continue
+        values = df[column].reset_index(drop=True)
+        values = values.where(values.isna(), values.astype(str).str.extract(DISPLAY_NAME, expand=False)
+                              .fillna(values.astype(str)))
+        values = values.dropna()
+        if field == 'title':
+            # Mots d'au moins deux lettres ('H/F' et autres mentions ignorées)
+            words = _normalize(values).str.split().explode().dropna()
+            words = words[words.str.len() > 1]
+        else:
+            # Localisation réduite à sa première partie ('Paris, Île-de-France' -> 'paris')
+            if field == 'location':
+                values = values.astype(str).str.split(',').str[0]
+            words = f"{field[0]}:" + _normalize(values).str.split().str.join(" ")
+            words = words[words.str.len() > 2]
+        parts.append(pd.DataFrame({'position': words.index, 'token': words.to_numpy()}))
+    if not parts:
+        return pd.DataFrame({'position': pd.Series(dtype=int), 'token': pd.Series(dtype=object)})
+    return pd.concat(parts, ignore_index=True).drop_duplicates()
+
+
+class NearDuplicateDetector:
+    """Détecteur incrémental de quasi-doublons (signatures MinHash, index LSH par bandes)"""
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, threshold=THRESHOLD, seed=0):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm, self.bands, self.threshold = num_perm, bands, threshold
+        self.rows = num_perm // bands
+        self._a = rng.integers(1, 1 << _HASH_BITS, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << _HASH_BITS, num_perm, dtype=np.uint64)
+        self._band_weights = rng.integers(1, 1 << 63, self.rows, dtype=np.uint64) | np.uint64(1)
+        self._signature_weights = rng.integers(1, 1 << 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        # Une table par bande : clé de bande -> ligne du représentant dans _signatures
+        self._tables = [{} for _ in range(bands)]
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self.seen = 0
+
+    @property
+    def representatives(self):
+        """Nombre d'offres retenues jusqu'ici"""
+        return len(self._ids)
+
+    def signatures(self, df):
+        """Signatures MinHash (offres x permutations) et masque des offres ayant des jetons"""
+        tokens = offer_tokens(df).sort_values('position', kind='stable')
+        signatures = np.full((len(df), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        has_tokens = np.zeros(len(df), dtype=bool)
+        if tokens.empty:
+            return signatures, has_tokens
+
+        hashes = pd.util.hash_array(tokens['token'].to_numpy(dtype=object)) & _MASK
+        positions = tokens['position'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, positions[1:] != positions[:-1]])
+        offers = positions[starts]
+        # Une permutation à la fois : mémoire bornée par le nombre de jetons du paquet
+        for k in range(self.num_perm):
+            # Réduction modulo p après le produit (< 2^64) puis après l'ajout de b (< 2^62)
+            permuted = ((self._a[k] * hashes % _PRIME + self._b[k]) % _PRIME) & _MASK
+            signatures[offers, k] = np.minimum.reduceat(permuted, starts)
+        has_tokens[offers] = True
+        return signatures, has_tokens
+
+    def _band_keys(self, signatures):
+        """Clé (entier 64 bits) de chaque bande de chaque signature"""
+        bands = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (bands * self._band_weights).sum(axis=2)
+
+    def add(self, df):
+        """Traite un paquet d'offres ; renvoie le numéro du représentant de chaque offre
+
+        Les offres sont numérotées dans l'ordre du flux ; le représentant
+        d'un groupe de doublons est sa première offre. Une offre est donc
+        un doublon si le numéro renvoyé n'est pas le sien. Les offres sans
+        aucun jeton ne sont jamais des doublons.
+        """
+        signatures, has_tokens = self.signatures(df)
+        ids = np.arange(self.seen, self.seen + len(df))
+        representatives = ids.copy()
+
+        # Signatures identiques dans le paquet : seule la première est examinée
+        candidates = np.flatnonzero(has_tokens)
+        full_keys = (signatures[candidates].astype(np.uint64) * self._signature_weights).sum(axis=1)
+        _, first, inverse = np.unique(full_keys, return_index=True, return_inverse=True)
+        first = candidates[first]
+        keys = self._band_keys(signatures[first]).tolist()
+
+        stored = len(self._signatures)
+        fresh = []
+        # Signatures distinctes dans l'ordre du flux
+        for unique in np.argsort(first, kind='stable'):
+            position, band_keys = first[unique], keys[unique]
+            rows = {self._tables[band].get(key) for band, key in enumerate(band_keys)}
+            rows.discard(None)
+            if rows:
+                rows = sorted(rows)
+                reference = np.array([self._signatures[r] if r < stored else signatures[fresh[r - stored]]
+                                      for r in rows])
+                similarity = (reference == signatures[position]).mean(axis=1)
+                best = int(np.argmax(similarity))
+                if similarity[best] >= self.threshold:
+                    row = rows[best]
+                    representatives[position] = self._ids[row] if row < stored else ids[fresh[row - stored]]
+                    continue
+            row = stored + len(fresh)
+            fresh.append(position)
+            for band, key in enumerate(band_keys):
+                self._tables[band].setdefault(key, row)
+
+        # Les autres offres prennent le représentant de leur signature
+        representatives[candidates] = representatives[first[inverse.ravel()]]
+        self._signatures = np.vstack([self._signatures, signatures[fresh]])
+        self._ids = np.concatenate([self._ids, ids[fresh]])
+        self.seen += len(df)
+        return representatives
+
+
+def deduplicate_chunks(chunks, detector, source, report):
+    """Paquets d'une source sans leurs doublons ; les comptes de la source sont ajoutés à `report`
+
+    Un doublon d'une offre d'une source traitée avant (même détecteur)
+    est compté dans 'doublons_autres_sources'.
+    """
+    start = detector.seen
+    stats = {'source': source, 'offres': 0, 'doublons': 0, 'doublons_autres_sources': 0}
+    for chunk in chunks:
+        ids = np.arange(detector.seen, detector.seen + len(chunk))
+        representatives = detector.add(chunk)
+        duplicate = representatives != ids
+        stats['offres'] += len(chunk)
+        stats['doublons'] += int(duplicate.sum())
+        stats['doublons_autres_sources'] += int((representatives[duplicate] < start).sum())
+        yield chunk[~duplicate]
+    stats['taux_doublons'] = stats['doublons'] / stats['offres'] if stats['offres'] else 0.0
+    report.append(stats)
+
+
+def deduplicate(frames, detector=None, chunksize=CHUNKSIZE):
+    """Retire les quasi-doublons de plusieurs sources d'offres, traitées dans l'ordre
+
+    `frames` : {source: DataFrame ou None}. Renvoie les DataFrames sans
+    doublons (même ordre, index d'origine) et le taux de doublons par source.
+    """
+    detector = detector or NearDuplicateDetector()
+    kept, report = {}, []
+    for source, df in frames.items():
+        if df is None:
+            kept[source] = None
+            continue
+        chunks = (df.iloc[i:i + chunksize] for i in range(0, len(df), chunksize))
+        parts = list(deduplicate_chunks(chunks, detector, source, report))
+        kept[source] = pd.concat(parts) if parts else df
+    return kept, dedup_report(report)
+
+
+def dedup_report(report):
+    """Comptes par source (voir deduplicate_chunks) sous forme de DataFrame"""
+    columns = ['offres', 'doublons', 'doublons_autres_sources', 'taux_doublons']
+    return pd.DataFrame(report, columns=['source'] + columns).set_index('source')
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Distributions précalculées pour les histogrammes et boxplots des dashboards
+
+Chaque colonne numérique est résumée par un histogramme à bornes fixes
+(HistogramSketch) calculé une seule fois, globalement et par sous-ensemble
+(catégorie, statut de certification...). Tous les sketches d'une même
+colonne partagent la même grille : ils sont fusionnables par simple somme,
+et un filtre sur plusieurs catégories se résout sans relire les lignes.
+
+La taille d'un sketch dépend de la résolution de la grille, pas du nombre
+de lignes. Pour les colonnes entières de faible étendue (demande, durée),
+la grille est unitaire et quantiles / histogrammes / outliers sont exacts.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Résolution maximale d'une grille entière (une case par valeur)
+MAX_DISCRETE_BINS = 4096
+# Résolution d'une grille continue
+CONTINUOUS_BINS = 1024
+
+
+def column_grid(values):
+    """Bornes communes à tous les sketches d'une colonne
+
+    Renvoie (edges, discrete) : une case par valeur entière si la colonne
+    est entière et d'étendue raisonnable, sinon une grille régulière.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return np.array([0.0, 1.0]), True
+
+    low, high = values.min(), values.max()
+    if np.all(values == np.round(values)) and high - low < MAX_DISCRETE_BINS:
+        return np.arange(low, high + 2, dtype=float), True
+    if low == high:
+        high = low + 1
+    return np.linspace(low, high, CONTINUOUS_BINS + 1), False
+
+
+class HistogramSketch:
+    """Histogramme à bornes fixes, fusionnable, résumant une colonne"""
+
+    def __init__(self, edges, counts, discrete, total=0.0):
+        self.edges = edges
+        self.counts = counts
+        self.discrete = discrete
+        self.total = total
+
+    @classmethod
+    def from_values(cls, values, edges, discrete):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        counts, _ = np.histogram(values, bins=edges)
+        return cls(edges, counts.astype(np.int64), discrete, float(values.sum()))
+
+    @classmethod
+    def empty(cls, edges, discrete):
+        return cls(edges, np.zeros(len(edges) - 1, dtype=np.int64), discrete)
+
+    def __add__(self, other):
+        return HistogramSketch(self.edges, self.counts + other.counts,
+                               self.discrete, self.total + other.total)
+
+    @property
+    def points(self):
+        """Valeur représentative de chaque case (exacte pour une grille entière)"""
+        if self.discrete:
+            return self.edges[:-1]
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float('nan')
+
+    @property
+    def minimum(self):
+        nonzero = np.flatnonzero(self.counts)
+        return self.points[nonzero[0]] if nonzero.size else float('nan')
+
+    @property
+    def maximum(self):
+        nonzero = np.flatnonzero(self.counts)
+        return self.points[nonzero[-1]] if nonzero.size else float('nan')
+
+    def restrict(self, low=None, high=None):
+        """Sketch limité aux valeurs comprises entre low et high (inclus)"""
+        keep = np.ones(len(self.counts), dtype=bool)
+        if low is not None:
+            keep &= self.points >= low
+        if high is not None:
+            keep &= self.points <= high
+        counts = np.where(keep, self.counts, 0)
+        return HistogramSketch(self.edges, counts, self.discrete,
+                               float((counts * self.points).sum()))
+
+    def quantile(self, q):
+        """Quantile q (interpolation linéaire de pandas pour une grille entière)"""
+        n = self.count
+        if n == 0:
+            return float('nan')
+        cumulative = np.cumsum(self.counts)
+        if self.discrete:
+            position = q * (n - 1)
+            lower, upper = int(np.floor(position)), int(np.ceil(position))
+            value_lower = self.points[np.searchsorted(cumulative, lower, side='right')]
+            value_upper = self.points[np.searchsorted(cumulative, upper, side='right')]
+            return value_lower + (value_upper - value_lower) * (position - lower)
+        # Grille continue : interpolation de la fonction de répartition
+        return float(np.interp(q * n, np.concatenate([[0], cumulative]), self.edges))
+
+    def count_above(self, threshold):
+        """Nombre de valeurs strictement supérieures au seuil"""
+        return int(self.counts[self.points > threshold].sum())
+
+    def rebin(self, bins):
+        """(counts, edges) d'un histogramme à `bins` cases sur [min, max], comme ax.hist"""
+        low, high = self.minimum, self.maximum
+        if not np.isfinite(low):
+            return np.zeros(bins), np.linspace(0, 1, bins + 1)
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        counts, edges = np.histogram(self.points, bins=bins, range=(low, high), weights=self.counts)
+        return counts, edges
+
+    def boxplot_stats(self, whis=1.5):
+        """Statistiques au format ax.bxp, plus le nombre d'outliers hauts
+
+        Les outliers sont représentés par une valeur par case non vide :
+        leur nombre de points est borné par la résolution de la grille.
+        """
+        q1, med, q3 = self.quantile(0.25), self.quantile(0.5), self.quantile(0.75)
+        iqr = q3 - q1
+        low_fence, high_fence = q1 - whis * iqr, q3 + whis * iqr
+        inside = (self.counts > 0) & (self.points >= low_fence) & (self.points <= high_fence)
+        outside = (self.counts > 0) & ~inside
+        stats = {
+            'med': med, 'q1': q1, 'q3': q3,
+            'whislo': self.points[inside].min() if inside.any() else q1,
+            'whishi': self.points[inside].max() if inside.any() else q3,
+            'fliers': self.points[outside],
+            'mean': self.mean,
+        }
+        return stats, self.count_above(high_fence)
+
+
+class DistributionService:
+    """Sketches d'une colonne, globaux et par valeur d'une colonne de regroupement"""
+
+    def __init__(self, df, column, by=None):
+        values = pd.to_numeric(df[column], errors='coerce')
+        edges, discrete = column_grid(values)
+        self.column = column
+        self.edges, self.discrete = edges, discrete
+        self.total = HistogramSketch.from_values(values, edges, discrete)
+        self.groups = {}
+        if by is not None:
+            for key, group_values in values.groupby(df[by], observed=True):
+                self.groups[key] = HistogramSketch.from_values(group_values, edges, discrete)
+
+    def subset(self, keys=None):
+        """Sketch fusionné des groupes `keys` (tous les groupes si None)"""
+        if keys is None:
+            return self.total
+        sketch = HistogramSketch.empty(self.edges, self.discrete)
+        for key in keys:
+            if key in self.groups:
+                sketch = sketch + self.groups[key]
+        return sketch
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Sous-échantillonnage des séries Google Trends pour l'affichage
+
+Une pyramide multi-résolution est précalculée une fois : chaque niveau
+regroupe les points du niveau précédent par paquets de `factor` et ne
+garde que le minimum et le maximum de chaque paquet (min-max bucketing),
+ce qui conserve les pics visibles à l'écran. Une fenêtre de dates
+quelconque est ensuite servie depuis le niveau le plus fin qui tient
+dans `max_points`, quelle que soit la longueur de l'historique.
+
+Les calculs sont vectorisés sur tous les termes à la fois.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_POINTS = 2000
+
+
+def _pad(array, size, fill):
+    """Complète `array` (n, m) jusqu'à `size` lignes avec `fill`"""
+    missing = size - len(array)
+    if missing == 0:
+        return array
+    return np.vstack([array, np.full((missing, array.shape[1]), fill, dtype=array.dtype)])
+
+
+def _bucket(times_min, values_min, times_max, values_max, factor):
+    """Niveau suivant : min des minimums et max des maximums par paquet de `factor`"""
+    n_buckets = -(-len(values_min) // factor)
+    size = n_buckets * factor
+    shape = (n_buckets, factor, values_min.shape[1])
+
+    values_min = _pad(values_min, size, np.inf).reshape(shape)
+    values_max = _pad(values_max, size, -np.inf).reshape(shape)
+    times_min = _pad(times_min, size, 0).reshape(shape)
+    times_max = _pad(times_max, size, 0).reshape(shape)
+
+    arg_min = values_min.argmin(axis=1)[:, None, :]
+    arg_max = values_max.argmax(axis=1)[:, None, :]
+    return (np.take_along_axis(times_min, arg_min, axis=1)[:, 0],
+            np.take_along_axis(values_min, arg_min, axis=1)[:, 0],
+            np.take_along_axis(times_max, arg_max, axis=1)[:, 0],
+            np.take_along_axis(values_max, arg_max, axis=1)[:, 0])
+
+
+class TrendPyramid:
+    """Pyramide min-max des séries (dates x termes)"""
+
+    def __init__(self, series, factor=4, min_buckets=64):
+        series = series.sort_index()
+        self.terms = list(series.columns)
+        self.raw_times = pd.DatetimeIndex(series.index).as_unit("ns").asi8
+        self.raw_values = series.to_numpy(dtype=float)
+
+        # Les NaN ne doivent être choisis ni comme minimum ni comme maximum
+        times = np.broadcast_to(self.raw_times[:, None], self.raw_values.shape).copy()
+        level = (times, np.where(np.isnan(self.raw_values), np.inf, self.raw_values),
+                 times, np.where(np.isnan(self.raw_values), -np.inf, self.raw_values))
+        self.levels = []
+        # Date de début de chaque paquet, par niveau
+        self.starts = []
+        step = 1
+        while len(level[1]) > min_buckets:
+            level = _bucket(*level, factor)
+            step *= factor
+            self.levels.append(level)
+            self.starts.append(self.raw_times[::step])
+
+    def window(self, start=None, end=None, max_points=DEFAULT_MAX_POINTS, terms=None):
+        """Séries à afficher entre `start` et `end`, au plus ~max_points points par terme
+
+        Renvoie {terme: Series indexée par date}.
+        """
+        start = pd.Timestamp(start).value if start is not None else self.raw_times[0]
+        end = pd.Timestamp(end).value if end is not None else self.raw_times[-1]
+        columns = [self.terms.index(t) for t in terms] if terms is not None else range(len(self.terms))
+
+        lo = np.searchsorted(self.raw_times, start, side='left')
+        hi = np.searchsorted(self.raw_times, end, side='right')
+        if hi - lo <= max_points or not self.levels:
+            index = pd.to_datetime(self.raw_times[lo:hi])
+            return {self.terms[j]: pd.Series(self.raw_values[lo:hi, j], index=index) for j in columns}
+
+        # Niveau le plus fin dont la fenêtre tient dans max_points (2 points par paquet)
+        for level, starts in zip(self.levels, self.starts):
+            lo = max(np.searchsorted(starts, start, side='right') - 1, 0)
+            hi = np.searchsorted(starts, end, side='right')
+            if 2 * (hi - lo) <= max_points:
+                break
+
+        times_min, values_min, times_max, values_max = level
+        result = {}
+        for j in columns:
+            times = np.concatenate([times_min[lo:hi, j], times_max[lo:hi, j]])
+            values = np.concatenate([values_min[lo:hi, j], values_max[lo:hi, j]])
+            keep = np.isfinite(values) & (times >= start) & (times <= end)
+            order = np.argsort(times[keep], kind='stable')
+            result[self.terms[j]] = pd.Series(values[keep][order], index=pd.to_datetime(times[keep][order]))
+        return result
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Prévisions de toutes les séries Google Trends en un seul lot
+
+Deux modèles légers sont ajustés sur toutes les colonnes à la fois
+(boucle sur le temps, calcul vectorisé sur les termes) :
+- lissage exponentiel de Holt (niveau + tendance), paramètres choisis
+  par grille pour chaque terme ;
+- naïf saisonnier avec dérive (valeur de la même période l'an dernier
+  plus la dérive moyenne annuelle).
+
+Pour chaque terme, le modèle retenu est celui qui prévoit le mieux les
+`horizon` dernières périodes ; il est ensuite réajusté sur tout
+l'historique. Avec moins de MIN_PERIODS périodes, la dernière valeur est
+prolongée, sans intervalle de prévision. Les intervalles de prévision supposent des erreurs
+normales. Les blocs de termes peuvent être traités en parallèle
+(n_jobs), numpy libérant le GIL pendant les calculs.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from trends import FREQUENCIES, trend_matrix
+
+SEASON_LENGTHS = {'hebdomadaire': 52, 'mensuelle': 12}
+ALPHAS = np.array([0.1, 0.2, 0.3, 0.5, 0.7, 0.9])
+BETAS = np.array([0.01, 0.05, 0.1, 0.2, 0.3])
+# Quantile normal pour un intervalle à 80 %
+Z_80 = 1.2816
+# Périodes nécessaires pour ajuster Holt (deux) et valider sur la dernière
+MIN_PERIODS = 3
+
+
+def holt(values, horizon):
+    """Lissage de Holt de chaque colonne, paramètres choisis par grille
+
+    Renvoie (prévisions (horizon, m), écarts-types de prévision (horizon, m)).
+    """
+    alpha = np.repeat(ALPHAS, len(BETAS))[:, None, None]
+    beta = np.tile(BETAS, len(ALPHAS))[:, None, None]
+    n_periods, n_terms = values.shape
+
+    level = np.broadcast_to(values[0], (len(alpha), 1, n_terms)).copy()
+    trend = np.broadcast_to(values[1] - values[0], (len(alpha), 1, n_terms)).copy()
+    sse = np.zeros_like(level)
+    for y in values[1:]:
+        error = y - (level + trend)
+        sse += error ** 2
+        new_level = level + trend + alpha * error
+        trend = trend + alpha * beta * error
+        level = new_level
+
+    # Meilleur couple (alpha, beta) pour chaque terme
+    best = np.argmin(sse[:, 0, :], axis=0)
+    columns = np.arange(n_terms)
+    level, trend = level[best, 0, columns], trend[best, 0, columns]
+    alpha, beta = alpha[best, 0, 0], beta[best, 0, 0]
+    sigma = np.sqrt(sse[best, 0, columns] / max(n_periods - 3, 1))
+
+    steps = np.arange(1, horizon + 1)[:, None]
+    forecast = level + steps * trend
+    # Var(h) = sigma² (1 + somme_{j<h} alpha² (1 + j beta)²)
+    j = np.arange(horizon)[:, None]
+    cumulative = np.cumsum(np.where(j > 0, (alpha * (1 + j * beta)) ** 2, 0), axis=0)
+    return forecast, sigma * np.sqrt(1 + cumulative)
+
+
+def seasonal_naive_drift(values, horizon, season_length):
+    """Naïf saisonnier avec dérive : y(t+h) = y(t+h-s) + dérive saisonnière moyenne"""
+    seasonal_diff = values[season_length:] - values[:-season_length]
+    drift = seasonal_diff.mean(axis=0)
+    residuals = seasonal_diff - drift
+    sigma = residuals.std(axis=0, ddof=1) if len(residuals) > 1 else np.zeros(values.shape[1])
+
+    steps = np.arange(1, horizon + 1)
+    cycles = (steps - 1) // season_length + 1
+    reference = values[len(values) - season_length + (steps - 1) % season_length]
+    forecast = reference + cycles[:, None] * drift
+    return forecast, sigma * np.sqrt(cycles)[:, None]
+
+
+def _forecast_block(values, horizon, season_length):
+    """Prévisions d'un bloc de colonnes : sélection du modèle sur les dernières périodes"""
+    n_periods = len(values)
+    if n_periods < MIN_PERIODS:
+        # Trop court pour une sélection de modèle : dernière valeur prolongée, intervalle inconnu
+        forecast = np.repeat(values[-1:], horizon, axis=0)
+        return forecast, np.full_like(forecast, np.nan), np.zeros(values.shape[1], dtype=bool)
+    use_seasonal = n_periods - horizon > 2 * season_length
+
+    holdout_truth = values[-horizon:]
+    train = values[:-horizon]
+    holt_error = np.abs(holt(train, horizon)[0] - holdout_truth).mean(axis=0)
+    if use_seasonal:
+        seasonal_error = np.abs(seasonal_naive_drift(train, horizon, season_length)[0] - holdout_truth).mean(axis=0)
+        choose_seasonal = seasonal_error < holt_error
+    else:
+        choose_seasonal = np.zeros(values.shape[1], dtype=bool)
+
+    forecast, std = holt(values, horizon)
+    if choose_seasonal.any():
+        seasonal_forecast, seasonal_std = seasonal_naive_drift(values, horizon, season_length)
+        forecast = np.where(choose_seasonal, seasonal_forecast, forecast)
+        std = np.where(choose_seasonal, seasonal_std, std)
+    return forecast, std, choose_seasonal
+
+
+def forecast_all(df_google, horizon=12, freq='hebdomadaire', n_jobs=1):
+    """Prévisions de tous les termes Google Trends
+
+    Renvoie un dict :
+    - 'history' : séries rééchantillonnées (dates x termes)
+    - 'forecast', 'lower', 'upper' : prévisions et intervalle à 80 %
+      (dates futures x termes, bornées à l'échelle 0-100 de Google Trends)
+    - 'models' : modèle retenu par terme ('holt', 'saisonnier', ou
+      'dernière valeur' avec moins de MIN_PERIODS périodes)
+    - 'growth_pct' : variation de la moyenne prévue par rapport à la
+      moyenne des `horizon` dernières périodes observées
+    """
+    history = trend_matrix(df_google, freq).ffill().bfill()
+    values = history.to_numpy(dtype=float)
+    season_length = SEASON_LENGTHS.get(freq, 52)
+    horizon = min(horizon, max(len(values) // 3, 1))
+
+    blocks = np.array_split(np.arange(values.shape[1]), max(min(n_jobs, values.shape[1]), 1))
+    with ThreadPoolExecutor(max_workers=len(blocks)) as executor:
+        results = list(executor.map(lambda cols: _forecast_block(values[:, cols], horizon, season_length), blocks))
+    forecast = np.hstack([r[0] for r in results])
+    std = np.hstack([r[1] for r in results])
+    seasonal = np.concatenate([r[2] for r in results])
+
+    offset = pd.tseries.frequencies.to_offset(FREQUENCIES.get(freq, freq))
+    future = pd.date_range(history.index[-1] + offset, periods=horizon, freq=offset)
+
+    def frame(array):
+        return pd.DataFrame(np.clip(array, 0, 100), index=future, columns=history.columns)
+
+    fitted = 'holt' if len(values) >= MIN_PERIODS else 'dernière valeur'
+    recent = values[-horizon:].mean(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        growth = (np.clip(forecast, 0, 100).mean(axis=0) / recent - 1) * 100
+
+    return {
+        'history': history,
+        'forecast': frame(forecast),
+        'lower': frame(forecast - Z_80 * std),
+        'upper': frame(forecast + Z_80 * std),
+        'models': pd.Series(np.where(seasonal, 'saisonnier', fitted), index=history.columns),
+        'growth_pct': pd.Series(growth, index=history.columns).sort_values(ascending=False),
+    }
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Fragments Streamlit partagés par les dashboards
+
+Un widget placé dans un fragment ne relance que ce fragment : les graphiques
+qui ne dépendent pas du widget ne sont ni recalculés ni redessinés.
+"""
+
+import statistics
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+import analytics
+import telemetry
+
+# st.fragment (>= 1.37), st.experimental_fragment (1.33 - 1.36),
+# sinon exécution normale du script complet
+fragment = (getattr(st, "fragment", None)
+            or getattr(st, "experimental_fragment", None)
+            or (lambda func: func))
+
+# Nombre de mesures conservées par fragment dans la session
+MAX_MESURES = 50
+
+
+@contextmanager
+def chronometre(nom):
+    """Mesure la latence d'une exécution de fragment et l'affiche en légende
+
+    Si une nouvelle version des données a été servie depuis la dernière
+    exécution complète, toute la page est relancée : un fragment ne mêle
+    jamais les données de la page (df_formations...) et des agrégats
+    d'une autre version.
+    """
+    if analytics.is_stale():
+        st.rerun()
+    debut = time.perf_counter()
+    telemetry.marque(nom)
+    yield
+    duree_ms = (time.perf_counter() - debut) * 1000
+    telemetry.mesurer_fragment(nom, duree_ms)
+
+    latences = st.session_state.setdefault("latences", {})
+    mesures = latences.setdefault(nom, [])
+    mesures.append(duree_ms)
+    del mesures[:-MAX_MESURES]
+
+    st.caption(f"⏱️ Mise à jour « {nom} » : {duree_ms:.0f} ms "
+               f"(médiane sur {len(mesures)} interactions : {statistics.median(mesures):.0f} ms)")
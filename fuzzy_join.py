@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Jointure approchée des titres (étudiants intéressés -> formations)
+
+Une différence d'orthographe, de casse ou d'accent entre la feuille des
+étudiants et le catalogue faisait perdre les étudiants d'une formation
+(jointure exacte). Les titres sont d'abord comparés après normalisation
+(minuscules, sans accents ni ponctuation) ; les titres restants sont
+représentés par les n-grammes de caractères (3 à 4, TF-IDF) et associés au
+titre le plus proche par similarité cosinus, si elle dépasse le seuil de
+confiance. Le calcul passe par le produit creux de similarity.py : pas de
+comparaison de toutes les paires, même sur un grand catalogue.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from similarity import normalize_text, sparse_top_k
+
+THRESHOLD = 0.8
+NGRAM_RANGE = (3, 4)
+
+
+def fuzzy_match(left, right, threshold=THRESHOLD, ngram_range=NGRAM_RANGE):
+    """Meilleur titre de `right` pour chaque titre de `left`
+
+    Renvoie un DataFrame aligné sur `left` (même index) : position dans
+    `right` (-1 si aucune), score (1.0 pour une égalité après
+    normalisation) et méthode ('exacte', 'approchée' ou None).
+    """
+    left_norm = normalize_text(left).to_numpy()
+    right_norm = normalize_text(right).to_numpy()
+    positions = np.full(len(left_norm), -1)
+    scores = np.zeros(len(left_norm))
+    methods = np.full(len(left_norm), None, dtype=object)
+
+    # Égalités après normalisation : première occurrence côté `right`
+    first = pd.Series(np.arange(len(right_norm))).groupby(right_norm).first()
+    exact = first.reindex(left_norm).to_numpy()
+    found = ~np.isnan(exact)
+    positions[found], scores[found], methods[found] = exact[found], 1.0, 'exacte'
+
+    # Titres restants : n-grammes de caractères TF-IDF, plus proche voisin au-dessus du seuil
+    remaining = np.flatnonzero(~found & (left_norm != ''))
+    if len(remaining) and len(right_norm):
+        # IDF appris sur les deux listes : les n-grammes communs à beaucoup de
+        # titres (« developpeur », « gestion de ») pèsent moins que ce qui les distingue
+        vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=ngram_range)
+        vectorizer.fit(np.unique(np.concatenate([left_norm, right_norm])))
+        matches = sparse_top_k(vectorizer.transform(left_norm[remaining]), vectorizer.transform(right_norm),
+                               1, threshold)
+        rows = remaining[matches['left'].to_numpy()]
+        positions[rows], scores[rows], methods[rows] = matches['right'], matches['score'], 'approchée'
+    return pd.DataFrame({'right': positions, 'score': scores, 'methode': methods}, index=pd.Series(left).index)
+
+
+def fuzzy_merge(df_left, df_right, left_on, right_on, threshold=THRESHOLD):
+    """Jointure à gauche de `df_right` sur le titre le plus proche (voir fuzzy_match)
+
+    Même colonnes qu'un pd.merge(how='left') exact ; chaque ligne de
+    gauche reçoit au plus une ligne de droite.
+    """
+    matches = fuzzy_match(df_left[left_on], df_right[right_on], threshold)
+    right = df_right.reset_index(drop=True)
+    joined = right.reindex(matches['right'].where(matches['right'] >= 0).to_numpy())
+    joined.index = df_left.index
+    if right_on == left_on:
+        joined = joined.drop(columns=right_on)
+    overlap = joined.columns.intersection(df_left.columns)
+    joined = joined.rename(columns={c: f"{c}_y" for c in overlap})
+    left = df_left.rename(columns={c: f"{c}_x" for c in overlap})
+    return pd.concat([left, joined], axis=1).reset_index(drop=True), matches
+
+
+def match_summary(matches):
+    """Nombre de titres associés exactement, approximativement, ou sans correspondance"""
+    return matches['methode'].fillna('aucune').value_counts()
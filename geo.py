@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Localisations normalisées des offres : ville -> département -> région
+
+Les localisations Adzuna sont saisies librement : « Paris », « Paris 75 »
+et « Île-de-France, Paris » désignent la même ville mais étaient comptées
+séparément. Le référentiel gazetteer.csv (villes principales et tous les
+départements, avec leur région) est indexé par nom normalisé (minuscules,
+sans accents ni ponctuation) dans un dictionnaire : chaque localisation
+est découpée aux virgules, chaque morceau est cherché par hachage (ville,
+département ou région, ou numéro de département / code postal), et le
+niveau le plus précis trouvé l'emporte. Seules les valeurs distinctes sont
+résolues, puis reportées sur les offres.
+
+La demande par région, département, ville et catégorie de formation est
+calculée une fois par stage.py (ou à la construction de la base SQLite)
+et publiée comme les autres tables : le dashboard n'y fait que des sommes.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from similarity import normalize_text
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.csv")
+GEO_COLUMNS = ['ville', 'departement', 'region']
+UNKNOWN_LOCATION = "Non localisée"
+LOCATION_DEMAND_CSV = "demande_localisations.csv"
+
+# Niveaux de précision (le plus petit l'emporte)
+CITY, DEPARTMENT, REGION = 0, 1, 2
+# Abréviations courantes -> nom normalisé
+ALIASES = {
+    'idf': "ile de france",
+    'paca': "provence alpes cote d azur",
+    'aura': "auvergne rhone alpes",
+}
+
+
+class Gazetteer:
+    """Référentiel ville -> département -> région indexé par nom normalisé"""
+
+    def __init__(self, table):
+        table = table.astype({'code_departement': str})
+        departments = table.drop_duplicates('code_departement').set_index('code_departement')
+        cities = table[table['ville'].notna() & (table['ville'] != '')]
+        regions = departments['region'].drop_duplicates()
+
+        # Entrées (nom normalisé -> ville, département, région), les plus précises d'abord
+        entries = pd.concat([
+            pd.DataFrame({'cle': normalize_text(cities['ville']).to_numpy(), 'niveau': CITY,
+                          'ville': cities['ville'].to_numpy(), 'departement': cities['departement'].to_numpy(),
+                          'region': cities['region'].to_numpy()}),
+            pd.DataFrame({'cle': normalize_text(departments['departement']).to_numpy(), 'niveau': DEPARTMENT,
+                          'ville': None, 'departement': departments['departement'].to_numpy(),
+                          'region': departments['region'].to_numpy()}),
+            pd.DataFrame({'cle': normalize_text(regions).to_numpy(), 'niveau': REGION,
+                          'ville': None, 'departement': None, 'region': regions.to_numpy()}),
+        ], ignore_index=True)
+        self.entries = entries
+        # Index de hachage nom -> entrée ; à nom égal (Paris), l'entrée la plus précise
+        self._names = {}
+        for key, position in zip(entries['cle'], entries.index):
+            self._names.setdefault(key, position)
+        for alias, name in ALIASES.items():
+            if name in self._names:
+                self._names.setdefault(alias, self._names[name])
+        # Numéro de département -> entrée du département
+        self._codes = dict(zip(departments.index, entries.index[entries['niveau'] == DEPARTMENT]))
+
+    @classmethod
+    def from_file(cls, path=GAZETTEER_PATH):
+        return cls(pd.read_csv(path, dtype=str, keep_default_na=False))
+
+    def _department_code(self, number):
+        """Numéro de département d'un nombre (département ou code postal)"""
+        if len(number) == 5:
+            return number[:3] if number.startswith('97') else number[:2]
+        return number.zfill(2) if len(number) <= 3 else None
+
+    def _lookup(self, words):
+        """Entrée du plus long préfixe de `words` présent dans l'index (« lyon 3e arrondissement »), ou -1"""
+        for end in range(len(words), 0, -1):
+            position = self._names.get(' '.join(words[:end]), -1)
+            if position >= 0:
+                return position
+        return -1
+
+    def _resolve(self, location):
+        """Entrée la plus précise trouvée dans une localisation (position, ou -1)"""
+        levels, departments = self.entries['niveau'].to_numpy(), self.entries['departement'].to_numpy()
+        best = -1
+        for part in normalize_text(str(location).split(',')):
+            words = part.split()
+            codes = [self._codes.get(self._department_code(w), -1) for w in words if w.isdigit()]
+            codes = [c for c in codes if c >= 0]
+            candidate = self._lookup([w for w in words if not any(c.isdigit() for c in w)])
+            # Ville homonyme d'un autre département que le code postal (Saint-Denis 97400) : écartée
+            if codes and candidate >= 0 and levels[candidate] == CITY \
+                    and departments[candidate] not in departments[codes]:
+                candidate = -1
+            for position in [candidate, *codes]:
+                if position >= 0 and (best < 0 or levels[position] < levels[best]):
+                    best = position
+        return best
+
+    def locate(self, locations):
+        """Ville, département et région de chaque localisation (NaN si inconnue), même index"""
+        locations = pd.Series(locations)
+        codes, distinct = pd.factorize(locations)
+        resolved = np.array([self._resolve(value) for value in distinct] + [-1], dtype=np.int64)
+        rows = resolved[codes]  # code -1 (valeur manquante) -> dernière case, -1
+        located = self.entries[GEO_COLUMNS].reindex(np.where(rows >= 0, rows, -1))
+        located.index = locations.index
+        return located
+
+    def labels(self, locations):
+        """Libellé normalisé le plus précis (ville, sinon département, sinon région, sinon texte brut)"""
+        located = self.locate(locations)
+        return located['ville'].fillna(located['departement']).fillna(located['region']) \
+            .fillna(pd.Series(locations, index=located.index))
+
+
+def location_demand(counts, gazetteer=None):
+    """Demande par source, région, département, ville et catégorie
+
+    `counts` : DataFrame (source, location, categorie, demand_offres), une
+    ligne par localisation brute ; les localisations sont normalisées puis
+    regroupées.
+    """
+    gazetteer = Gazetteer.from_file() if gazetteer is None else gazetteer
+    located = gazetteer.locate(counts['location'].reset_index(drop=True))
+    located['region'] = located['region'].fillna(UNKNOWN_LOCATION)
+    located[['departement', 'ville']] = located[['departement', 'ville']].fillna('')
+    keys = pd.concat([counts[['source']].reset_index(drop=True), located[['region', 'departement', 'ville']],
+                      counts[['categorie']].reset_index(drop=True)], axis=1)
+    demand = counts['demand_offres'].to_numpy()
+    result = pd.Series(demand, index=pd.MultiIndex.from_frame(keys)).groupby(level=list(keys.columns)).sum()
+    return result[result > 0].rename('demand_offres').reset_index()
+
+
+def matrix_location_demand(demand_matrix, gazetteer=None):
+    """Demande par localisation normalisée depuis une OfferFormationMatrix (voir sparse_demand.py)"""
+    by_location = demand_matrix.category_demand_by(['source', 'location'])
+    counts = by_location.rename_axis(columns='categorie').stack().rename('demand_offres').reset_index()
+    return location_demand(counts[counts['demand_offres'] > 0], gazetteer)
+
+
+def drill_down(demand, region=None, departement=None, sources=None):
+    """Demande par catégorie (colonnes) au niveau inférieur de la sélection (lignes)
+
+    Sans région : par région ; avec une région : par département ; avec un
+    département : par ville.
+    """
+    selection = demand if not sources else demand[demand['source'].isin(list(sources))]
+    level = 'region'
+    if region is not None:
+        selection, level = selection[selection['region'] == region], 'departement'
+    if departement is not None:
+        selection, level = selection[selection['departement'] == departement], 'ville'
+    table = selection.pivot_table(index=level, columns='categorie', values='demand_offres',
+                                  aggfunc='sum', fill_value=0)
+    return table.loc[table.sum(axis=1).sort_values(ascending=False).index]
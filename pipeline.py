@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Étapes de préparation des données (étape 1 de stage.py)
+
+Chaque étape est une fonction qui prend et renvoie des DataFrames, afin
+de pouvoir être enchaînée par stage.py et chronométrée séparément par
+les benchmarks (voir benchmarks/).
+"""
+
+import re
+
+import nltk
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+
+from fuzzy_join import fuzzy_merge
+
+STUDENTS_COLUMN = "Étudiants Intéressés - Web4Jobs"
+NO_FORMATION = 'Autres'
+
+
+def load_sources(directory="."):
+    """Lit les CSV bruts : (adzuna, formations, remotive, étudiants nettoyé)"""
+    def path(name):
+        return f"{directory}/{name}"
+
+    df_adzuna = pd.read_csv(path("adzuna_offres_brutes.csv"))
+    df_formations = pd.read_csv(path("openclassrooms_formations_final.csv"))
+    df_remotive = pd.read_csv(path("remotive_jobs_clean.csv"))
+    df_etudiants = clean_etudiants(pd.read_csv(path("etudiants_interesses_web4jobs.csv"), header=None))
+    return df_adzuna, df_formations, df_remotive, df_etudiants
+
+
+def clean_etudiants(df_etudiants):
+    """Nettoyage du CSV des étudiants (lu sans en-tête)"""
+    first_row = df_etudiants.iloc[0].tolist()
+
+    if not any("Unnamed" in str(c) for c in first_row):
+        df_etudiants.columns = first_row
+        df_etudiants = df_etudiants.drop(0).reset_index(drop=True)
+
+    df_etudiants.columns = df_etudiants.columns.map(str)
+    df_etudiants = df_etudiants.loc[:, ~df_etudiants.columns.str.contains('^Unnamed')]
+
+    if df_etudiants.columns[0] != 'titre':
+        df_etudiants = df_etudiants.rename(columns={df_etudiants.columns[0]: 'titre'})
+    return df_etudiants
+
+
+def prepare_nltk():
+    """Télécharge les ressources NLTK et renvoie les mots vides anglais"""
+    nltk.download('punkt')
+    nltk.download("punkt_tab")
+    nltk.download('stopwords')
+    return set(stopwords.words('english'))
+
+
+def extract_keywords(text, stop_words):
+    text = str(text).lower()
+    text = re.sub(r'[^a-z\s]', '', text)
+    words = word_tokenize(text)
+    return [w for w in words if w not in stop_words and len(w) > 2]
+
+
+def offer_keywords(df_offers, stop_words):
+    """Mots-clés de chaque offre (titre, sinon compétences, sinon aucun)"""
+    if 'title' in df_offers.columns:
+        return df_offers['title'].apply(lambda x: extract_keywords(x, stop_words))
+    if 'skills' in df_offers.columns:
+        return df_offers['skills'].apply(lambda x: str(x).split(','))
+    return pd.Series([[] for _ in range(len(df_offers))], index=df_offers.index)
+
+
+def map_to_formations(keywords, formations_list):
+    mapped = []
+    for form in formations_list:
+        for kw in keywords:
+            if kw in form.lower():
+                mapped.append(form)
+                break
+    return mapped if mapped else [NO_FORMATION]
+
+
+def offer_formations(df_offers, df_formations):
+    """Formations associées aux mots-clés de chaque offre"""
+    formations_list = df_formations.iloc[:, 0].astype(str).tolist()
+    return df_offers['keywords'].apply(lambda x: map_to_formations(x, formations_list))
+
+
+def market_demand(offer_frames):
+    """Nombre d'offres associées à chaque formation, toutes sources confondues"""
+    df_market = pd.concat([df[['keywords', 'formations_associees']] for df in offer_frames],
+                          ignore_index=True)
+
+    df_market_exploded = df_market.explode('formations_associees')
+    demand = df_market_exploded['formations_associees'].value_counts().reset_index()
+    demand.columns = ['formation', 'demand_offres']
+    return demand
+
+
+def merge_formations(df_formations, demand):
+    """Formations enrichies de leur nombre d'offres"""
+    col_form = df_formations.columns[0]
+    df_final = pd.merge(df_formations, demand, left_on=col_form, right_on='formation', how='left')
+    df_final['demand_offres'] = df_final['demand_offres'].fillna(0).astype(int)
+    return df_final
+
+
+def merge_etudiants(df_final, df_etudiants, col_form, threshold=None):
+    """Ajoute le nombre d'étudiants intéressés (colonne numérique si elle existe)
+
+    Avec `threshold`, les titres sont associés par jointure approchée (voir
+    fuzzy_join.py) au lieu d'une égalité exacte. Renvoie (df_final, matches) :
+    les associations de fuzzy_match, None pour la jointure exacte.
+    """
+    col_etud = df_etudiants.columns[0]
+    matches = None
+    if threshold is None:
+        df_final = pd.merge(df_final, df_etudiants, left_on=col_form, right_on=col_etud, how='left')
+    else:
+        df_final, matches = fuzzy_merge(df_final, df_etudiants, col_form, col_etud, threshold)
+
+    if STUDENTS_COLUMN in df_final.columns:
+        df_final[STUDENTS_COLUMN] = pd.to_numeric(df_final[STUDENTS_COLUMN], errors='coerce').fillna(0)
+    return df_final, matches
+
+
+def demand_ratio(df_final):
+    """Ratio demande/étudiants (la demande seule quand aucun étudiant n'est recensé)"""
+    if STUDENTS_COLUMN in df_final.columns:
+        df_final['ratio_demande_etudiants'] = df_final.apply(
+            lambda x: x['demand_offres'] / x[STUDENTS_COLUMN] if x[STUDENTS_COLUMN] > 0 else x['demand_offres'],
+            axis=1
+        )
+    else:
+        df_final['ratio_demande_etudiants'] = df_final['demand_offres']
+    return df_final
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Profilage des étapes d'une exécution de stage.py
+
+Chaque étape nommée est mesurée : temps réel, temps CPU, lignes en entrée
+et en sortie, pic mémoire Python (tracemalloc). Les étapes listées dans
+la variable d'environnement STAGE_PROFILE (noms séparés par des virgules,
+ou 'all') sont aussi passées sous cProfile. Le rapport est écrit en JSON
+et en HTML à côté des CSV produits.
+
+Les étapes ne doivent pas être imbriquées (le pic mémoire est remis à
+zéro au début de chaque étape).
+"""
+
+import cProfile
+import html
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+REPORT_NAME = "stage_profile"
+# Nombre de fonctions conservées dans le résumé cProfile
+PROFILE_TOP = 25
+
+
+def count_rows(data):
+    """Nombre de lignes d'un DataFrame / Series / liste, ou d'un tuple de ceux-ci"""
+    if data is None:
+        return None
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return len(data)
+    if isinstance(data, (tuple, list)) and all(isinstance(d, (pd.DataFrame, pd.Series)) for d in data):
+        return sum(len(d) for d in data)
+    try:
+        return len(data)
+    except TypeError:
+        return None
+
+
+def _profiled_steps():
+    names = os.environ.get("STAGE_PROFILE", "")
+    return {name.strip() for name in names.split(",") if name.strip()}
+
+
+class StepRecord(dict):
+    """Mesures d'une étape ; `rows_out` peut être renseigné dans le bloc"""
+
+    def output(self, data):
+        self['rows_out'] = count_rows(data)
+        return data
+
+
+class RunProfiler:
+    """Mesures des étapes d'une exécution"""
+
+    def __init__(self, trace_memory=True, profile_steps=None):
+        self.records = []
+        self.trace_memory = trace_memory
+        self.profile_steps = _profiled_steps() if profile_steps is None else set(profile_steps)
+        self.started = datetime.now()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def step(self, name, rows_in=None):
+        """Mesure le bloc ; `rows_in` accepte un nombre ou des données"""
+        record = StepRecord(step=name, rows_in=rows_in if isinstance(rows_in, int) or rows_in is None
+                            else count_rows(rows_in), rows_out=None)
+        profiler = None
+        if name in self.profile_steps or 'all' in self.profile_steps:
+            profiler = cProfile.Profile()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+            record['wall_s'] = time.perf_counter() - wall
+            record['cpu_s'] = time.process_time() - cpu
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record['peak_mb'] = (peak - memory_start) / 2 ** 20
+                record['retained_mb'] = (current - memory_start) / 2 ** 20
+            if profiler:
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_TOP)
+                record['cprofile'] = stream.getvalue()
+            self.records.append(record)
+
+    def summary(self):
+        """Mesures sous forme de DataFrame (une ligne par étape)"""
+        return pd.DataFrame([{k: v for k, v in r.items() if k != 'cprofile'} for r in self.records])
+
+    def write_report(self, directory=".", name=REPORT_NAME):
+        """Écrit <name>.json et <name>.html dans `directory` ; renvoie leurs chemins"""
+        report = {
+            'started': self.started.isoformat(timespec="seconds"),
+            'total_wall_s': sum(r['wall_s'] for r in self.records),
+            'total_cpu_s': sum(r['cpu_s'] for r in self.records),
+            'steps': self.records,
+        }
+        json_path = os.path.join(directory, f"{name}.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        html_path = os.path.join(directory, f"{name}.html")
+        with open(html_path, "w", encoding="utf-8") as f:
+            f.write(_html_report(report))
+        return json_path, html_path
+
+
+def _html_report(report):
+    total = report['total_wall_s'] or 1
+    rows, details = [], []
+    for r in report['steps']:
+        share = r['wall_s'] / total * 100
+        peak = f"{r['peak_mb']:.1f}" if 'peak_mb' in r else ""
+        rows.append(
+            "<tr>"
+            f"<td>{html.escape(r['step'])}</td>"
+            f"<td>{r['wall_s']:.3f}</td><td>{r['cpu_s']:.3f}</td>"
+            f"<td>{'' if r['rows_in'] is None else r['rows_in']}</td>"
+            f"<td>{'' if r['rows_out'] is None else r['rows_out']}</td>"
+            f"<td>{peak}</td>"
+            f"<td><div class='bar' style='width:{share:.1f}%'></div>{share:.1f} %</td>"
+            "</tr>"
+        )
+        if 'cprofile' in r:
+            details.append(f"<details><summary>cProfile : {html.escape(r['step'])}</summary>"
+                           f"<pre>{html.escape(r['cprofile'])}</pre></details>")
+
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>Profil d'exécution de stage.py</title>
+<style>
+body {{ font-family: sans-serif; margin: 2rem; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ddd; padding: 4px 8px; text-align: right; }}
+td:first-child, th:first-child {{ text-align: left; }}
+td:last-child {{ width: 240px; text-align: left; }}
+.bar {{ display: inline-block; height: 10px; background: steelblue; margin-right: 6px; }}
+</style>
+</head>
+<body>
+<h1>Profil d'exécution de stage.py</h1>
+<p>Début : {report['started']} — temps réel total : {report['total_wall_s']:.2f} s —
+temps CPU total : {report['total_cpu_s']:.2f} s</p>
+<table>
+<tr><th>Étape</th><th>Temps réel (s)</th><th>CPU (s)</th><th>Lignes en entrée</th>
+<th>Lignes en sortie</th><th>Pic mémoire (Mo)</th><th>Part du temps</th></tr>
+{''.join(rows)}
+</table>
+{''.join(details)}
+</body>
+</html>
+"""
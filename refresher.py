@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Rafraîchissement périodique des données des dashboards (versions et bascule atomique)
+
+Le rafraîchisseur relance `stage.py ingest export` à intervalle régulier,
+dans un processus séparé, vers un répertoire de préparation
+(RELEASES_DIR/.<version>.tmp). Il y copie les CSV bruts lus par les
+dashboards et écrit en dernier manifest.json : l'empreinte du contenu de
+chaque table publiée. Le répertoire est ensuite renommé en
+RELEASES_DIR/<version>, puis le fichier CURRENT, qui donne le nom de la
+version servie, est remplacé par os.replace. Un dashboard voit donc
+l'ancienne version complète ou la nouvelle, jamais un fichier à moitié
+écrit ; un échec de construction laisse la version servie en place.
+
+Côté dashboard (analytics.py), current_release() ne coûte qu'un stat de
+CURRENT tant qu'il ne change pas. Les caches sont indexés par l'empreinte
+des tables qu'ils lisent : seuls ceux d'une table modifiée sont recalculés.
+
+    python refresher.py --input donnees --interval 3600
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from versioning import file_version
+
+RELEASES_DIR = os.environ.get("DASHBOARD_RELEASES", "releases")
+CURRENT_NAME = "CURRENT"
+MANIFEST_NAME = "manifest.json"
+STAGE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stage.py")
+# Versions conservées (la version servie comprise) : les sessions en cours gardent leurs fichiers
+KEEP_RELEASES = 3
+# CSV bruts lus tels quels par les dashboards (copiés dans chaque version)
+RAW_TABLES = ("tendances_google_france.csv", "remotive_jobs_clean.csv", "adzuna_offres_brutes.csv")
+# Fichiers des tables dont l'empreinte est gardée dans le manifeste
+TABLE_EXTENSIONS = (".csv", ".db")
+CHUNK = 1 << 20
+
+_current = {}
+
+
+# ============================
+# Lecture (dashboards)
+# ============================
+def current_release(releases_dir=RELEASES_DIR):
+    """Version servie : {'name', 'path', 'tables': {fichier: empreinte}}, None si aucune
+
+    Le manifeste n'est relu que si CURRENT a changé (un stat par appel).
+    """
+    pointer = os.path.join(releases_dir, CURRENT_NAME)
+    try:
+        version = file_version(pointer)
+    except FileNotFoundError:
+        return None
+    cached = _current.get(releases_dir)
+    if cached is None or cached[0] != version:
+        with open(pointer, encoding="utf-8") as f:
+            name = f.read().strip()
+        path = os.path.join(releases_dir, name)
+        with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        cached = _current[releases_dir] = (version, {'name': name, 'path': path, 'tables': manifest['tables']})
+    return cached[1]
+
+
+# ============================
+# Construction d'une version
+# ============================
+def file_digest(path):
+    """Empreinte du contenu d'un fichier (lu par blocs)"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def source_versions(input_dir):
+    """Version (date, taille) de chaque CSV brut : une version n'est reconstruite que s'ils changent"""
+    return {name: file_version(os.path.join(input_dir, name))
+            for name in sorted(os.listdir(input_dir)) if name.endswith(".csv")}
+
+
+def _new_name(releases_dir):
+    """Nom daté (ordre alphabétique = ordre chronologique), suffixé si déjà pris"""
+    base = name = datetime.now().strftime("%Y%m%d-%H%M%S")
+    suffix = 1
+    while os.path.exists(os.path.join(releases_dir, name)):
+        name, suffix = f"{base}-{suffix}", suffix + 1
+    return name
+
+
+def _write_atomic(path, text):
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def build_release(input_dir, releases_dir=RELEASES_DIR, sources=None):
+    """Construit une nouvelle version complète ; renvoie son nom (pas encore servie)"""
+    os.makedirs(releases_dir, exist_ok=True)
+    name = _new_name(releases_dir)
+    staging = os.path.join(releases_dir, f".{name}.tmp")
+    environment = dict(os.environ)
+    if environment.get("FORMATION_DB"):
+        # Base SQLite reconstruite dans la version, sous le même nom de fichier
+        environment["FORMATION_DB"] = os.path.join(staging, os.path.basename(environment["FORMATION_DB"]))
+    try:
+        subprocess.run([sys.executable, STAGE_SCRIPT, "ingest", "export", "--input", input_dir,
+                        "--output", staging, "--headless"], check=True, env=environment)
+        for table in RAW_TABLES:
+            if os.path.exists(os.path.join(input_dir, table)):
+                shutil.copy2(os.path.join(input_dir, table), os.path.join(staging, table))
+        tables = {table: file_digest(os.path.join(staging, table))
+                  for table in sorted(os.listdir(staging)) if table.endswith(TABLE_EXTENSIONS)}
+        manifest = {
+            'name': name,
+            'created': datetime.now().isoformat(timespec="seconds"),
+            'sources': source_versions(input_dir) if sources is None else sources,
+            'tables': tables,
+        }
+        # Manifeste en dernier : un répertoire sans manifeste n'est jamais servi
+        _write_atomic(os.path.join(staging, MANIFEST_NAME), json.dumps(manifest, indent=2, ensure_ascii=False))
+        os.replace(staging, os.path.join(releases_dir, name))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return name
+
+
+def activate(name, releases_dir=RELEASES_DIR):
+    """Sert la version `name` : remplacement atomique de CURRENT"""
+    if not os.path.exists(os.path.join(releases_dir, name, MANIFEST_NAME)):
+        raise FileNotFoundError(f"Version incomplète ou absente : {name!r}")
+    _write_atomic(os.path.join(releases_dir, CURRENT_NAME), name + "\n")
+
+
+def prune(releases_dir=RELEASES_DIR, keep=KEEP_RELEASES):
+    """Supprime les versions les plus anciennes (jamais la version servie) et les préparations abandonnées"""
+    current = current_release(releases_dir)
+    entries = sorted(os.listdir(releases_dir))
+    for entry in entries:
+        if entry.startswith(".") and entry.endswith(".tmp"):
+            shutil.rmtree(os.path.join(releases_dir, entry), ignore_errors=True)
+    releases = [e for e in entries if os.path.exists(os.path.join(releases_dir, e, MANIFEST_NAME))]
+    removed = []
+    for entry in releases[:max(len(releases) - keep, 0)]:
+        if current is None or entry != current['name']:
+            # Fichiers encore projetés en mémoire par un dashboard : suppression différée par le système
+            shutil.rmtree(os.path.join(releases_dir, entry), ignore_errors=True)
+            removed.append(entry)
+    return removed
+
+
+def refresh(input_dir, releases_dir=RELEASES_DIR, force=False):
+    """Construit et sert une nouvelle version si les CSV bruts ont changé ; renvoie son nom (None sinon)"""
+    sources = source_versions(input_dir)
+    current = current_release(releases_dir)
+    if current is not None and not force:
+        with open(os.path.join(current['path'], MANIFEST_NAME), encoding="utf-8") as f:
+            if json.load(f).get('sources') == sources:
+                return None
+    name = build_release(input_dir, releases_dir, sources)
+    activate(name, releases_dir)
+    prune(releases_dir)
+    return name
+
+
+def run(input_dir, releases_dir=RELEASES_DIR, interval=3600, force=False):
+    """Rafraîchit toutes les `interval` secondes ; un échec n'interrompt pas la boucle"""
+    while True:
+        started = time.perf_counter()
+        try:
+            name = refresh(input_dir, releases_dir, force)
+            if name is None:
+                print("Données inchangées : version servie conservée")
+            else:
+                print(f"✅ Version '{name}' servie ({time.perf_counter() - started:.1f} s)")
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"❌ Rafraîchissement échoué, version servie conservée : {e}")
+        force = False
+        time.sleep(max(interval - (time.perf_counter() - started), 0))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rafraîchissement périodique des données des dashboards")
+    parser.add_argument("--input", default=".", help="répertoire des CSV bruts (défaut : répertoire courant)")
+    parser.add_argument("--releases", default=RELEASES_DIR,
+                        help=f"répertoire des versions (défaut : DASHBOARD_RELEASES ou {RELEASES_DIR})")
+    parser.add_argument("--interval", type=float, default=3600, help="secondes entre deux rafraîchissements")
+    parser.add_argument("--once", action="store_true", help="un seul rafraîchissement, puis quitter")
+    parser.add_argument("--force", action="store_true", help="reconstruire même si les CSV bruts n'ont pas changé")
+    parser.add_argument("--activate", metavar="VERSION", help="servir une version existante (retour arrière)")
+    args = parser.parse_args(argv)
+
+    if args.activate:
+        activate(args.activate, args.releases)
+        print(f"✅ Version '{args.activate}' servie")
+    elif args.once:
+        name = refresh(args.input, args.releases, args.force)
+        print(f"✅ Version '{name}' servie" if name else "Données inchangées : version servie conservée")
+    else:
+        run(args.input, args.releases, args.interval, args.force)
+
+
+if __name__ == "__main__":
+    main()
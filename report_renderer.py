@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Rendu en lot des graphiques d'exploration de stage.py (PNG / SVG + index.html)
+
+Chaque graphique de l'étape « Exploration & Analyse » est une fonction qui
+dessine à partir des seules colonnes qu'elle déclare. Le rendu se fait
+dans un pool de processus (backend Agg, sans fenêtre) : un graphique par
+tâche, écrit dans chaque format demandé puis renommé (os.replace) pour ne
+jamais laisser de fichier à moitié écrit. L'empreinte des colonnes d'un
+graphique (voir versioning.py) est gardée dans report_manifest.json : un
+graphique dont les données n'ont pas changé depuis le dernier rendu n'est
+pas redessiné. index.html rassemble les graphiques du répertoire.
+
+    python report_renderer.py df_final_clean_no_empty.csv --output rapport_exploration --workers 4
+"""
+
+import argparse
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from correlation import CorrelationStats
+from versioning import frame_version
+
+REPORT_DIR = "rapport_exploration"
+MANIFEST_NAME = "report_manifest.json"
+INDEX_NAME = "index.html"
+FORMATS = ("png", "svg")
+DPI = 100
+# À incrémenter quand le dessin d'un graphique change : tous sont alors redessinés
+RENDER_VERSION = 1
+
+
+# ============================
+# Graphiques (dessinent sur une nouvelle figure)
+# ============================
+def top10_formations(df):
+    plt.figure(figsize=(12,6))
+    df.sort_values(by="demand_offres", ascending=False).head(10)\
+        .plot(x="titre", y="demand_offres", kind="barh", color="steelblue", legend=False, ax=plt.gca())
+    plt.title("Top 10 des formations les plus demandées")
+    plt.xlabel("Nombre d'offres")
+    plt.ylabel("Formation")
+    plt.gca().invert_yaxis()
+    plt.tight_layout()
+
+
+def distribution_demande(df):
+    plt.figure(figsize=(10,5))
+    sns.histplot(df['demand_offres'], bins=30, kde=True, color="green")
+    plt.title("Distribution de la demande (offres)")
+    plt.xlabel("Nombre d'offres")
+    plt.ylabel("Nombre de formations")
+    plt.tight_layout()
+
+
+def distribution_ratio(df):
+    plt.figure(figsize=(10,5))
+    sns.histplot(df['ratio_demande_etudiants'], bins=30, kde=True, color="orange")
+    plt.title("Distribution du ratio Demande / Étudiants")
+    plt.xlabel("Ratio")
+    plt.ylabel("Nombre de formations")
+    plt.tight_layout()
+
+
+def duree_par_categorie(df):
+    plt.figure(figsize=(12,6))
+    df.groupby('categorie')['duree_heures'].mean().sort_values()\
+        .plot(kind="barh", color="purple")
+    plt.title("Durée moyenne des formations par catégorie")
+    plt.xlabel("Durée (heures)")
+    plt.tight_layout()
+
+
+def certification(df):
+    plt.figure(figsize=(6,4))
+    df['certification'].value_counts().plot(kind="bar", color="teal")
+    plt.title("Formations certifiantes vs non certifiantes")
+    plt.xlabel("Certification")
+    plt.ylabel("Nombre de formations")
+    plt.tight_layout()
+
+
+def correlation(df):
+    plt.figure(figsize=(10,6))
+    # Statistiques suffisantes : la matrice se met à jour sans relire les lignes (voir correlation.py)
+    correlation_stats = CorrelationStats.from_frame(df)
+    sns.heatmap(correlation_stats.corr(), annot=True, cmap="coolwarm", fmt=".2f")
+    plt.title("Matrice de corrélation entre variables numériques")
+    plt.tight_layout()
+
+
+def ratio_par_categorie(df):
+    plt.figure(figsize=(12,6))
+    sns.boxplot(x="categorie", y="ratio_demande_etudiants", data=df)
+    plt.title("Répartition du ratio demande/étudiants par catégorie")
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+
+
+def duree_vs_demande(df):
+    # 1) Préparer un df propre pour le plot
+    plot_df = df[['duree_heures', 'demand_offres', 'certification']].copy()
+    plot_df = plot_df.dropna()
+    plot_df = plot_df[plot_df['duree_heures'] > 0]
+
+    # Si certification est 0/1, rendre la légende plus claire
+    if plot_df['certification'].dtype != 'O':
+        plot_df['certification'] = plot_df['certification'].map({1: 'Certifiante', 0: 'Non certifiante'}).fillna('Non renseigné')
+
+    # 2) Limiter l’influence des valeurs extrêmes (option A - bornes par quantiles)
+    xmax = plot_df['duree_heures'].quantile(0.98)
+    ymax = plot_df['demand_offres'].quantile(0.98)
+
+    plt.figure(figsize=(10, 6))
+    ax = sns.scatterplot(
+        data=plot_df,
+        x='duree_heures', y='demand_offres',
+        hue='certification',
+        s=40, alpha=0.6, edgecolor='none'
+    )
+
+    # Déplacer la légende hors du graphique
+    ax.legend(title='Certification', bbox_to_anchor=(1.02, 1), loc='upper left', frameon=False)
+
+    # Appliquer des bornes "raisonnables"
+    ax.set_xlim(0, xmax)
+    ax.set_ylim(0, ymax)
+
+    plt.title("Relation entre durée des formations et demande d'offres")
+    plt.xlabel("Durée (heures)")
+    plt.ylabel("Nombre d'offres")
+    plt.grid(True, linestyle='--', alpha=0.3)
+
+    # Laisser de la place pour la légende à droite
+    plt.tight_layout(rect=[0, 0, 0.82, 1])
+
+
+# Nom -> (titre, colonnes lues, fonction de dessin) ; colonnes None : toutes les colonnes numériques
+CHARTS = {
+    'top10_formations': ("Top 10 des formations les plus demandées", ['titre', 'demand_offres'], top10_formations),
+    'distribution_demande': ("Distribution de la demande (offres)", ['demand_offres'], distribution_demande),
+    'distribution_ratio': ("Distribution du ratio Demande / Étudiants", ['ratio_demande_etudiants'],
+                           distribution_ratio),
+    'duree_par_categorie': ("Durée moyenne des formations par catégorie", ['categorie', 'duree_heures'],
+                            duree_par_categorie),
+    'certification': ("Formations certifiantes vs non certifiantes", ['certification'], certification),
+    'correlation': ("Matrice de corrélation entre variables numériques", None, correlation),
+    'ratio_par_categorie': ("Répartition du ratio demande/étudiants par catégorie",
+                            ['categorie', 'ratio_demande_etudiants'], ratio_par_categorie),
+    'duree_vs_demande': ("Relation entre durée des formations et demande d'offres",
+                         ['duree_heures', 'demand_offres', 'certification'], duree_vs_demande),
+}
+
+
+def chart_data(df, name):
+    """Colonnes lues par le graphique `name`, ou None s'il en manque"""
+    columns = CHARTS[name][1]
+    if columns is None:
+        return df.select_dtypes(include="number")
+    return df[columns] if all(c in df.columns for c in columns) else None
+
+
+def draw(df, name):
+    """Dessine le graphique `name` sur une nouvelle figure (False si ses colonnes manquent)"""
+    data = chart_data(df, name)
+    if data is None:
+        return False
+    CHARTS[name][2](data)
+    return True
+
+
+# ============================
+# Rendu en lot
+# ============================
+def _init_worker():
+    matplotlib.use("Agg")
+
+
+def _render(name, data, directory, formats, dpi):
+    """Dessine un graphique et l'écrit dans chaque format ; renvoie la durée du rendu"""
+    started = time.perf_counter()
+    CHARTS[name][2](data)
+    for fmt in formats:
+        path = os.path.join(directory, f"{name}.{fmt}")
+        temporary = f"{path}.tmp"
+        plt.savefig(temporary, format=fmt, dpi=dpi, bbox_inches="tight")
+        os.replace(temporary, path)
+    plt.close("all")
+    return time.perf_counter() - started
+
+
+def _digest(data, formats, dpi):
+    return f"{RENDER_VERSION}-{'+'.join(formats)}-{dpi}-{frame_version(data)}"
+
+
+def _read_manifest(directory):
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_atomic(path, text):
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temporary, path)
+
+
+def render_report(df, directory=REPORT_DIR, formats=FORMATS, workers=None, force=False, dpi=DPI):
+    """Rend les graphiques dont les données ont changé ; renvoie l'état de chacun
+
+    `workers` : processus du pool (None : nombre de cœurs ; 1 : rendu dans
+    le processus courant). `force` : tout redessiner.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = _read_manifest(directory)
+    rows, pending = [], {}
+    for name, (title, _, _) in CHARTS.items():
+        data = chart_data(df, name)
+        if data is None:
+            rows.append({'graphique': name, 'titre': title, 'statut': "colonnes absentes", 'secondes': None})
+            continue
+        digest = _digest(data, formats, dpi)
+        files_exist = all(os.path.exists(os.path.join(directory, f"{name}.{fmt}")) for fmt in formats)
+        if not force and files_exist and manifest.get(name) == digest:
+            rows.append({'graphique': name, 'titre': title, 'statut': "inchangé", 'secondes': None})
+        else:
+            pending[name] = (data, digest)
+
+    if pending:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        if workers == 1:
+            durations = {name: _render(name, data, directory, formats, dpi) for name, (data, _) in pending.items()}
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                futures = {name: executor.submit(_render, name, data, directory, formats, dpi)
+                           for name, (data, _) in pending.items()}
+                durations = {name: future.result() for name, future in futures.items()}
+        for name, (_, digest) in pending.items():
+            manifest[name] = digest
+            rows.append({'graphique': name, 'titre': CHARTS[name][0], 'statut': "rendu",
+                         'secondes': round(durations[name], 3)})
+
+    _write_atomic(os.path.join(directory, MANIFEST_NAME), json.dumps(manifest, indent=2, ensure_ascii=False))
+    summary = pd.DataFrame(rows).set_index('graphique').reindex(list(CHARTS)).reset_index()
+    _write_atomic(os.path.join(directory, INDEX_NAME), _html_index(summary, formats))
+    return summary
+
+
+def _html_index(summary, formats):
+    figures = []
+    for r in summary.itertuples(index=False):
+        if r.statut == "colonnes absentes":
+            continue
+        links = " · ".join(f"<a href='{r.graphique}.{fmt}'>{fmt.upper()}</a>" for fmt in formats)
+        image = f"{r.graphique}.{'png' if 'png' in formats else formats[0]}"
+        figures.append(f"<figure><img src='{image}' alt='{html.escape(r.titre)}'>"
+                       f"<figcaption>{html.escape(r.titre)} — {links}</figcaption></figure>")
+
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>Exploration & Analyse</title>
+<style>
+body {{ font-family: sans-serif; margin: 2rem; }}
+figure {{ margin: 0 0 2rem 0; }}
+img {{ max-width: 100%; border: 1px solid #ddd; }}
+</style>
+</head>
+<body>
+<h1>Exploration & Analyse</h1>
+<p>Mis à jour : {datetime.now().isoformat(timespec="seconds")}</p>
+{''.join(figures)}
+</body>
+</html>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rendu en lot des graphiques d'exploration")
+    parser.add_argument("csv", help="DataFrame final (df_final_clean_no_empty.csv)")
+    parser.add_argument("--output", default=REPORT_DIR, help=f"répertoire du rapport (défaut : {REPORT_DIR})")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--workers", type=int, default=None, help="processus de rendu (défaut : nombre de cœurs)")
+    parser.add_argument("--force", action="store_true", help="redessiner même les graphiques inchangés")
+    args = parser.parse_args(argv)
+
+    matplotlib.use("Agg")
+    summary = render_report(pd.read_csv(args.csv), args.output, tuple(args.formats), args.workers, args.force)
+    print(summary.to_string(index=False))
+    print(f"✅ Rapport écrit dans '{os.path.join(args.output, INDEX_NAME)}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Index de recherche plein texte des offres (classement BM25)
+
+Construit par stage.py après l'association offres -> formations, et
+écrit dans INDEX_DIR (variable SEARCH_INDEX, 'search_index' par défaut) :
+- index inversé : pour chaque terme (titres et compétences normalisés,
+  d'où sont tirés les mots-clés du pipeline), la liste des offres qui le
+  contiennent et le poids BM25 de chaque occurrence, calculé une fois
+  pour toutes (matrice CSR termes x offres) ;
+- formations associées à chaque offre (incidence de sparse_demand.py) et
+  sa transposée, pour retrouver les offres derrière la demande d'une
+  formation ;
+- table des offres (source, titre, entreprise, lieu, catégorie, date),
+  en artefact Arrow si pyarrow est installé (voir artifacts.py).
+Les tableaux sont des fichiers .npy ouverts par projection mémoire :
+l'ouverture ne dépend pas de la taille de l'index. Chaque construction est
+écrite dans un sous-répertoire de version complet, puis publiée en
+remplaçant le fichier CURRENT (os.replace) : un dashboard qui a projeté
+l'index précédent en mémoire garde des fichiers intacts, et une lecture
+ne mélange jamais deux versions. Le score d'une requête
+est la somme des poids de ses termes, soit une lecture de leurs listes
+d'offres et un np.bincount : quelques millisecondes pour un million
+d'offres.
+"""
+
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+import artifacts
+from pipeline import NO_FORMATION
+from similarity import normalize_text
+from store import offer_table
+
+INDEX_DIR = os.environ.get("SEARCH_INDEX", "search_index")
+# Paramètres BM25 usuels : saturation de la fréquence et normalisation par la longueur
+K1 = 1.2
+B = 0.75
+# Colonnes indexées de chaque offre
+TEXT_COLUMNS = ('title', 'skills')
+# Formations affichées au plus par offre
+MAX_FORMATIONS = 5
+OFFERS_CSV = "offres.csv"
+CURRENT_NAME = "CURRENT"
+# Versions conservées (la version publiée comprise) : la précédente peut encore être projetée en mémoire
+KEEP_VERSIONS = 2
+ARRAYS = ('terms', 'postings_indptr', 'postings_offers', 'postings_weights',
+          'formations_indptr', 'formations_ids', 'offers_indptr', 'offers_ids', 'formation_titles')
+
+
+def offer_text(df):
+    """Texte indexé de chaque offre : colonnes TEXT_COLUMNS présentes, bout à bout"""
+    columns = [c for c in TEXT_COLUMNS if c in df.columns]
+    if not columns:
+        return pd.Series('', index=df.index)
+    text = df[columns[0]].fillna('').astype(str)
+    for column in columns[1:]:
+        text = text + ' ' + df[column].fillna('').astype(str)
+    return text
+
+
+def bm25_weights(counts, k1=K1, b=B):
+    """Poids BM25 de chaque (offre, terme) d'une matrice de fréquences offres x termes"""
+    counts = sparse.csr_matrix(counts, dtype=np.float32)
+    n_offers = counts.shape[0]
+    lengths = np.asarray(counts.sum(axis=1)).ravel()
+    average = lengths.mean() if n_offers and lengths.mean() > 0 else 1.0
+    frequencies = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log1p((n_offers - frequencies + 0.5) / (frequencies + 0.5)).astype(np.float32)
+    rows = np.repeat(np.arange(n_offers), np.diff(counts.indptr))
+    tf = counts.data
+    counts.data = idf[counts.indices] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[rows] / average))
+    return counts
+
+
+class SearchIndex:
+    """Index inversé BM25 des offres et formations associées à chaque offre"""
+
+    def __init__(self, terms, postings, incidence, formation_titles, offers, by_formation=None):
+        self.terms = terms
+        self.postings = postings
+        self.incidence = incidence
+        self.formation_titles = formation_titles
+        self.offers = offers
+        # Formations x offres (transposée de l'incidence), calculée à la demande si absente
+        self.by_formation = by_formation
+
+    @classmethod
+    def build(cls, offer_frames, demand_matrix=None):
+        """Depuis {source: DataFrame} et l'OfferFormationMatrix des mêmes offres (même ordre)"""
+        frames = {source: df for source, df in offer_frames.items() if df is not None}
+        text = pd.concat([offer_text(df) for df in frames.values()], ignore_index=True) \
+            if frames else pd.Series(dtype=object)
+        vectorizer = CountVectorizer(lowercase=False, dtype=np.int32)
+        try:
+            counts = vectorizer.fit_transform(normalize_text(text))
+            terms = vectorizer.get_feature_names_out().astype(str)
+        except ValueError:  # aucun terme (pas d'offre ou titres vides)
+            counts, terms = sparse.csr_matrix((len(text), 0), dtype=np.int32), np.empty(0, dtype=str)
+        # Termes x offres : la liste des offres d'un terme est une tranche contiguë
+        postings = bm25_weights(counts).T.tocsr()
+        postings.sort_indices()
+
+        offers = pd.concat([offer_table(df, source) for source, df in frames.items()], ignore_index=True) \
+            if frames else pd.DataFrame()
+        if demand_matrix is not None:
+            incidence = sparse.csr_matrix(demand_matrix.incidence, dtype=np.int8)
+            formation_titles = demand_matrix.titles.to_numpy(dtype=str)
+        else:
+            incidence = sparse.csr_matrix((len(text), 0), dtype=np.int8)
+            formation_titles = np.empty(0, dtype=str)
+        return cls(terms, postings, incidence, formation_titles, offers)
+
+    # ============================
+    # Persistance
+    # ============================
+    def save(self, directory=INDEX_DIR):
+        """Publie l'index dans `directory` (un .npy par tableau, table des offres à part)
+
+        Les fichiers sont écrits dans un répertoire de préparation, renommé
+        en répertoire de version, puis CURRENT est remplacé : les fichiers
+        d'une version publiée ne sont jamais réécrits.
+        """
+        os.makedirs(directory, exist_ok=True)
+        version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        staging = os.path.join(directory, f".{version}.tmp")
+        os.makedirs(staging)
+        try:
+            self._write(staging)
+            os.replace(staging, os.path.join(directory, version))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        pointer = os.path.join(directory, CURRENT_NAME)
+        with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+        os.replace(f"{pointer}.tmp", pointer)
+        self._prune(directory, version)
+        return directory
+
+    def _write(self, directory):
+        if artifacts.pa is not None:
+            artifacts.write_frame(self.offers, artifacts.artifact_path(OFFERS_CSV, directory))
+        else:
+            self.offers.to_csv(os.path.join(directory, OFFERS_CSV), index=False)
+        by_formation = self._formation_offers()
+        arrays = {
+            'terms': self.terms,
+            # Types d'index de scipy conservés : rien à convertir (ni copier) au chargement
+            'postings_indptr': self.postings.indptr,
+            'postings_offers': self.postings.indices,
+            'postings_weights': self.postings.data.astype(np.float32),
+            'formations_indptr': self.incidence.indptr,
+            'formations_ids': self.incidence.indices,
+            'offers_indptr': by_formation.indptr,
+            'offers_ids': by_formation.indices,
+            'formation_titles': self.formation_titles,
+        }
+        for name, values in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+
+    @staticmethod
+    def _prune(directory, current):
+        """Supprime les versions au-delà de KEEP_VERSIONS (jamais `current`) et les préparations abandonnées"""
+        entries = sorted(os.listdir(directory))
+        versions = [e for e in entries if os.path.isdir(os.path.join(directory, e)) and not e.startswith(".")]
+        stale = [e for e in entries if e.startswith(".") and e.endswith(".tmp")]
+        stale += [v for v in versions[:max(len(versions) - KEEP_VERSIONS, 0)] if v != current]
+        for entry in stale:
+            # Fichiers encore projetés en mémoire : suppression différée par le système
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+    @staticmethod
+    def _version_dir(directory):
+        """Répertoire de la version publiée (index d'une version antérieure : `directory` lui-même)"""
+        pointer = os.path.join(directory, CURRENT_NAME)
+        if not os.path.exists(pointer):
+            return directory
+        with open(pointer, encoding="utf-8") as f:
+            return os.path.join(directory, f.read().strip())
+
+    @classmethod
+    def load(cls, directory=INDEX_DIR):
+        """Index projeté en mémoire (lecture seule), version publiée"""
+        directory = cls._version_dir(directory)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in ARRAYS}
+        offers = artifacts.load(os.path.join(directory, OFFERS_CSV), directory)
+        n_offers, n_formations = len(offers), len(arrays['formation_titles'])
+        postings = sparse.csr_matrix((arrays['postings_weights'], arrays['postings_offers'],
+                                      arrays['postings_indptr']), shape=(len(arrays['terms']), n_offers))
+        incidence = sparse.csr_matrix((np.ones(len(arrays['formations_ids']), dtype=np.int8),
+                                       arrays['formations_ids'], arrays['formations_indptr']),
+                                      shape=(n_offers, n_formations))
+        by_formation = sparse.csr_matrix((np.ones(len(arrays['offers_ids']), dtype=np.int8),
+                                          arrays['offers_ids'], arrays['offers_indptr']),
+                                         shape=(n_formations, n_offers))
+        return cls(arrays['terms'], postings, incidence, arrays['formation_titles'], offers, by_formation)
+
+    @staticmethod
+    def exists(directory=INDEX_DIR):
+        return os.path.exists(os.path.join(directory, CURRENT_NAME)) \
+            or os.path.exists(os.path.join(directory, "terms.npy"))
+
+    @staticmethod
+    def version_path(directory=INDEX_DIR):
+        """Fichier dont la date identifie la version publiée (CURRENT, remplacé en dernier)"""
+        pointer = os.path.join(directory, CURRENT_NAME)
+        return pointer if os.path.exists(pointer) else os.path.join(directory, "formation_titles.npy")
+
+    # ============================
+    # Requêtes
+    # ============================
+    def _term_ids(self, query):
+        """Positions des termes de la requête présents dans l'index (termes triés)"""
+        words = np.unique(np.asarray(normalize_text([query]).iloc[0].split(), dtype=str))
+        if not len(words) or not len(self.terms):
+            return np.empty(0, dtype=int)
+        positions = np.minimum(np.searchsorted(self.terms, words), len(self.terms) - 1)
+        return positions[self.terms[positions] == words]
+
+    def _formation_offers(self):
+        if self.by_formation is None:
+            self.by_formation = self.incidence.T.tocsr()
+        return self.by_formation
+
+    def formations_of(self, offers, limit=MAX_FORMATIONS):
+        """Titres des formations associées à chaque offre (positions), 'Autres' si aucune"""
+        indptr, ids = self.incidence.indptr, self.incidence.indices
+        labels = []
+        for offer in offers:
+            titles = self.formation_titles[ids[indptr[offer]:indptr[offer + 1]]]
+            label = ', '.join(titles[:limit]) or NO_FORMATION
+            labels.append(label + (f" (+{len(titles) - limit})" if len(titles) > limit else ""))
+        return labels
+
+    def formations_in(self, offers):
+        """Titres distincts des formations associées à un ensemble d'offres (positions)"""
+        columns = np.unique(self.incidence[np.asarray(offers, dtype=int)].indices)
+        return pd.unique(self.formation_titles[columns]).tolist()
+
+    def _rows(self, offers, scores=None):
+        """Offres (index : position dans l'index), score éventuel et formations associées"""
+        rows = self.offers.iloc[offers].set_axis(pd.Index(offers, name='offre'))
+        if scores is not None:
+            rows.insert(0, 'score', np.round(scores, 2))
+        rows['formations'] = self.formations_of(offers)
+        return rows
+
+    def search(self, query, limit=20):
+        """Offres les mieux classées (BM25) pour `query`, avec leurs formations associées"""
+        term_ids = self._term_ids(query)
+        if not len(term_ids):
+            return self._rows(np.empty(0, dtype=int), np.empty(0))
+        indptr = self.postings.indptr
+        slices = [slice(indptr[t], indptr[t + 1]) for t in term_ids]
+        offers = np.concatenate([self.postings.indices[s] for s in slices])
+        weights = np.concatenate([self.postings.data[s] for s in slices])
+        scores = np.bincount(offers, weights=weights, minlength=len(self.offers))
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        # Score décroissant, puis ordre des offres à égalité
+        best = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return self._rows(best, scores[best])
+
+    def formation_offers(self, title, limit=100):
+        """Offres comptées dans la demande d'une formation (toutes lignes du catalogue de ce titre)"""
+        by_formation = self._formation_offers()
+        indptr, ids = by_formation.indptr, by_formation.indices
+        columns = np.flatnonzero(self.formation_titles == title)
+        offers = np.unique(np.concatenate([ids[indptr[c]:indptr[c + 1]] for c in columns])) \
+            if len(columns) else np.empty(0, dtype=int)
+        return self._rows(offers[:limit]), len(offers)
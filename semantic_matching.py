@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Association offres -> formations par similarité de vecteurs creux
+
+L'association littérale (pipeline.map_to_formations) retient une
+formation dès qu'un mot-clé de l'offre apparaît comme sous-chaîne de son
+titre : « data » ne rapproche pas une offre « Machine Learning Engineer »
+d'une formation « Intelligence artificielle », et un mot court comme
+« art » associe « Smart Contract Developer » à « Intelligence artificielle ».
+
+Ici, offres et formations sont représentées par le même espace de
+vecteurs creux, normalisés :
+- les mots entiers des titres normalisés (minuscules, sans accents),
+  pondérés par TF-IDF appris sur le catalogue ;
+- les concepts de la taxonomie (taxonomy.json) reconnus dans le titre :
+  « machine learning » et « deep learning » partagent la composante AI/ML,
+  ce qui rapproche les synonymes que les mots seuls ne relient pas.
+Chaque offre est associée à ses k formations les plus proches (similarité
+cosinus, produit creux par blocs de similarity.py) au-dessus du seuil ;
+sinon à 'Autres', comme pour l'association littérale. Les titres d'offres
+identiques ne sont vectorisés et comparés qu'une fois.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from similarity import normalize_text, sparse_top_k, top_k_matrix
+from sparse_demand import OfferFormationMatrix
+from taxonomy import TechnologyClassifier
+
+# Formations retenues au plus par offre, et similarité minimale
+TOP_K = 3
+THRESHOLD = 0.3
+# Poids d'un concept de la taxonomie par rapport à un mot (avant normalisation)
+CONCEPT_WEIGHT = 1.0
+
+
+class SemanticMatcher:
+    """Plus proches formations de chaque titre d'offre (mots TF-IDF + concepts de la taxonomie)"""
+
+    def __init__(self, formation_titles, classifier=None, k=TOP_K, threshold=THRESHOLD,
+                 concept_weight=CONCEPT_WEIGHT):
+        self.titles = pd.Series(formation_titles).astype(str).reset_index(drop=True)
+        self.classifier = TechnologyClassifier.from_file() if classifier is None else classifier
+        self.k = k
+        self.threshold = threshold
+        self.concept_weight = concept_weight
+        # Vocabulaire et IDF du catalogue : un mot absent des formations ne rapproche de rien
+        self.vectorizer = TfidfVectorizer(sublinear_tf=True, norm=None, dtype=np.float32)
+        self.vectorizer.fit(normalize_text(self.titles))
+        self.formation_vectors = self.transform(self.titles)
+
+    def transform(self, titles):
+        """Vecteurs normalisés (mots du catalogue puis concepts) de chaque titre"""
+        titles = pd.Series(titles).fillna('').astype(str)
+        words = self.vectorizer.transform(normalize_text(titles))
+        # Concepts reconnus sur le texte d'origine (les mots-clés de la taxonomie sont accentués)
+        tags = self.classifier.tag(titles)[self.classifier.technologies].to_numpy(dtype=np.float32)
+        concepts = sparse.csr_matrix(tags * self.concept_weight)
+        return normalize(sparse.hstack([words, concepts], format='csr'))
+
+    def match(self, titles):
+        """Incidence 0/1 titres x formations : k plus proches formations au-dessus du seuil"""
+        codes, distinct = pd.factorize(pd.Series(titles).fillna('').astype(str))
+        matches = sparse_top_k(self.transform(distinct), self.formation_vectors, self.k, self.threshold)
+        return top_k_matrix(matches, (len(distinct), len(self.titles)))[codes]
+
+    def scores(self, titles):
+        """Paires (titre, formation, score) retenues, pour contrôler le seuil"""
+        titles = pd.Series(titles).astype(str).reset_index(drop=True)
+        matches = sparse_top_k(self.transform(titles), self.formation_vectors, self.k, self.threshold)
+        return pd.DataFrame({'offre': titles.to_numpy()[matches['left']],
+                             'formation': self.titles.to_numpy()[matches['right']],
+                             'score': matches['score'].round(3)})
+
+
+def offer_titles(df):
+    """Titre de chaque offre (compétences à défaut, comme pipeline.offer_keywords)"""
+    for column in ('title', 'skills'):
+        if column in df.columns:
+            return df[column]
+    return pd.Series('', index=df.index)
+
+
+def match_frames(offer_frames, df_formations, matcher=None):
+    """OfferFormationMatrix des offres {source: DataFrame}, associées par similarité"""
+    frames = {source: df for source, df in offer_frames.items() if df is not None}
+    matcher = SemanticMatcher(df_formations.iloc[:, 0]) if matcher is None else matcher
+    titles = pd.concat([offer_titles(df) for df in frames.values()], ignore_index=True) \
+        if frames else pd.Series(dtype=object)
+    return OfferFormationMatrix.from_incidence(matcher.match(titles), df_formations, frames)
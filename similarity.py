@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Plus proches voisins par produit scalaire creux, bloc par bloc
+
+Les lignes des deux matrices sont des vecteurs normalisés (TF-IDF) : leur
+produit scalaire est la similarité cosinus. Le produit creux A @ B.T ne
+calcule que les paires qui partagent au moins une composante (un n-gramme,
+un mot...), comme un index inversé : pas de comparaison de toutes les
+paires. Les lignes de A sont traitées par blocs pour borner la mémoire, et
+seules les k meilleures paires au-dessus du seuil sont gardées par ligne.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Lignes de A traitées ensemble
+BLOCK_SIZE = 10_000
+
+
+def normalize_text(values):
+    """Minuscules, sans accents, ponctuation remplacée par des espaces simples"""
+    text = pd.Series(values).astype(str).str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+    return text.str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+
+
+def _top_k(product, k, threshold, offset):
+    """(ligne, colonne, score) des k meilleurs scores >= seuil de chaque ligne d'un bloc"""
+    product = product.tocoo()
+    keep = product.data >= threshold
+    rows, columns, scores = product.row[keep], product.col[keep], product.data[keep]
+    # Tri par ligne puis score décroissant (colonne croissante à égalité)
+    order = np.lexsort((columns, -scores, rows))
+    rows, columns, scores = rows[order], columns[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.empty(0, dtype=int)
+    rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    keep = rank < k
+    return rows[keep] + offset, columns[keep], scores[keep]
+
+
+def sparse_top_k(a, b, k=1, threshold=0.0, block_size=BLOCK_SIZE):
+    """Les k lignes de `b` les plus proches de chaque ligne de `a` (score >= seuil)
+
+    Renvoie un DataFrame (left, right, score) trié par `left` puis score
+    décroissant ; les lignes de `a` sans voisin au-dessus du seuil sont absentes.
+    """
+    a, b_t = sparse.csr_matrix(a), sparse.csr_matrix(b).T.tocsc()
+    parts = [_top_k(a[start:start + block_size] @ b_t, k, threshold, start)
+             for start in range(0, a.shape[0], block_size)]
+    if not parts:
+        return pd.DataFrame({'left': pd.Series(dtype=int), 'right': pd.Series(dtype=int),
+                             'score': pd.Series(dtype=float)})
+    rows, columns, scores = (np.concatenate(p) for p in zip(*parts))
+    return pd.DataFrame({'left': rows, 'right': columns, 'score': scores})
+
+
+def top_k_matrix(matches, shape):
+    """Matrice creuse 0/1 (lignes de a x lignes de b) des paires retenues"""
+    return sparse.csr_matrix((np.ones(len(matches), dtype=np.int32),
+                              (matches['left'].to_numpy(), matches['right'].to_numpy())), shape=shape)
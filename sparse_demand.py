@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Demande par formation sous forme de matrices creuses
+
+La règle de stage.py (une offre est associée à chaque formation dont le
+titre contient l'un de ses mots-clés, sinon à 'Autres') est représentée
+par deux matrices d'incidence creuses (scipy.sparse, CSR) :
+- offres x vocabulaire des mots-clés ;
+- mots-clés x formations.
+Leur produit booléen donne une fois pour toutes l'incidence
+offres x formations. La demande de chaque formation est alors un produit
+matrice-vecteur avec un vecteur de poids des offres ; restreindre la
+demande à une source, une période ou une localisation revient à changer
+ce vecteur (masque), sans reconstruire ni « exploser » les listes.
+"""
+
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from cross_correlation import DATE_COLUMNS, offer_categories
+from pipeline import NO_FORMATION
+from token_ids import TokenArray, Vocabulary
+
+# Nombre maximal de comparaisons (mots-clés x formations) par bloc
+BLOCK_SIZE = 2_000_000
+
+
+def _binary(matrix):
+    """Matrice CSR à valeurs 0/1 (doublons sommés puis ramenés à 1)"""
+    matrix = matrix.tocsr()
+    matrix.sum_duplicates()
+    matrix.data = np.ones_like(matrix.data, dtype=np.int32)
+    return matrix
+
+
+def keyword_matrix(keyword_lists, vocabulary=None):
+    """Incidence offres x mots-clés et vocabulaire (mots-clés dans l'ordre des colonnes)
+
+    Les listes de mots-clés sont aplaties une seule fois ; un mot absent de
+    `vocabulary` (s'il est fourni) est ignoré.
+    """
+    lengths = np.fromiter((len(k) if isinstance(k, (list, tuple)) else 0 for k in keyword_lists),
+                          dtype=np.int64, count=len(keyword_lists))
+    flat = pd.Index(list(chain.from_iterable(k for k in keyword_lists if isinstance(k, (list, tuple)))),
+                    dtype=object)
+    if vocabulary is None:
+        codes, vocabulary = pd.factorize(flat)
+        vocabulary = np.asarray(vocabulary, dtype=object)
+    else:
+        codes = pd.Index(vocabulary).get_indexer(flat)
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    known = codes >= 0
+    matrix = sparse.csr_matrix((np.ones(known.sum(), dtype=np.int32), (rows[known], codes[known])),
+                               shape=(len(lengths), len(vocabulary)))
+    return _binary(matrix), vocabulary
+
+
+def formation_matrix(vocabulary, titles, block_size=BLOCK_SIZE):
+    """Incidence mots-clés x formations : le titre (en minuscules) contient le mot-clé"""
+    titles = np.asarray(pd.Series(titles).astype(str).str.lower(), dtype=str)
+    vocabulary = np.asarray(vocabulary, dtype=str)
+    rows, columns = [], []
+    step = max(1, block_size // max(len(titles), 1))
+    for start in range(0, len(vocabulary), step):
+        block = vocabulary[start:start + step]
+        found = np.char.find(titles[None, :], block[:, None]) >= 0
+        r, c = np.nonzero(found)
+        rows.append(r + start)
+        columns.append(c)
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=int)
+    columns = np.concatenate(columns) if columns else np.empty(0, dtype=int)
+    return sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, columns)),
+                             shape=(len(vocabulary), len(titles)))
+
+
+def offer_metadata(df, source):
+    """Source, date, localisation et catégorie de chaque offre (pour les masques)"""
+    date_column = next((c for c in DATE_COLUMNS if c in df.columns), None)
+    dates = (pd.to_datetime(df[date_column], errors='coerce', utc=True).dt.tz_localize(None)
+             if date_column else pd.Series(pd.NaT, index=df.index))
+    return pd.DataFrame({
+        'source': source,
+        'date': dates.to_numpy(),
+        'location': df['location'].astype(str).to_numpy() if 'location' in df.columns else None,
+        'category': offer_categories(df).to_numpy() if 'category' in df.columns else None,
+    })
+
+
+def frames_metadata(frames):
+    """Métadonnées des offres de {source: DataFrame}, dans l'ordre des sources"""
+    if not frames:
+        return pd.DataFrame(columns=['source', 'date', 'location', 'category'])
+    return pd.concat([offer_metadata(df, source) for source, df in frames.items()], ignore_index=True)
+
+
+class OfferFormationMatrix:
+    """Incidence offres x formations et demande par produit matrice-vecteur"""
+
+    def __init__(self, offer_keywords, keyword_formations, vocabulary, formations, offers):
+        self.offer_keywords = offer_keywords
+        self.keyword_formations = keyword_formations
+        self.vocabulary = vocabulary
+        self.formations = formations.reset_index(drop=True)
+        self.offers = offers.reset_index(drop=True)
+        # Offre associée à la formation si au moins un mot-clé commun
+        self.incidence = _binary(offer_keywords @ keyword_formations)
+        # Offres sans aucune formation : comptées dans 'Autres'
+        self.unmatched = np.diff(self.incidence.indptr) == 0
+
+    @classmethod
+    def from_frames(cls, offer_frames, df_formations, keywords=None):
+        """`offer_frames` : {source: DataFrame avec une colonne 'keywords'} ; titre = 1re colonne
+
+        `keywords` ({source: TokenArray}, voir token_ids.py) remplace la
+        colonne 'keywords' : la matrice est alors construite sans listes Python.
+        """
+        frames = {source: df for source, df in offer_frames.items() if df is not None}
+        if keywords is not None:
+            tokens = TokenArray.concat([keywords[source] for source in frames])
+            offer_keywords, vocabulary = tokens.to_csr(), tokens.vocabulary.tokens
+        else:
+            keyword_lists = [k for df in frames.values() for k in df['keywords']]
+            offer_keywords, vocabulary = keyword_matrix(keyword_lists)
+        titles = df_formations.iloc[:, 0].astype(str)
+        keyword_formations = formation_matrix(vocabulary, titles)
+        return cls(offer_keywords, keyword_formations, vocabulary, df_formations, frames_metadata(frames))
+
+    @classmethod
+    def from_incidence(cls, incidence, df_formations, offer_frames):
+        """Depuis une incidence offres x formations déjà calculée (voir semantic_matching.py)
+
+        Les lignes de `incidence` suivent l'ordre des offres de `offer_frames`.
+        """
+        frames = {source: df for source, df in offer_frames.items() if df is not None}
+        titles = df_formations.iloc[:, 0].astype(str).to_numpy(dtype=object)
+        # Chaque formation est son propre « mot-clé » : le produit redonne l'incidence
+        return cls(sparse.csr_matrix(incidence), sparse.identity(len(titles), dtype=np.int32, format='csr'),
+                   titles, df_formations, frames_metadata(frames))
+
+    @property
+    def titles(self):
+        return self.formations.iloc[:, 0].astype(str)
+
+    def formation_matches(self):
+        """Formations associées à chaque offre (TokenArray de titres), 'Autres' si aucune
+
+        Même contenu que la colonne formations_associees de pipeline.offer_formations.
+        """
+        vocabulary = Vocabulary([NO_FORMATION])
+        codes = vocabulary.encode(self.titles)
+        lengths = np.diff(self.incidence.indptr)
+        offsets = np.concatenate([[0], np.cumsum(np.maximum(lengths, 1))])
+        ids = np.zeros(offsets[-1], dtype=np.int32)
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        ids[offsets[rows] + np.arange(self.incidence.nnz) - self.incidence.indptr[rows]] = \
+            codes[self.incidence.indices]
+        return TokenArray(ids, offsets, vocabulary)
+
+    def offer_mask(self, sources=None, start=None, end=None, location=None):
+        """Masque des offres d'une sélection (sources, période, localisation contenant `location`)"""
+        mask = np.ones(len(self.offers), dtype=bool)
+        if sources:
+            mask &= self.offers['source'].isin(list(sources)).to_numpy()
+        if start is not None:
+            mask &= (self.offers['date'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (self.offers['date'] <= pd.Timestamp(end)).to_numpy()
+        if location:
+            mask &= self.offers['location'].astype(str).str.contains(location, case=False, regex=False).to_numpy()
+        return mask
+
+    def _weights(self, mask):
+        return np.ones(len(self.offers)) if mask is None else np.asarray(mask, dtype=float)
+
+    def formation_demand(self, mask=None):
+        """Nombre d'offres par formation (une valeur par ligne du catalogue)"""
+        return self.incidence.T @ self._weights(mask)
+
+    def demand(self, mask=None):
+        """Demande par titre de formation, 'Autres' compris (comme pipeline.market_demand)"""
+        weights = self._weights(mask)
+        counts = pd.Series(self.incidence.T @ weights, index=self.titles).groupby(level=0).sum()
+        counts[NO_FORMATION] = counts.get(NO_FORMATION, 0) + weights[self.unmatched].sum()
+        counts = counts[counts > 0].astype(int).sort_values(ascending=False, kind='stable')
+        return counts.rename_axis('formation').reset_index(name='demand_offres')
+
+    def demand_by(self, column, mask=None):
+        """Demande par formation (lignes) et par valeur d'une colonne des offres (source, category...)"""
+        weights = self._weights(mask)
+        codes, groups = pd.factorize(self.offers[column])
+        valid = codes >= 0
+        # Offres x groupes, pondérées par le masque
+        membership = sparse.csr_matrix((weights[valid], (np.flatnonzero(valid), codes[valid])),
+                                       shape=(len(self.offers), len(groups)))
+        matrix = (self.incidence.T @ membership).toarray()
+        others = np.asarray(membership[self.unmatched].sum(axis=0)).ravel()
+        result = pd.DataFrame(matrix, index=self.titles, columns=groups).groupby(level=0).sum()
+        result.loc[NO_FORMATION] = result.loc[NO_FORMATION] + others if NO_FORMATION in result.index else others
+        return result.rename_axis('formation').astype(int)
+
+    def category_demand_by(self, columns, mask=None, category='categorie'):
+        """Nombre d'offres par groupe d'offres (valeurs de `columns`) et catégorie de formation
+
+        Une offre associée à plusieurs formations d'une même catégorie n'y est
+        comptée qu'une fois ; les offres sans formation sont comptées dans 'Autres'.
+        """
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        weights = self._weights(mask)
+        codes, categories = pd.factorize(self.formations[category])
+        valid = codes >= 0
+        # Offres x catégories : au moins une formation de la catégorie
+        formation_categories = sparse.csr_matrix(
+            (np.ones(valid.sum(), dtype=np.int32), (np.flatnonzero(valid), codes[valid])),
+            shape=(len(codes), len(categories)))
+        by_category = sparse.hstack([_binary(self.incidence @ formation_categories),
+                                     sparse.csr_matrix(self.unmatched.astype(np.int32)[:, None])], format='csr')
+        # Offres x groupes (ordre de première apparition), pondérées par le masque
+        groups = self.offers.groupby(columns, dropna=False, sort=False).ngroup().to_numpy()
+        first = pd.Series(np.arange(len(groups))).groupby(groups).first().to_numpy()
+        membership = sparse.csr_matrix((weights, (np.arange(len(groups)), groups)),
+                                       shape=(len(groups), len(first)))
+        counts = (membership.T @ by_category).toarray()
+        labels = self.offers[columns].iloc[first]
+        index = pd.MultiIndex.from_frame(labels) if len(columns) > 1 else pd.Index(labels[columns[0]])
+        result = pd.DataFrame(counts, index=index, columns=[*categories, NO_FORMATION])
+        return result.T.groupby(level=0, sort=False).sum().T.astype(int)
+
+    def category_demand(self, mask=None, column='categorie'):
+        """Demande totale par catégorie de formation (colonne `column` du catalogue)"""
+        demand = pd.Series(self.formation_demand(mask), index=self.formations.index)
+        return demand.groupby(self.formations[column].to_numpy()).sum().astype(int).rename('demand_offres')
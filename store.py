@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+"""
+Base analytique SQLite des offres, mots-clés, formations, étudiants et tendances
+
+Les CSV sont chargés par paquets (jamais entiers en mémoire) dans une
+base indexée ; la jointure de la demande (mots-clés -> formations), les
+agrégats par catégorie et la consultation des données brutes sont
+ensuite exécutés en SQL. La demande suit la même association que
+stage.py (FORMATION_MATCHING) : en mode littéral, une offre est associée
+à chaque formation dont le titre contient l'un de ses mots-clés ; en mode
+sémantique, à ses formations les plus proches (semantic_matching.py),
+paires gardées dans la table offer_formations. Sans formation : 'Autres'.
+
+Construction (depuis le répertoire des CSV) :
+    python store.py formation.db
+
+Les dashboards utilisent la base si la variable d'environnement
+FORMATION_DB en donne le chemin (voir analytics.py).
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cross_correlation import offer_categories
+from dedup import NearDuplicateDetector, dedup_report, deduplicate_chunks
+from fuzzy_join import fuzzy_match
+from geo import GEO_COLUMNS, location_demand
+from pipeline import NO_FORMATION, STUDENTS_COLUMN, clean_etudiants
+from semantic_matching import SemanticMatcher
+from taxonomy import TAXONOMY_PATH, TechnologyClassifier
+from trends import FREQUENCIES
+
+CHUNKSIZE = 100_000
+
+# Fichier et colonnes (source -> colonne de la table offers) de chaque source d'offres
+OFFER_SOURCES = {
+    'remotive': ("remotive_jobs_clean.csv",
+                 {'title': 'title', 'company_name': 'company', 'category': 'category',
+                  'publication_date': 'date'}),
+    'adzuna': ("adzuna_offres_brutes.csv",
+               {'title': 'title', 'company': 'company', 'location': 'location',
+                'category': 'category', 'created': 'date'}),
+}
+OFFER_COLUMNS = ['source', 'title', 'company', 'location', 'category', 'date']
+FORMATIONS_CSV = "openclassrooms_formations_final.csv"
+ETUDIANTS_CSV = "etudiants_interesses_web4jobs.csv"
+GOOGLE_TRENDS_CSV = "tendances_google_france.csv"
+EMPTY_COLUMNS = [str(i) for i in range(1, 9)]
+# Paires (offre, formation) de la demande selon l'association : (FROM, offre, formation)
+PAIRS = {
+    'litteral': ("offer_keywords ok JOIN keyword_formations kf ON kf.keyword = ok.keyword",
+                 "ok.offer_id", "kf.formation_id"),
+    'semantique': ("offer_formations ok", "ok.offer_id", "ok.formation_id"),
+}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS offers_source ON offers(source, date)",
+    "CREATE INDEX IF NOT EXISTS offers_category ON offers(category)",
+    "CREATE INDEX IF NOT EXISTS offers_location ON offers(location)",
+    "CREATE INDEX IF NOT EXISTS offer_keywords_keyword ON offer_keywords(keyword, offer_id)",
+    "CREATE INDEX IF NOT EXISTS offer_keywords_offer ON offer_keywords(offer_id)",
+    "CREATE INDEX IF NOT EXISTS keyword_formations_keyword ON keyword_formations(keyword, formation_id)",
+    "CREATE INDEX IF NOT EXISTS offer_formations_offer ON offer_formations(offer_id, formation_id)",
+    "CREATE INDEX IF NOT EXISTS etudiants_formations_formation ON etudiants_formations(formation_id)",
+    "CREATE INDEX IF NOT EXISTS trends_terme ON trends(terme, date)",
+    "CREATE INDEX IF NOT EXISTS demande_localisations_region ON demande_localisations(region, departement)",
+    "CREATE INDEX IF NOT EXISTS formations_demande_categorie ON formations_demande(categorie, demand_offres)",
+    "CREATE INDEX IF NOT EXISTS formations_demande_duree ON formations_demande(duree_heures)",
+]
+
+
+def offer_table(df, source):
+    """Offres brutes d'une source ramenées aux colonnes communes OFFER_COLUMNS"""
+    columns = OFFER_SOURCES[source][1]
+    offers = pd.DataFrame({target: df[column] if column in df.columns else None
+                           for column, target in columns.items()}, index=df.index)
+    offers = offers.reindex(columns=OFFER_COLUMNS[1:])
+    if 'category' in df.columns:
+        offers['category'] = offer_categories(df)
+    offers['date'] = (pd.to_datetime(offers['date'], errors='coerce', utc=True)
+                      .dt.tz_localize(None).dt.strftime("%Y-%m-%d %H:%M:%S"))
+    offers.insert(0, 'source', source)
+    return offers
+
+
+def default_stop_words():
+    """Mots vides anglais de NLTK (comme stage.py), ou aucun s'ils ne sont pas installés"""
+    try:
+        from nltk.corpus import stopwords
+        return set(stopwords.words('english'))
+    except LookupError:
+        return set()
+
+
+def offer_keywords(titles, stop_words):
+    """(position de l'offre, mot-clé) distincts ; mêmes règles que pipeline.extract_keywords"""
+    words = titles.astype(str).str.lower().str.replace(r'[^a-z\s]', '', regex=True).str.split()
+    words = words.explode().dropna()
+    words = words[(words.str.len() > 2) & ~words.isin(stop_words)]
+    return pd.DataFrame({'position': words.index, 'keyword': words.to_numpy()}).drop_duplicates()
+
+
+class FormationStore:
+    """Accès en lecture à la base (une connexion SQLite par thread)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        if not hasattr(self._local, "connection"):
+            self._local.connection = sqlite3.connect(self.path)
+        return self._local.connection
+
+    def query(self, sql, params=(), **kwargs):
+        return pd.read_sql_query(sql, self.connection, params=params, **kwargs)
+
+    def tables(self):
+        return set(self.query("SELECT name FROM sqlite_master WHERE type = 'table'")['name'])
+
+    @property
+    def matching(self):
+        """Association offres -> formations utilisée à la construction ('litteral' ou 'semantique')"""
+        return 'semantique' if 'offer_formations' in self.tables() else 'litteral'
+
+    # ============================
+    # Construction
+    # ============================
+    @classmethod
+    def build(cls, path, directory=".", chunksize=CHUNKSIZE, stop_words=None, deduplicate=True,
+              matching='litteral'):
+        """Crée (ou remplace) la base à partir des CSV présents dans `directory`
+
+        Avec `deduplicate`, les quasi-doublons sont retirés au fil des paquets
+        (voir dedup.py) et leur taux par source est gardé dans la table deduplication.
+        `matching` : association offres -> formations, comme stage.py.
+        """
+        if matching not in PAIRS:
+            raise ValueError(f"Association inconnue : {matching!r} (litteral ou semantique)")
+        if os.path.exists(path):
+            os.remove(path)
+        store = cls(path)
+        con = store.connection
+        literal = matching == 'litteral'
+        if literal:
+            stop_words = default_stop_words() if stop_words is None else stop_words
+
+        def csv(name):
+            return os.path.join(directory, name)
+
+        # Offres et mots-clés, source par source et paquet par paquet
+        con.execute(f"CREATE TABLE offers (id INTEGER PRIMARY KEY, {', '.join(OFFER_COLUMNS)})")
+        if literal:
+            con.execute("CREATE TABLE offer_keywords (offer_id INTEGER, keyword TEXT)")
+        next_id = 0
+        detector, report = NearDuplicateDetector() if deduplicate else None, []
+        for source, (filename, _) in OFFER_SOURCES.items():
+            if not os.path.exists(csv(filename)):
+                continue
+            chunks = pd.read_csv(csv(filename), chunksize=chunksize)
+            if detector is not None:
+                chunks = deduplicate_chunks(chunks, detector, source, report)
+            for chunk in chunks:
+                offers = offer_table(chunk, source)
+                offers.index = np.arange(next_id, next_id + len(offers))
+                offers.to_sql("offers", con, if_exists="append", index=True, index_label="id")
+
+                if literal:
+                    keywords = offer_keywords(offers['title'].reset_index(drop=True), stop_words)
+                    keywords['offer_id'] = offers.index.to_numpy()[keywords.pop('position').to_numpy()]
+                    keywords[['offer_id', 'keyword']].to_sql("offer_keywords", con, if_exists="append",
+                                                             index=False)
+                next_id += len(offers)
+
+        if report:
+            dedup_report(report).to_sql("deduplication", con)
+
+        # Formations (la première colonne est le titre, comme dans stage.py)
+        if os.path.exists(csv(FORMATIONS_CSV)):
+            next_id = 0
+            for chunk in pd.read_csv(csv(FORMATIONS_CSV), chunksize=chunksize):
+                chunk = chunk.rename(columns={chunk.columns[0]: 'titre'})
+                chunk.insert(0, 'id', np.arange(next_id, next_id + len(chunk)))
+                chunk['titre_lower'] = chunk['titre'].astype(str).str.lower()
+                chunk.to_sql("formations", con, if_exists="append", index=False)
+                next_id += len(chunk)
+
+        if os.path.exists(csv(ETUDIANTS_CSV)):
+            etudiants = clean_etudiants(pd.read_csv(csv(ETUDIANTS_CSV), header=None))
+            if STUDENTS_COLUMN in etudiants.columns:
+                pd.DataFrame({
+                    'titre': etudiants.iloc[:, 0],
+                    'etudiants': pd.to_numeric(etudiants[STUDENTS_COLUMN], errors='coerce'),
+                }).to_sql("etudiants", con, index=False)
+
+        # Google Trends au format long (date, terme, valeur)
+        if os.path.exists(csv(GOOGLE_TRENDS_CSV)):
+            for chunk in pd.read_csv(csv(GOOGLE_TRENDS_CSV), chunksize=chunksize):
+                chunk['date'] = pd.to_datetime(chunk['date']).dt.strftime("%Y-%m-%d")
+                chunk.melt(id_vars='date', var_name='terme', value_name='valeur').dropna() \
+                    .to_sql("trends", con, if_exists="append", index=False)
+
+        if {'offers', 'formations'} <= store.tables():
+            if literal:
+                store._match_keywords()
+            else:
+                store._match_offers(chunksize)
+            store._build_demand()
+        for index in INDEXES:
+            table = index.split(" ON ")[1].split("(")[0]
+            if table in store.tables():
+                con.execute(index)
+        con.commit()
+        con.execute("ANALYZE")
+        return store
+
+    def _match_keywords(self):
+        """Correspondance mots-clés -> formations (association littérale)"""
+        con = self.connection
+        con.execute("CREATE INDEX offer_keywords_keyword ON offer_keywords(keyword, offer_id)")
+        con.execute("""
+            CREATE TABLE keyword_formations AS
+            SELECT k.keyword, f.id AS formation_id
+            FROM (SELECT DISTINCT keyword FROM offer_keywords) k
+            JOIN formations f ON instr(f.titre_lower, k.keyword) > 0
+        """)
+        # Index couvrant : la jointure de la demande ne lit pas la table
+        con.execute("CREATE INDEX keyword_formations_keyword ON keyword_formations(keyword, formation_id)")
+
+    def _match_offers(self, chunksize=CHUNKSIZE):
+        """Paires (offre, formation) par similarité des titres (association sémantique), paquet par paquet"""
+        con = self.connection
+        formations = self.query("SELECT titre FROM formations ORDER BY id")['titre']
+        matcher = SemanticMatcher(formations)
+        con.execute("CREATE TABLE offer_formations (offer_id INTEGER, formation_id INTEGER)")
+        for chunk in self.query("SELECT id, title FROM offers ORDER BY id", chunksize=chunksize):
+            # Identifiants des formations = positions dans le catalogue (0..n-1, voir build)
+            offers, formation_ids = matcher.match(chunk['title']).nonzero()
+            pd.DataFrame({'offer_id': chunk['id'].to_numpy()[offers], 'formation_id': formation_ids}) \
+                .to_sql("offer_formations", con, if_exists="append", index=False)
+        # Index couvrant : la demande ne lit pas la table
+        con.execute("CREATE INDEX offer_formations_offer ON offer_formations(offer_id, formation_id)")
+
+    def _build_demand(self):
+        """Formations enrichies de la demande et des étudiants"""
+        con = self.connection
+        has_students = 'etudiants' in self.tables()
+        if has_students:
+            self._match_students()
+        students_join = ("LEFT JOIN etudiants_formations m ON m.formation_id = f.id "
+                         "LEFT JOIN etudiants e ON e.rowid = m.etudiant_rowid") if has_students else ""
+        students = "COALESCE(e.etudiants, 0)" if has_students else "NULL"
+        ratio = (f"CASE WHEN {students} > 0 THEN 1.0 * COALESCE(d.demand_offres, 0) / {students} "
+                 "ELSE COALESCE(d.demand_offres, 0) END") if has_students else "COALESCE(d.demand_offres, 0)"
+        # Demande matérialisée puis indexée : la jointure n'est évaluée qu'une fois
+        con.execute(f"CREATE TEMP TABLE demand AS {self._demand_sql()}")
+        con.execute("CREATE INDEX temp.demand_formation ON demand(formation)")
+        con.execute(f"""
+            CREATE TABLE formations_demande AS
+            SELECT f.*, COALESCE(d.demand_offres, 0) AS demand_offres,
+                   {students} AS "{STUDENTS_COLUMN}", {ratio} AS ratio_demande_etudiants
+            FROM formations f
+            LEFT JOIN demand d ON d.formation = f.titre
+            {students_join}
+            ORDER BY f.id
+        """)
+        con.execute("DROP TABLE temp.demand")
+        if 'categorie' in self.query("SELECT * FROM formations LIMIT 0").columns:
+            self._build_location_demand()
+
+    def _build_location_demand(self):
+        """Demande par localisation normalisée et catégorie de formation (voir geo.py)"""
+        pairs, offer_id, formation_id = PAIRS[self.matching]
+        counts = self.query(f"""
+            SELECT o.source, o.location, c.categorie, COUNT(*) AS demand_offres
+            FROM (SELECT DISTINCT {offer_id} AS offer_id, f.categorie
+                  FROM {pairs}
+                  JOIN formations f ON f.id = {formation_id}) c
+            JOIN offers o ON o.id = c.offer_id
+            GROUP BY o.source, o.location, c.categorie
+            UNION ALL
+            SELECT o.source, o.location, '{NO_FORMATION}', COUNT(*)
+            FROM offers o
+            WHERE NOT EXISTS (SELECT 1 FROM {pairs}
+                              WHERE {offer_id} = o.id)
+            GROUP BY o.source, o.location
+        """)
+        location_demand(counts).to_sql("demande_localisations", self.connection, index=False)
+
+    def _match_students(self):
+        """Ligne étudiants associée à chaque formation par jointure approchée des titres (fuzzy_join.py)"""
+        formations = pd.read_sql("SELECT id, titre FROM formations ORDER BY id", self.connection)
+        etudiants = pd.read_sql("SELECT rowid, titre FROM etudiants ORDER BY rowid", self.connection)
+        matches = fuzzy_match(formations['titre'], etudiants['titre'])
+        found = matches['right'].to_numpy() >= 0
+        pd.DataFrame({
+            'formation_id': formations['id'][found],
+            'etudiant_rowid': etudiants['rowid'].to_numpy()[matches['right'].to_numpy()[found]],
+            'score': matches['score'][found],
+            'methode': matches['methode'][found],
+        }).to_sql("etudiants_formations", self.connection, index=False)
+
+    def _demand_sql(self, where=""):
+        """Nombre d'offres par formation (titre), offres sans formation comptées dans 'Autres'
+
+        Les paires (offre, formation) sont comptées par identifiant avant la
+        jointure sur les titres, pour ne pas trier les titres de chaque paire.
+        """
+        pairs, offer_id, formation_id = PAIRS[self.matching]
+        return f"""
+            SELECT f.titre AS formation, SUM(m.n) AS demand_offres
+            FROM (SELECT formation_id, COUNT(*) AS n
+                  FROM (SELECT DISTINCT {offer_id} AS offer_id, {formation_id} AS formation_id
+                        FROM {pairs}
+                        JOIN offers o ON o.id = {offer_id}
+                        WHERE 1 = 1 {where})
+                  GROUP BY formation_id) m
+            JOIN formations f ON f.id = m.formation_id
+            GROUP BY f.titre
+            UNION ALL
+            SELECT '{NO_FORMATION}', COUNT(*)
+            FROM offers o
+            WHERE NOT EXISTS (SELECT 1 FROM {pairs}
+                              WHERE {offer_id} = o.id) {where}
+        """
+
+    # ============================
+    # Requêtes
+    # ============================
+    def market_demand(self, sources=None, start=None, end=None, location=None):
+        """Demande par formation, éventuellement restreinte (source, période, localisation)"""
+        where, params = self._offer_filter(sources, start, end, location)
+        # Les filtres apparaissent deux fois dans la requête (formations et 'Autres')
+        return self.query(self._demand_sql(where) + " ORDER BY demand_offres DESC", params * 2)
+
+    @staticmethod
+    def _offer_filter(sources=None, start=None, end=None, location=None):
+        clauses, params = [], []
+        if sources:
+            clauses.append(f"o.source IN ({', '.join('?' * len(sources))})")
+            params += list(sources)
+        if start is not None:
+            clauses.append("o.date >= ?")
+            params.append(str(pd.Timestamp(start)))
+        if end is not None:
+            clauses.append("o.date <= ?")
+            params.append(str(pd.Timestamp(end)))
+        if location:
+            clauses.append("o.location LIKE ?")
+            params.append(f"%{location}%")
+        return "".join(f" AND {c}" for c in clauses), params
+
+    def formations(self):
+        """Formations enrichies (équivalent de df_final_clean_no_empty.csv, triées par demande)"""
+        formations = self.query("SELECT * FROM formations_demande ORDER BY demand_offres DESC, id")
+        # Colonnes techniques et colonnes vides retirées par stage.py
+        return formations.drop(columns=['id', 'titre_lower', *EMPTY_COLUMNS], errors='ignore')
+
+    def trends_wide(self):
+        """Séries Google Trends (une colonne par terme), comme le CSV d'origine"""
+        trends = self.query("SELECT date, terme, valeur FROM trends")
+        wide = trends.pivot(index='date', columns='terme', values='valeur').reset_index()
+        wide.columns.name = None
+        wide['date'] = pd.to_datetime(wide['date'])
+        return wide
+
+    def category_demand(self):
+        return self.query("""
+            SELECT categorie, SUM(demand_offres) AS demand_offres, COUNT(titre) AS titre
+            FROM formations_demande GROUP BY categorie ORDER BY categorie
+        """)
+
+    def category_trends(self, min_demand, categories):
+        """Agrégats par catégorie des formations ayant au moins `min_demand` offres"""
+        categories = list(categories)
+        return self.query(f"""
+            SELECT categorie,
+                   ROUND(AVG(demand_offres), 2) AS "Demande Moyenne",
+                   SUM(demand_offres) AS "Demande Totale",
+                   COUNT(*) AS "Nombre Formations",
+                   ROUND(AVG(duree_heures), 2) AS "Durée Moyenne",
+                   ROUND(AVG(ratio_demande_etudiants), 2) AS "Ratio Moyen"
+            FROM formations_demande
+            WHERE demand_offres >= ? AND categorie IN ({', '.join('?' * len(categories))})
+            GROUP BY categorie ORDER BY categorie
+        """, [min_demand] + categories).set_index('categorie')
+
+    def opportunity_analysis(self):
+        return self.query("""
+            SELECT categorie,
+                   SUM(demand_offres) AS "Demande Totale",
+                   ROUND(AVG(demand_offres), 2) AS "Demande Moyenne",
+                   COUNT(*) AS "Nombre Formations",
+                   ROUND(AVG(ratio_demande_etudiants), 2) AS "Ratio Moyen"
+            FROM formations_demande GROUP BY categorie
+        """).set_index('categorie')
+
+    def offer_counts(self, column, source=None, n=10):
+        """Les n valeurs les plus fréquentes d'une colonne des offres (category, location...), toutes si n est None"""
+        if column not in OFFER_COLUMNS:
+            raise ValueError(f"Colonne inconnue : {column}")
+        where, params = self._offer_filter([source] if source else None)
+        counts = self.query(f"""
+            SELECT o.{column} AS valeur, COUNT(*) AS nombre FROM offers o
+            WHERE o.{column} IS NOT NULL {where}
+            GROUP BY o.{column} ORDER BY nombre DESC LIMIT ?
+        """, params + [-1 if n is None else n])
+        return counts.set_index('valeur')['nombre'].rename_axis(column).rename('count')
+
+    def offer_time_counts(self, freq='hebdomadaire'):
+        """Offres par période et par catégorie, agrégées en SQL (voir cross_correlation.py)"""
+        # Semaines terminées le dimanche (pandas 'W') ou débuts de mois ('MS')
+        period = "date(o.date, 'weekday 0')" if FREQUENCIES.get(freq, freq) == 'W' else "strftime('%Y-%m-01', o.date)"
+        counts = self.query(f"""
+            SELECT {period} AS date, o.category AS categorie, COUNT(*) AS nombre
+            FROM offers o WHERE o.date IS NOT NULL AND o.category IS NOT NULL
+            GROUP BY 1, 2
+        """)
+        if counts.empty:
+            return pd.DataFrame()
+        counts['date'] = pd.to_datetime(counts['date'])
+        matrix = counts.pivot(index='date', columns='categorie', values='nombre').fillna(0).astype(int)
+        return matrix.asfreq(FREQUENCIES.get(freq, freq), fill_value=0)
+
+    def technology_offer_counts(self, chunksize=CHUNKSIZE):
+        """Offres par technologie, titres classés paquet par paquet"""
+        classifier = TechnologyClassifier.from_file(TAXONOMY_PATH)
+        total = None
+        for chunk in self.query("SELECT title FROM offers", chunksize=chunksize):
+            counts = classifier.tag(chunk['title']).drop(columns='technologie').sum()
+            total = counts if total is None else total + counts
+        return total
+
+    def location_demand(self):
+        """Demande par source, région, département, ville et catégorie (vide si non calculée)"""
+        if 'demande_localisations' not in self.tables():
+            return pd.DataFrame(columns=['source', *GEO_COLUMNS, 'categorie', 'demand_offres'])
+        return self.query("SELECT * FROM demande_localisations")
+
+    def dedup_report(self):
+        """Taux de doublons par source mesuré à la construction (vide sans déduplication)"""
+        if 'deduplication' not in self.tables():
+            return dedup_report([])
+        return self.query("SELECT * FROM deduplication").set_index('source')
+
+    def count(self, table, source=None):
+        where, params = ("WHERE source = ?", [source]) if source else ("", [])
+        return int(self.query(f"SELECT COUNT(*) AS n FROM {table} {where}", params)['n'].iloc[0])
+
+    def browse(self, source=None, limit=100, offset=0, search=None):
+        """Page d'offres brutes (LIMIT / OFFSET), filtrée sur le titre si `search`"""
+        clauses, params = [], []
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        if search:
+            clauses.append("title LIKE ?")
+            params.append(f"%{search}%")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.query(f"SELECT * FROM offers {where} ORDER BY id LIMIT ? OFFSET ?",
+                          params + [limit, offset])
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "formation.db"
+    built = FormationStore.build(db_path, matching=os.environ.get("FORMATION_MATCHING", "litteral"))
+    print(f"✅ Base '{db_path}' construite : "
+          + ", ".join(f"{t} ({built.count(t)} lignes)" for t in sorted(built.tables())))
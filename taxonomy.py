@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Classification des formations et des offres par technologie
+
+La taxonomie (technologie -> mots-clés) est lue depuis taxonomy.json.
+Tous les mots-clés sont compilés en une seule expression régulière :
+chaque titre n'est parcouru qu'une fois, quel que soit le nombre de
+technologies, et un titre qui contient plusieurs mots-clés d'une même
+technologie n'est compté qu'une fois pour celle-ci.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "taxonomy.json")
+NO_TECHNOLOGY = "Autres"
+
+
+def load_taxonomy(path=TAXONOMY_PATH):
+    """Lit la taxonomie {technologie: [mots-clés]}"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class TechnologyClassifier:
+    """Étiqueteur multi-mots-clés compilé en une seule expression régulière"""
+
+    def __init__(self, taxonomy):
+        self.technologies = list(taxonomy)
+        self.keyword_codes = {}
+        for code, keywords in enumerate(taxonomy.values()):
+            for keyword in keywords:
+                self.keyword_codes.setdefault(keyword.lower(), code)
+
+        # Mots-clés les plus longs d'abord : "cybersécurité" avant "sécurité"
+        keywords = sorted(self.keyword_codes, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(k) for k in keywords), re.IGNORECASE)
+
+    @classmethod
+    def from_file(cls, path=TAXONOMY_PATH):
+        return cls(load_taxonomy(path))
+
+    def tag(self, titles):
+        """Étiquettes technologiques de chaque titre
+
+        Renvoie un DataFrame aligné sur `titles` : une colonne booléenne par
+        technologie et une colonne catégorielle 'technologie' (première
+        technologie rencontrée dans le titre, NO_TECHNOLOGY sinon).
+        """
+        titles = pd.Series(titles)
+        text = pd.Series(titles.fillna('').astype(str).to_numpy())
+        matches = text.str.findall(self.pattern).explode().dropna()
+
+        rows = matches.index.to_numpy()
+        codes = matches.str.lower().map(self.keyword_codes).to_numpy(dtype=np.int64)
+
+        membership = np.zeros((len(titles), len(self.technologies)), dtype=bool)
+        membership[rows, codes] = True
+
+        # Première correspondance de chaque titre (explode conserve l'ordre)
+        primary = np.full(len(titles), len(self.technologies), dtype=np.int64)
+        first = ~pd.Index(rows).duplicated()
+        primary[rows[first]] = codes[first]
+
+        tags = pd.DataFrame(membership, index=titles.index, columns=self.technologies)
+        tags['technologie'] = pd.Categorical.from_codes(primary, self.technologies + [NO_TECHNOLOGY])
+        return tags
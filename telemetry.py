@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Télémétrie de rendu des dashboards
+
+Chaque graphique et chaque tableau affichés via afficher_figure() /
+afficher_tableau() enregistrent :
+- le temps de préparation (depuis la fin du bloc précédent, ou le début
+  de la page / du fragment) : calcul des données et construction de la figure ;
+- le temps de rendu (sérialisation et envoi par Streamlit) ;
+- la taille envoyée au navigateur (PNG du graphique, mémoire du tableau).
+
+Les mesures sont gardées dans la session pour le panneau « Performance »
+de la barre latérale et ajoutées au journal JSONL DASHBOARD_METRICS_LOG
+(dashboard_metrics.jsonl par défaut, désactivé si la variable est vide).
+Une relance de fragment remplace les mesures de ses propres blocs : les
+totaux du panneau restent ceux de la page affichée, et le panneau (un
+fragment de la barre latérale) se redessine toutes les
+PANNEAU_INTERVALLE secondes tant qu'il est ouvert.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+METRICS_LOG = os.environ.get("DASHBOARD_METRICS_LOG", "dashboard_metrics.jsonl")
+# Nombre de mesures conservées dans la session pour les médianes du panneau
+MAX_HISTORIQUE = 500
+# Secondes entre deux mises à jour du panneau ouvert (relances de fragments comprises)
+PANNEAU_INTERVALLE = 2
+
+_verrou_journal = threading.Lock()
+
+
+def _etat():
+    etat = st.session_state.setdefault("telemetrie", {})
+    if not etat:
+        maintenant = time.perf_counter()
+        etat.update(session=uuid.uuid4().hex[:8], page=None, fragment=None, debut=maintenant,
+                    marque=maintenant, blocs=[], historique=[])
+    return etat
+
+
+def _journaliser(mesure):
+    if not METRICS_LOG:
+        return
+    ligne = json.dumps(mesure, ensure_ascii=False)
+    with _verrou_journal:
+        with open(METRICS_LOG, "a", encoding="utf-8") as f:
+            f.write(ligne + "\n")
+
+
+def _enregistrer(**mesure):
+    etat = _etat()
+    mesure = {'date': datetime.now().isoformat(timespec="milliseconds"),
+              'session': etat['session'], 'page': etat['page'], 'fragment': etat['fragment'], **mesure}
+    if mesure['type'] in ('graphique', 'tableau'):
+        etat['blocs'].append(mesure)
+    etat['historique'].append(mesure)
+    del etat['historique'][:-MAX_HISTORIQUE]
+    _journaliser(mesure)
+
+
+def debut_page(page):
+    """Début d'une exécution complète de la page"""
+    etat = _etat()
+    etat.update(page=page, fragment=None, debut=time.perf_counter(), marque=time.perf_counter(), blocs=[])
+
+
+def marque(fragment=None):
+    """Début d'un fragment : point de départ du prochain temps de préparation
+
+    Les blocs mesurés lors d'une exécution précédente du fragment sont
+    retirés : ceux de cette exécution les remplacent.
+    """
+    etat = _etat()
+    if fragment is not None:
+        etat['blocs'] = [b for b in etat['blocs'] if b['fragment'] != fragment]
+    etat.update(fragment=fragment, marque=time.perf_counter())
+
+
+def _titre(fig):
+    suptitle = getattr(fig, "_suptitle", None)
+    if suptitle is not None and suptitle.get_text():
+        return suptitle.get_text()
+    titres = [ax.get_title() for ax in fig.axes if ax.get_title()]
+    return " / ".join(titres) if titres else f"graphique {len(_etat()['blocs']) + 1}"
+
+
+def afficher_figure(fig, nom=None, **kwargs):
+    """st.pyplot mesuré ; `nom` vaut par défaut le titre de la figure"""
+    etat = _etat()
+    debut = time.perf_counter()
+    preparation = debut - etat['marque']
+
+    # Taille du PNG écrit par Streamlit dans son tampon
+    taille = {}
+    savefig = fig.savefig
+
+    def savefig_mesure(fname, *args, **options):
+        savefig(fname, *args, **options)
+        if hasattr(fname, "tell"):
+            taille['octets'] = fname.tell()
+
+    fig.savefig = savefig_mesure
+    try:
+        st.pyplot(fig, **kwargs)
+    finally:
+        del fig.savefig
+
+    fin = time.perf_counter()
+    etat['marque'] = fin
+    _enregistrer(type='graphique', bloc=nom or _titre(fig), preparation_ms=preparation * 1000,
+                 rendu_ms=(fin - debut) * 1000, octets=taille.get('octets'))
+
+
+def afficher_tableau(data, nom, **kwargs):
+    """st.dataframe mesuré (taille = mémoire occupée par les données)"""
+    etat = _etat()
+    debut = time.perf_counter()
+    preparation = debut - etat['marque']
+    st.dataframe(data, **kwargs)
+    fin = time.perf_counter()
+    etat['marque'] = fin
+
+    octets = data.memory_usage(deep=True, index=True)
+    _enregistrer(type='tableau', bloc=nom, preparation_ms=preparation * 1000,
+                 rendu_ms=(fin - debut) * 1000, octets=int(octets.sum() if hasattr(octets, 'sum') else octets))
+
+
+def mesurer_fragment(nom, duree_ms):
+    """Durée totale d'une exécution de fragment (voir fragments.chronometre)"""
+    _enregistrer(type='fragment', bloc=nom, total_ms=duree_ms)
+    _etat()['fragment'] = None
+
+
+def fin_page():
+    """Fin de l'exécution de la page : mesure totale, puis panneau de performance"""
+    etat = _etat()
+    octets = sum(b['octets'] or 0 for b in etat['blocs'])
+    _enregistrer(type='page', bloc=None, total_ms=(time.perf_counter() - etat['debut']) * 1000, octets=octets)
+    panneau()
+
+
+def panneau():
+    """Panneau « Performance » optionnel de la barre latérale"""
+    if not st.sidebar.checkbox("⏱️ Afficher les performances", key="panneau_performance"):
+        return
+    with st.sidebar:
+        _panneau_periodique()
+
+
+def _contenu_panneau():
+    etat = _etat()
+    page = next((m for m in reversed(etat['historique']) if m['type'] == 'page'), None)
+    with st.expander("⏱️ Performance", expanded=True):
+        if page is not None:
+            st.caption(f"Page « {page['page']} » : {page['total_ms']:.0f} ms, "
+                       f"{page['octets'] / 1024:.0f} Ko envoyés")
+        if not etat['blocs']:
+            st.caption("Aucun graphique mesuré sur cette page.")
+            return
+
+        blocs = pd.DataFrame(etat['blocs'])
+        blocs['total_ms'] = blocs['preparation_ms'] + blocs['rendu_ms']
+        blocs['Ko'] = blocs['octets'] / 1024
+        st.dataframe(blocs.sort_values('total_ms', ascending=False)
+                     [['bloc', 'preparation_ms', 'rendu_ms', 'Ko']].round(1),
+                     use_container_width=True, hide_index=True)
+
+        historique = pd.DataFrame([m for m in etat['historique'] if m['type'] in ('graphique', 'tableau')])
+        medianes = historique.groupby('bloc')[['preparation_ms', 'rendu_ms']].median()
+        st.caption(f"Médianes sur la session ({len(historique)} mesures)")
+        st.dataframe(medianes.sort_values('rendu_ms', ascending=False).round(1), use_container_width=True)
+
+
+# st.fragment (>= 1.37) : redessiné seul, périodiquement ; sinon à chaque exécution complète
+_panneau_periodique = (st.fragment(run_every=PANNEAU_INTERVALLE)(_contenu_panneau)
+                       if hasattr(st, "fragment") else _contenu_panneau)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Prévisions sur des exports Google Trends très courts (voir forecasting.MIN_PERIODS)"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecasting import MIN_PERIODS, forecast_all  # noqa: E402
+
+
+def trends(n_months):
+    dates = pd.date_range("2024-01-01", periods=n_months, freq="MS")
+    return pd.DataFrame({'date': dates, 'Python': 20.0 + 10 * np.arange(n_months), 'Cloud': 50.0})
+
+
+@pytest.mark.parametrize("n_months", [1, 2])
+def test_forecast_all_short_series_keeps_last_value(n_months):
+    result = forecast_all(trends(n_months), horizon=6, freq='mensuelle')
+
+    assert len(result['history']) == n_months < MIN_PERIODS
+    assert len(result['forecast']) == 1
+    assert result['forecast'].iloc[0].tolist() == result['history'].iloc[-1].tolist()
+    assert result['lower'].isna().all().all() and result['upper'].isna().all().all()
+    assert set(result['models']) == {'dernière valeur'}
+
+
+def test_forecast_all_fits_holt_from_min_periods():
+    result = forecast_all(trends(MIN_PERIODS), horizon=6, freq='mensuelle')
+
+    assert set(result['models']) == {'holt'}
+    assert result['lower'].notna().all().all()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Listes de mots-clés compactes : vocabulaire global et identifiants int32
+
+Une colonne de listes Python de chaînes (mots-clés d'une offre,
+formations associées) coûte plusieurs centaines d'octets par ligne : un
+objet liste, un pointeur et un objet chaîne par élément. TokenArray
+stocke la même information comme une matrice CSR sans valeurs :
+- `ids` : identifiants int32 de tous les jetons, ligne après ligne ;
+- `offsets` : début de chaque ligne dans `ids` (longueur n + 1) ;
+- `vocabulary` : chaîne de chaque identifiant, partagée entre colonnes.
+
+Mesuré avec `memory_report` sur 100 000 offres synthétiques de même forme
+que les nôtres (benchmarks/generators.py) : 20,7 Mo de listes de
+mots-clés contre 1,6 Mo (x 12,6) ; pour les formations associées, dont
+les chaînes sont déjà partagées, le gain se limite aux listes et
+pointeurs (x 2,2).
+
+Les conversions `from_lists` / `to_series` permettent de repasser aux
+listes pour les étapes pandas existantes ; `explode` donne directement le
+résultat de Series.explode sans créer de listes.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class Vocabulary:
+    """Correspondance jeton <-> identifiant, enrichie au fil des encodages"""
+
+    def __init__(self, tokens=()):
+        self._index = pd.Index(pd.unique(pd.Series(list(tokens), dtype=object)), dtype=object)
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def tokens(self):
+        """Jetons dans l'ordre des identifiants"""
+        return self._index.to_numpy(dtype=object)
+
+    def encode(self, tokens):
+        """Identifiants int32 des jetons ; les jetons inconnus sont ajoutés"""
+        tokens = pd.Index(tokens, dtype=object)
+        codes = self._index.get_indexer(tokens)
+        missing = codes < 0
+        if missing.any():
+            self._index = self._index.append(pd.Index(pd.unique(tokens[missing]), dtype=object))
+            codes[missing] = self._index.get_indexer(tokens[missing])
+        return codes.astype(np.int32)
+
+    def decode(self, ids):
+        return self.tokens[np.asarray(ids)]
+
+
+class TokenArray:
+    """n listes de jetons : identifiants à plat + offsets (CSR), vocabulaire partagé"""
+
+    def __init__(self, ids, offsets, vocabulary):
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def from_lists(cls, lists, vocabulary=None):
+        """Depuis une Series / liste de listes de chaînes (valeurs non listes -> ligne vide)"""
+        vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        lists = list(lists)
+        lengths = np.fromiter((len(v) if isinstance(v, (list, tuple)) else 0 for v in lists),
+                              dtype=np.int64, count=len(lists))
+        flat = [token for v in lists if isinstance(v, (list, tuple)) for token in v]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        return cls(vocabulary.encode(flat), offsets, vocabulary)
+
+    @classmethod
+    def from_csr(cls, matrix, vocabulary):
+        """Depuis une matrice creuse lignes x vocabulaire (colonnes non nulles de chaque ligne)"""
+        matrix = sparse.csr_matrix(matrix)
+        matrix.sort_indices()
+        return cls(matrix.indices, matrix.indptr, vocabulary)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        return list(self.vocabulary.decode(self.ids[self.offsets[row]:self.offsets[row + 1]]))
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        """Mémoire des identifiants et offsets (hors vocabulaire partagé)"""
+        return self.ids.nbytes + self.offsets.nbytes
+
+    def take(self, rows):
+        """Sous-ensemble de lignes (positions ou masque booléen), même vocabulaire"""
+        rows = np.arange(len(self))[rows] if np.asarray(rows).dtype == bool else np.asarray(rows)
+        starts, lengths = self.offsets[rows], self.lengths[rows]
+        positions = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) \
+            + np.arange(lengths.sum())
+        return TokenArray(self.ids[positions], np.concatenate([[0], np.cumsum(lengths)]), self.vocabulary)
+
+    def explode(self, index=None):
+        """Équivalent de Series.explode() sur les listes, lignes vides exclues"""
+        index = np.arange(len(self)) if index is None else np.asarray(index)
+        return pd.Series(self.vocabulary.decode(self.ids), index=np.repeat(index, self.lengths), dtype=object)
+
+    def to_lists(self):
+        tokens = self.vocabulary.decode(self.ids).tolist()
+        return [tokens[start:end] for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())]
+
+    def to_series(self, index=None, name=None):
+        """Series de listes Python, pour les étapes pandas existantes"""
+        return pd.Series(self.to_lists(), index=index, name=name, dtype=object)
+
+    def to_csr(self, n_columns=None):
+        """Matrice d'incidence 0/1 lignes x vocabulaire (jetons répétés comptés une fois)"""
+        n_columns = len(self.vocabulary) if n_columns is None else n_columns
+        matrix = sparse.csr_matrix((np.ones(len(self.ids), dtype=np.int32), self.ids, self.offsets),
+                                   shape=(len(self), n_columns))
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return matrix
+
+    @staticmethod
+    def concat(arrays):
+        """Concatène des TokenArray de même vocabulaire"""
+        vocabulary = arrays[0].vocabulary
+        if any(a.vocabulary is not vocabulary for a in arrays):
+            raise ValueError("Les TokenArray doivent partager le même vocabulaire")
+        lengths = np.concatenate([a.lengths for a in arrays])
+        return TokenArray(np.concatenate([a.ids for a in arrays]),
+                          np.concatenate([[0], np.cumsum(lengths)]), vocabulary)
+
+
+def list_nbytes(lists):
+    """Mémoire d'une colonne de listes de chaînes : listes, pointeurs et chaînes (distinctes)"""
+    total, seen = 0, set()
+    for value in lists:
+        total += sys.getsizeof(value)
+        if isinstance(value, (list, tuple)):
+            for token in value:
+                if id(token) not in seen:
+                    seen.add(id(token))
+                    total += sys.getsizeof(token)
+    return total
+
+
+def memory_report(columns):
+    """Mémoire de colonnes de listes avant / après conversion : {nom: Series de listes}"""
+    rows = []
+    for name, lists in columns.items():
+        tokens = TokenArray.from_lists(lists)
+        vocabulary = sum(sys.getsizeof(t) for t in tokens.vocabulary.tokens) + tokens.vocabulary.tokens.nbytes
+        rows.append({'colonne': name, 'lignes': len(tokens), 'jetons': len(tokens.ids),
+                     'listes_mo': list_nbytes(lists) / 2 ** 20,
+                     'token_ids_mo': (tokens.nbytes + vocabulary) / 2 ** 20})
+    report = pd.DataFrame(rows).set_index('colonne')
+    report['gain'] = report['listes_mo'] / report['token_ids_mo']
+    return report
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur d'analyse des tendances Google Trends
+
+Tous les indicateurs sont calculés en numpy sur la matrice
+(dates x termes) complète, sans boucle Python sur les termes :
+rééchantillonnage hebdomadaire / mensuel, moyennes mobiles, croissance
+par pente des moindres carrés, accélération (courbure d'un ajustement
+quadratique) et indices de saisonnalité mensuels.
+
+Les résultats sont mis en cache une fois par version des données
+(voir versioning.py).
+"""
+
+import numpy as np
+import pandas as pd
+
+from versioning import frame_version
+
+# Fréquences de rééchantillonnage proposées
+FREQUENCIES = {'hebdomadaire': 'W', 'mensuelle': 'MS'}
+
+_cache = {}
+MAX_CACHED_VERSIONS = 8
+
+
+def trend_matrix(df_google, freq=None):
+    """Série temporelle indexée par date (un terme par colonne), rééchantillonnée si `freq`"""
+    trends = df_google.copy()
+    trends['date'] = pd.to_datetime(trends['date'])
+    trends = trends.set_index('date').sort_index().apply(pd.to_numeric, errors='coerce')
+    if freq is not None:
+        trends = trends.resample(FREQUENCIES.get(freq, freq)).mean()
+    return trends
+
+
+def rolling_mean(values, window):
+    """Moyenne mobile de chaque colonne par sommes cumulées (NaN ignorés)"""
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    zeros = np.zeros((1, values.shape[1]))
+    sums = np.vstack([zeros, np.cumsum(np.where(valid, values, 0), axis=0)])
+    counts = np.vstack([zeros, np.cumsum(valid, axis=0)])
+
+    result = np.full(values.shape, np.nan)
+    window_counts = counts[window:] - counts[:-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result[window - 1:] = (sums[window:] - sums[:-window]) / window_counts
+    return result
+
+
+def polyfit_columns(values, degree):
+    """Coefficients (degré croissant) d'un ajustement polynomial de chaque colonne
+
+    Les équations normales de toutes les colonnes sont résolues en un seul
+    appel (les NaN sont exclus colonne par colonne). Le temps est centré :
+    le coefficient d'ordre 1 est la pente moyenne par période.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    t = np.arange(len(values), dtype=float)
+    t -= t.mean()
+
+    powers = t[:, None] ** np.arange(2 * degree + 1)           # (n, 2d+1)
+    moments = valid.T.astype(float) @ powers                     # (m, 2d+1)
+    targets = powers[:, :degree + 1].T @ np.where(valid, values, 0)  # (d+1, m)
+
+    index = np.arange(degree + 1)
+    normal = moments[:, index[:, None] + index[None, :]]         # (m, d+1, d+1)
+    coefficients = np.full((values.shape[1], degree + 1), np.nan)
+    solvable = valid.sum(axis=0) > degree
+    if solvable.any():
+        coefficients[solvable] = np.linalg.solve(normal[solvable], targets.T[solvable][..., None])[..., 0]
+    return coefficients
+
+
+def seasonality_index(trends):
+    """Indice de saisonnalité mensuel : moyenne du mois / moyenne globale (1 = neutre)"""
+    monthly = trends.groupby(trends.index.month).mean()
+    index = monthly / trends.mean()
+    index.index.name = 'mois'
+    return index
+
+
+def compute_trends(df_google, freq='hebdomadaire', window=4):
+    """Indicateurs de tendance de tous les termes Google Trends
+
+    Renvoie un dict :
+    - 'series' : séries rééchantillonnées (dates x termes)
+    - 'rolling' : moyennes mobiles sur `window` périodes
+    - 'summary' : une ligne par terme (moyenne, dernière valeur, pente,
+      croissance en %, accélération, écart entre les deux moitiés)
+    - 'seasonality' : indices de saisonnalité (mois x termes)
+    """
+    trends = trend_matrix(df_google, freq)
+    values = trends.to_numpy(dtype=float)
+
+    linear = polyfit_columns(values, 1)
+    quadratic = polyfit_columns(values, 2)
+    mean = np.nanmean(values, axis=0)
+    n_periods = len(values)
+    mid = n_periods // 2
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary = pd.DataFrame({
+            'moyenne': mean,
+            'derniere_valeur': values[-1] if n_periods else np.nan,
+            'pente': linear[:, 1],
+            # Variation relative sur toute la période selon la droite ajustée
+            'croissance_pct': linear[:, 1] * (n_periods - 1) / mean * 100,
+            'acceleration': 2 * quadratic[:, 2],
+            'ecart_moities': np.nanmean(values[mid:], axis=0) - np.nanmean(values[:mid], axis=0),
+        }, index=trends.columns)
+    summary.index.name = 'terme'
+
+    return {
+        'series': trends,
+        'rolling': pd.DataFrame(rolling_mean(values, window), index=trends.index, columns=trends.columns),
+        'summary': summary.sort_values('croissance_pct', ascending=False),
+        'seasonality': seasonality_index(trends),
+    }
+
+
+def cached_trends(df_google, freq='hebdomadaire', window=4):
+    """compute_trends, calculé une seule fois par version des données"""
+    key = (frame_version(df_google), freq, window)
+    if key not in _cache:
+        if len(_cache) >= MAX_CACHED_VERSIONS:
+            _cache.pop(next(iter(_cache)))
+        _cache[key] = compute_trends(df_google, freq, window)
+    return _cache[key]
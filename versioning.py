@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Identifiants de version des données
+
+Une version change dès que le contenu (DataFrame) ou le fichier source
+change : elle sert de clé aux caches calculés « une fois par version ».
+"""
+
+import hashlib
+import os
+
+import pandas as pd
+
+
+def frame_version(df):
+    """Empreinte du contenu d'un DataFrame (valeurs, index et colonnes)"""
+    digest = hashlib.sha1()
+    digest.update(",".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def file_version(path):
+    """Version d'un fichier d'après sa date de modification et sa taille"""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"